@@ -40,11 +40,68 @@ def create_app():
         'user': mysql_user,
         'password': mysql_password,
         'database': mysql_db,
-        'charset': mysql_charset
+        'charset': mysql_charset,
+        # Seconds to establish a pooled connection (readiness probes use HEALTH_READY_TIMEOUT)
+        'connect_timeout': int(os.getenv('MYSQL_CONNECT_TIMEOUT', '5')),
     }
 
+    # Per-worker connection pool used by utils.db_utils.get_db_connection()
+    app.config['DB_POOL'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '5')),
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+        'idle_timeout': float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+        'ping_interval': float(os.getenv('DB_POOL_PING_INTERVAL', '30')),
+    }
+
+    # Readiness probe (/api/health/ready): bound on its connect and SELECT 1, and how long a result is reused
+    app.config['HEALTH_READY_TIMEOUT'] = float(os.getenv('HEALTH_READY_TIMEOUT', '1'))
+    app.config['HEALTH_READY_CACHE_TTL'] = float(os.getenv('HEALTH_READY_CACHE_TTL', '2'))
+
+    # Prescriptions kept in each physician's dashboard summary row
+    app.config['DASHBOARD_PRESCRIPTIONS'] = int(os.getenv('DASHBOARD_PRESCRIPTIONS', '2'))
+
+    # TTL (seconds) of the cached reference datasets (insurances, pharmacies, ...)
+    app.config['REFERENCE_CACHE_TTL'] = float(os.getenv('REFERENCE_CACHE_TTL', '300'))
+
+    # Keyset pagination of the list endpoints (?limit=&cursor=)
+    app.config['PAGE_SIZE_DEFAULT'] = int(os.getenv('PAGE_SIZE_DEFAULT', '100'))
+    app.config['PAGE_SIZE_MAX'] = int(os.getenv('PAGE_SIZE_MAX', '500'))
+
+    # Streamed (unpaginated) list responses: ?stream=1, or by default for these endpoints
+    app.config['STREAMING_ENDPOINTS'] = frozenset(
+        e.strip() for e in os.getenv('STREAMING_ENDPOINTS', '').split(',') if e.strip()
+    )
+    app.config['STREAM_BATCH_SIZE'] = int(os.getenv('STREAM_BATCH_SIZE', '500'))
+
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret')
+    # Password KDF: "scrypt" (cost = log2 N) or "pbkdf2_sha256" (cost = iterations); see utils/passwords.py
+    app.config['PASSWORD_HASH_SCHEME'] = os.getenv('PASSWORD_HASH_SCHEME', 'scrypt')
+    app.config['PASSWORD_HASH_COST'] = int(os.getenv('PASSWORD_HASH_COST', '0')) or None
+    # Cached physician -> patient panels used for access checks: seconds a panel is trusted, panels kept per worker
+    app.config['CARE_ACCESS_TTL'] = float(os.getenv('CARE_ACCESS_TTL', '60'))
+    app.config['CARE_ACCESS_CACHE_SIZE'] = int(os.getenv('CARE_ACCESS_CACHE_SIZE', '10000'))
+
+    # POST /api/patient/activitylog/bulk: max logs per request, rows per multi-row INSERT
+    app.config['ACTIVITY_BULK_MAX_ITEMS'] = int(os.getenv('ACTIVITY_BULK_MAX_ITEMS', '5000'))
+    app.config['ACTIVITY_BULK_BATCH_SIZE'] = int(os.getenv('ACTIVITY_BULK_BATCH_SIZE', '500'))
+
+    # Bookable hours ("HH:MM") of the 30-minute appointment slots, for availability and suggestions
+    app.config['APPOINTMENT_DAY_START'] = os.getenv('APPOINTMENT_DAY_START', '09:00')
+    app.config['APPOINTMENT_DAY_END'] = os.getenv('APPOINTMENT_DAY_END', '17:00')
+    # Cached physician agendas behind /physicians/<id>/availability: seconds an agenda is trusted,
+    # agendas kept per worker, days loaded per agenda, days per request
+    app.config['AVAILABILITY_TTL'] = float(os.getenv('AVAILABILITY_TTL', '30'))
+    app.config['AVAILABILITY_CACHE_SIZE'] = int(os.getenv('AVAILABILITY_CACHE_SIZE', '5000'))
+    app.config['AVAILABILITY_WINDOW_DAYS'] = int(os.getenv('AVAILABILITY_WINDOW_DAYS', '42'))
+    app.config['AVAILABILITY_MAX_DAYS'] = int(os.getenv('AVAILABILITY_MAX_DAYS', '31'))
+
+    # Max number of verified JWTs kept per worker (0 disables the cache)
+    app.config['TOKEN_CACHE_SIZE'] = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+    # Seconds between a worker's reads of tokens revoked through the other workers (RevokedToken, v007)
+    app.config['TOKEN_REVOCATION_TTL'] = float(os.getenv('TOKEN_REVOCATION_TTL', '5'))
 
     # -----------------------
     # Initialize DB & Migrate
@@ -54,6 +111,16 @@ def create_app():
         db.init_app(app)
         migrate.init_app(app, db)
 
+    # -----------------------
+    # Request hooks: pooled DB session, diagnostics, query stats, metrics, pagination errors
+    # -----------------------
+    from utils import db_utils, diagnostics, metrics, pagination, query_stats
+    db_utils.init_app(app)
+    diagnostics.init_app(app)
+    query_stats.init_app(app)
+    metrics.init_app(app)
+    pagination.init_app(app)
+
     # -----------------------
     # Register Blueprints
     # -----------------------
@@ -33,6 +33,53 @@ def _execute_with_pymysql(db_params, statements, return_rows=False):
     return results
 
 
+def split_sql(sql: str):
+    """
+    Split a plain SQL script into statements.
+
+    Comments (`-- ...` and `# ...` to end of line, `/* ... */`) are dropped and
+    semicolons only end a statement outside quoted strings and identifiers, so
+    prose in comments can never end up at the start of a statement. DELIMITER
+    blocks (procedures/triggers) are not supported.
+    """
+    statements = []
+    current = []
+    i = 0
+    n = len(sql)
+    while i < n:
+        c = sql[i]
+        if c in ("'", '"', '`'):
+            j = i + 1
+            while j < n:
+                if sql[j] == '\\' and c != '`':
+                    j += 2
+                    continue
+                if sql[j] == c:
+                    if j + 1 < n and sql[j + 1] == c:   # doubled quote
+                        j += 2
+                        continue
+                    break
+                j += 1
+            current.append(sql[i:j + 1])
+            i = j + 1
+        elif c == '#' or (sql.startswith('--', i) and (i + 2 == n or sql[i + 2].isspace())):
+            j = sql.find('\n', i)
+            i = n if j < 0 else j
+        elif sql.startswith('/*', i):
+            j = sql.find('*/', i + 2)
+            i = n if j < 0 else j + 2
+            current.append(' ')
+        elif c == ';':
+            statements.append(''.join(current))
+            current = []
+            i += 1
+        else:
+            current.append(c)
+            i += 1
+    statements.append(''.join(current))
+    return [s.strip() for s in statements if s.strip()]
+
+
 def execute_sql_file(path: str, app=None, return_rows: bool = False):
     """
     Execute a .sql file against the configured SQLAlchemy engine.
@@ -44,10 +91,12 @@ def execute_sql_file(path: str, app=None, return_rows: bool = False):
       use the first element.
 
     Notes:
-    - This naive implementation splits statements on semicolons. It works for plain DDL/DML
-      SQL files that don't use custom DELIMITER blocks (stored procedures/triggers). For those
-      cases prefer using the mysql CLI or a driver that supports multi-statement execution.
-    - Uses SQLAlchemy Engine / connection to benefit from pooling and transactions.
+    - Statements are split with split_sql(). It works for plain DDL/DML SQL files that
+      don't use custom DELIMITER blocks (stored procedures/triggers). For those cases
+      prefer using the mysql CLI or a driver that supports multi-statement execution.
+    - Uses SQLAlchemy Engine / connection to benefit from pooling and transactions; raw
+      PyMySQL is only used when SQLAlchemy is disabled or not initialized. A failing
+      statement raises and is never re-run through the other driver.
     """
     p = Path(path)
     if not p.exists():
@@ -59,28 +108,27 @@ def execute_sql_file(path: str, app=None, return_rows: bool = False):
     if app is None:
         app = create_app()
 
-    statements = [s.strip() for s in sql.split(';') if s.strip()]
+    statements = split_sql(sql)
     results = []
 
     with app.app_context():
-        # Try to use SQLAlchemy engine if it's initialized and SQLAlchemy is enabled
+        # Use the SQLAlchemy engine if it's initialized and SQLAlchemy is enabled
         try:
             # db.engine will raise if not initialized
-            engine = getattr(db, 'engine', None)
-            no_sqla = app.config.get('NO_SQLALCHEMY') or os.getenv('NO_SQLALCHEMY')
-            if engine is not None and not no_sqla:
-                with db.engine.begin() as conn:
-                    for stmt in statements:
-                        if return_rows and stmt.lstrip().upper().startswith('SELECT'):
-                            res = conn.execute(text(stmt))
-                            rows = [dict(r) for r in res.mappings().all()]
-                            results.append(rows)
-                        else:
-                            conn.execute(text(stmt))
-                return results if return_rows else True
+            engine = db.engine
         except Exception:
-            # fall through to PyMySQL
-            pass
+            engine = None
+        no_sqla = app.config.get('NO_SQLALCHEMY') or os.getenv('NO_SQLALCHEMY')
+        if engine is not None and not no_sqla:
+            with engine.begin() as conn:
+                for stmt in statements:
+                    if return_rows and stmt.lstrip().upper().startswith('SELECT'):
+                        res = conn.execute(text(stmt))
+                        rows = [dict(r) for r in res.mappings().all()]
+                        results.append(rows)
+                    else:
+                        conn.execute(text(stmt))
+            return results if return_rows else True
 
         # Fallback: use raw PyMySQL connection driven by app.config['DB_PARAMS']
         db_params = app.config.get('DB_PARAMS', {
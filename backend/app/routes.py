@@ -1,15 +1,80 @@
-from flask import Blueprint, jsonify, request
+import hmac
+from functools import wraps
+
+from flask import Blueprint, current_app, g, jsonify, request
 from pathlib import Path
 from .db_utils import execute_sql_file
+from utils import diagnostics
+from utils.auth_utils import bearer_token, get_revocation_list, login_required, revoke_token
+from utils.db_utils import after_commit, get_cursor
+from utils.health import readiness
+from utils.metrics import metrics_response
+from utils.query_stats import get_query_stats
+from utils.reference_cache import invalidate_reference_data
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 
+def _bearer_matches(token):
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    return hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def admin_token_required(f):
+    """Operator endpoints: "Authorization: Bearer <ADMIN_TOKEN>"; disabled while ADMIN_TOKEN is unset."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = current_app.config.get('ADMIN_TOKEN')
+        if not token:
+            return jsonify({"success": False, "message": "Admin endpoints are disabled (ADMIN_TOKEN is not set)"}), 403
+        if not _bearer_matches(token):
+            return jsonify({"success": False, "message": "Authorization header missing or invalid"}), 401
+        return f(*args, **kwargs)
+    return decorated
+
+
 @api_bp.route('/health')
 def health():
     return jsonify({"status": "ok", "service": "backend"}), 200
 
 
+@api_bp.route('/health/live')
+def health_live():
+    """Liveness: the worker answers requests. Never touches the database."""
+    return jsonify({"status": "ok", "service": "backend"}), 200
+
+
+@api_bp.route('/health/ready')
+def health_ready():
+    """Readiness: a pooled connection answers SELECT 1 within HEALTH_READY_TIMEOUT (result cached briefly)."""
+    ready, report = readiness()
+    return jsonify({"status": "ready" if ready else "unavailable", "service": "backend", **report}), \
+        200 if ready else 503
+
+
+@api_bp.route('/metrics')
+def metrics():
+    """Prometheus text exposition; aggregated over all workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not _bearer_matches(token):
+        return jsonify({"success": False, "message": "Authorization header missing or invalid"}), 401
+    return metrics_response()
+
+
+@api_bp.route('/logout', methods=['POST'])
+@login_required()
+def logout():
+    """Revoke the caller's token: at once in this worker, within TOKEN_REVOCATION_TTL in the others."""
+    cursor = get_cursor()
+    try:
+        digest = revoke_token(cursor, bearer_token(), g.current_user)
+    except Exception as e:
+        diagnostics.error("logout.failed", error=str(e))
+        return jsonify({"success": False, "message": str(e)}), 500
+    after_commit(get_revocation_list().add, digest, g.current_user.get("exp"))
+    return jsonify({"success": True, "message": "Logged out"}), 200
+
+
 @api_bp.route('/users')
 def users():
     # sample static data for scaffold
@@ -47,11 +112,16 @@ def query_file():
     if not target.exists():
         return jsonify({"error": "file not found"}), 404
 
+    diagnostics.debug("query_file.execute", file=name)
     try:
         results = execute_sql_file(str(target), app=None, return_rows=True)
     except Exception as e:
+        diagnostics.error("query_file.failed", file=name, error=str(e))
         return jsonify({"error": "execution failed", "detail": str(e)}), 500
 
+    # SQL files may write to the reference tables; drop this worker's cached copies.
+    invalidate_reference_data()
+
     # If there is a single SELECT in the file, return that array directly for convenience
     if isinstance(results, list) and len(results) == 1:
         payload = results[0]
@@ -59,3 +129,27 @@ def query_file():
         payload = results
 
     return jsonify({"file": name, "results": payload}), 200
+
+
+@api_bp.route('/admin/queries', methods=['GET'])
+@admin_token_required
+def query_stats_report():
+    """Per-fingerprint query latency histograms and the rolling slow-query log of this worker.
+
+    Query params: sort - total_ms (default), count, mean_ms, max_ms or rows; limit - fingerprints returned (50)
+    """
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in ('total_ms', 'count', 'mean_ms', 'max_ms', 'rows'):
+        return jsonify({"success": False, "message": f"cannot sort by {sort!r}"}), 400
+    try:
+        limit = max(1, int(request.args.get('limit', 50)))
+    except ValueError:
+        return jsonify({"success": False, "message": "limit must be an integer"}), 400
+    return jsonify({"success": True, **get_query_stats().snapshot(sort=sort, limit=limit)}), 200
+
+
+@api_bp.route('/admin/queries', methods=['DELETE'])
+@admin_token_required
+def reset_query_stats():
+    get_query_stats().reset()
+    return jsonify({"success": True, "message": "Query stats reset"}), 200
@@ -0,0 +1,82 @@
+"""
+Login CPU cost benchmark for the password KDF settings.
+
+Measures how many password verifications (the CPU-bound part of the login
+path) one core sustains at each cost setting, and how many cores a target
+login rate needs.
+
+    cd backend
+    python -m benchmarks.bench_password_hashing --scheme scrypt --costs 13 14 15
+    python -m benchmarks.bench_password_hashing --scheme pbkdf2_sha256 \
+        --costs 200000 600000 --processes 4 --target-rps 50 --json bench_kdf.json
+
+Cost is log2(N) for scrypt and the iteration count for PBKDF2 (see utils/passwords.py).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import time
+
+from utils.passwords import DEFAULT_COSTS, hash_password, verify_password
+
+
+def _verify_loop(args):
+    scheme, cost, duration = args
+    stored = hash_password("correct horse battery staple", scheme=scheme, cost=cost)
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        verify_password("correct horse battery staple", stored, scheme=scheme, cost=cost)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run(scheme, cost, duration, processes):
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_verify_loop, [(scheme, cost, duration)] * processes)
+    per_process = [len(r) / duration for r in results]
+    latencies = sorted(l for r in results for l in r)
+    return {
+        "scheme": scheme,
+        "cost": cost,
+        "processes": processes,
+        "verifications": len(latencies),
+        "per_core_per_sec": round(statistics.mean(per_process), 2),
+        "total_per_sec": round(sum(per_process), 2),
+        "latency_ms_p50": round(latencies[len(latencies) // 2] * 1000, 2),
+        "latency_ms_p99": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scheme", default="scrypt", choices=sorted(DEFAULT_COSTS))
+    parser.add_argument("--costs", type=int, nargs="+", help="cost settings to compare")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per cost setting")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--target-rps", type=float, help="logins/sec to size the worker fleet for")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    costs = args.costs or [DEFAULT_COSTS[args.scheme]]
+    results = []
+    print(f"{'scheme':<14} {'cost':>8} {'per core/s':>11} {'total/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'cores':>6}")
+    for cost in costs:
+        result = run(args.scheme, cost, args.duration, args.processes)
+        if args.target_rps:
+            result["cores_for_target"] = round(args.target_rps / result["per_core_per_sec"], 2)
+        results.append(result)
+        print(f"{result['scheme']:<14} {cost:>8} {result['per_core_per_sec']:>11} {result['total_per_sec']:>9} "
+              f"{result['latency_ms_p50']:>8} {result['latency_ms_p99']:>8} {result.get('cores_for_target', '-'):>6}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,536 @@
+"""
+Synthetic large-scale data generator for the MediFlow schema.
+
+Fills every table in sql/schema.sql at a configurable scale with skewed,
+FK-consistent data. Output is deterministic for a given --seed: each table
+draws from its own RNG stream, so changing one count does not reshuffle the
+others.
+
+    cd backend
+    python -m benchmarks.datagen --preset medium --seed 7
+    python -m benchmarks.datagen --preset large --method load-data --truncate
+    python -m benchmarks.datagen --patients 20000 --logs 5000000 --manifest gen_manifest.json
+
+Skew: physicians get Pareto-distributed popularity (a few carry most
+patients and appointments), patients get Pareto-distributed engagement (a few
+log activity daily and see doctors often), and medications follow a long tail.
+
+Triggers and constraints stay enabled and are respected rather than bypassed:
+  * uq_appointment_physician_active_slot - appointments sit on a 30-minute grid, unique per physician;
+  * auto_followup_appointment - at most one follow-up record per physician and visit date, so the
+    midnight appointment it inserts never collides;
+  * trg_validate_activity_data - weight is always positive and bp is "systolic/diastolic".
+
+--method insert uses multi-row INSERTs (pymysql's executemany batching); --method load-data
+streams TSV chunks through LOAD DATA LOCAL INFILE and needs local_infile enabled on the server.
+Primary keys are explicit and continue after the current MAX(id) of each table unless
+--truncate empties the tables first. Every generated account logs in with GEN_PASSWORD.
+benchmarks.loadtest --seed writes its dataset through generate() as well.
+"""
+import argparse
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+
+import pymysql
+
+USER_PREFIX = "gen_"
+GEN_PASSWORD = "mediflow"
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 16   # 09:00 - 16:30
+FIRST_SLOT = datetime.time(9, 0)
+
+PRESETS = {
+    "small": dict(insurances=20, pharmacies=50, specializations=15, medications=200, admins=1,
+                  physicians=50, patients=2000, appointments=20000, records=8000, logs=100000),
+    "medium": dict(insurances=50, pharmacies=200, specializations=30, medications=500, admins=2,
+                   physicians=300, patients=30000, appointments=300000, records=120000, logs=1500000),
+    "large": dict(insurances=100, pharmacies=500, specializations=40, medications=1000, admins=5,
+                  physicians=1000, patients=100000, appointments=800000, records=300000, logs=5000000),
+}
+
+
+def preset_counts(preset, overrides=None):
+    """The preset's row counts, with any count set (not None) on `overrides` (e.g. parsed arguments) applied."""
+    counts = dict(PRESETS[preset])
+    for name in counts:
+        value = getattr(overrides, name, None)
+        if value is not None:
+            counts[name] = value
+    return counts
+
+
+# Tables in FK order; --truncate empties them in reverse.
+TABLES = [
+    "Insurance", "Pharmacy", "Specialization", "Medications", "Account", "Physician", "Patient",
+    "Appointment", "HealthRecord", "Prescription", "Medicine", "ActivityLog", "Activity_Log_Audit",
+]
+# Maintained by Appointment / ActivityLog triggers; TRUNCATE does not fire them.
+TRIGGER_TABLES = ["PhysicianPatient", "ActivityLogDaily"]
+# Projections kept up to date by the API, not by triggers: bulk loads bypass them, so they are
+# emptied after every run and rebuilt lazily on the next read.
+DERIVED_TABLES = ["PhysicianDashboardSummary"]
+ID_COLUMNS = {
+    "Insurance": "insurance_id", "Pharmacy": "pharmacy_id", "Specialization": "specialization_id",
+    "Medications": "medication_id", "Account": "account_id", "Appointment": "appointment_id",
+    "HealthRecord": "record_id", "Prescription": "prescription_id", "ActivityLog": "log_id",
+    "Activity_Log_Audit": "audit_id",
+}
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David",
+               "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Wei", "Aisha",
+               "Carlos", "Priya", "Mohammed", "Yuki", "Olga", "Kwame"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+              "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Chen", "Patel", "Khan",
+              "Nguyen", "Kim", "Ivanova", "Okafor"]
+DIAGNOSES = ["Hypertension", "Type 2 diabetes", "Upper respiratory infection", "Migraine", "Back pain",
+             "Anxiety", "Asthma", "Hyperlipidemia", "Dermatitis", "Routine checkup", "Gastritis", "Insomnia"]
+REASONS = ["Routine checkup", "Follow-up", "Chest pain", "Headache", "Skin rash", "Medication review",
+           "Lab results", "Back pain", "Fatigue", "Consultation"]
+DOSAGE_FORMS = ["Tablet", "Capsule", "Syrup", "Injection", "Inhaler", "Cream", "Drops"]
+
+
+def make_rng(seed, stream):
+    return random.Random(f"{seed}:{stream}")
+
+
+def pareto_weights(rng, n, alpha, cap=50.0):
+    """Heavy-tailed weights, capped so one physician cannot need decades of appointment slots."""
+    return [min(rng.paretovariate(alpha), cap) for _ in range(n)]
+
+
+def allocate(total, weights):
+    """Split `total` into integer counts proportional to `weights` (largest remainder)."""
+    scale = total / sum(weights)
+    exact = [w * scale for w in weights]
+    counts = [int(x) for x in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda i: exact[i] - counts[i], reverse=True)
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+class Dataset:
+    """
+    Lazily generated rows for every table.
+
+    tables() yields (table, columns, rows) in FK order. Appointments are
+    materialized because health records are drawn from them; the large
+    ActivityLog stream is produced on demand.
+    """
+
+    def __init__(self, counts, seed=0, start=datetime.date(2023, 1, 1), days=730, offsets=None):
+        self.counts = counts
+        self.seed = seed
+        self.start = start
+        self.days = days
+        offsets = offsets or {}
+        self.first_id = {table: offsets.get(table, 0) + 1 for table in ID_COLUMNS}
+
+        rng = make_rng(seed, "weights")
+        self.physician_weights = pareto_weights(rng, counts["physicians"], 1.16)   # ~80/20
+        self.patient_weights = pareto_weights(rng, counts["patients"], 1.5)
+        self.medication_weights = pareto_weights(rng, counts["medications"], 1.1)
+
+        first_account = self.first_id["Account"]
+        self.admin_ids = list(range(first_account, first_account + counts["admins"]))
+        first_physician = first_account + counts["admins"]
+        self.physician_ids = list(range(first_physician, first_physician + counts["physicians"]))
+        first_patient = first_physician + counts["physicians"]
+        self.patient_ids = list(range(first_patient, first_patient + counts["patients"]))
+        self.insurance_ids = self._ids("Insurance", "insurances")
+        self.pharmacy_ids = self._ids("Pharmacy", "pharmacies")
+        self.specialization_ids = self._ids("Specialization", "specializations")
+        self.medication_ids = self._ids("Medications", "medications")
+
+        self._appointments = None
+        self._visits = None
+        self.record_sample = []
+        self.log_sample = []
+
+    def _ids(self, table, key):
+        first = self.first_id[table]
+        return list(range(first, first + self.counts[key]))
+
+    # -- reference tables ------------------------------------------------------------------
+
+    def insurances(self):
+        rng = make_rng(self.seed, "Insurance")
+        for i in self.insurance_ids:
+            yield i, f"{rng.choice(LAST_NAMES)} Health {i}", f"POL{i:07d}"
+
+    def pharmacies(self):
+        rng = make_rng(self.seed, "Pharmacy")
+        for i in self.pharmacy_ids:
+            yield (i, f"{rng.choice(LAST_NAMES)} Pharmacy {i}",
+                   f"{rng.randint(1, 999)} {rng.choice(LAST_NAMES)} St", f"212-555-{i % 10000:04d}")
+
+    def specializations(self):
+        for i in self.specialization_ids:
+            yield i, f"Specialization {i}"
+
+    def medications(self):
+        rng = make_rng(self.seed, "Medications")
+        for i in self.medication_ids:
+            yield (i, f"Medication {i}", rng.choice(DOSAGE_FORMS), "Store at room temperature",
+                   rng.choice(["Nausea", "Drowsiness", "Headache", "Dizziness", "None reported"]),
+                   f"Synthetic medication {i}")
+
+    # -- people ----------------------------------------------------------------------------
+
+    def accounts(self):
+        rng = make_rng(self.seed, "Account")
+        password = hashlib.sha256(GEN_PASSWORD.encode()).hexdigest()
+        for role, ids in (("admin", self.admin_ids), ("physician", self.physician_ids),
+                          ("patient", self.patient_ids)):
+            for index, account_id in enumerate(ids):
+                yield (account_id, f"{USER_PREFIX}{role}_{index}", password, role,
+                       rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                       f"{USER_PREFIX}{account_id}@example.test", f"555-{account_id % 10000:04d}")
+
+    def physicians(self):
+        rng = make_rng(self.seed, "Physician")
+        for account_id in self.physician_ids:
+            yield account_id, rng.choice(self.specialization_ids), f"LIC-{account_id:08d}"
+
+    def patients(self):
+        rng = make_rng(self.seed, "Patient")
+        for account_id in self.patient_ids:
+            born = datetime.date(1935, 1, 1) + datetime.timedelta(days=rng.randrange(85 * 365))
+            yield (account_id, born, rng.choice("MFO"), f"{rng.randint(1, 999)} {rng.choice(LAST_NAMES)} Ave",
+                   rng.choice(self.insurance_ids) if self.insurance_ids and rng.random() < 0.9 else None,
+                   rng.choice(self.pharmacy_ids) if self.pharmacy_ids else None,
+                   f"555-{rng.randrange(10000):04d}")
+
+    # -- clinical data ---------------------------------------------------------------------
+
+    def appointment_rows(self):
+        """(appointment_id, patient_id, physician_id, date, status, reason), unique per physician and slot."""
+        if self._appointments is not None:
+            return self._appointments
+        rng = make_rng(self.seed, "Appointment")
+        per_physician = allocate(self.counts["appointments"], self.physician_weights)
+
+        # Each patient has a primary physician picked by popularity; panels are weighted by engagement.
+        primary = rng.choices(range(len(self.physician_ids)), weights=self.physician_weights,
+                              k=len(self.patient_ids))
+        panels = [[] for _ in self.physician_ids]
+        for patient_index, physician_index in enumerate(primary):
+            panels[physician_index].append(patient_index)
+        all_cum = list(itertools.accumulate(self.patient_weights))
+
+        days = max(self.days, -(-max(per_physician, default=0) // SLOTS_PER_DAY))
+        today = self.start + datetime.timedelta(days=int(days * 0.85))
+        rows = []
+        next_id = self.first_id["Appointment"]
+        for physician_index, count in enumerate(per_physician):
+            if not count:
+                continue
+            panel = panels[physician_index]
+            panel_cum = list(itertools.accumulate(self.patient_weights[i] for i in panel))
+            slots = sorted(rng.sample(range(days * SLOTS_PER_DAY), count))
+            for slot in slots:
+                if panel and rng.random() < 0.85:
+                    patient_index = rng.choices(panel, cum_weights=panel_cum)[0]
+                else:
+                    patient_index = rng.choices(range(len(self.patient_ids)), cum_weights=all_cum)[0]
+                day, offset = divmod(slot, SLOTS_PER_DAY)
+                when = datetime.datetime.combine(self.start + datetime.timedelta(days=day), FIRST_SLOT) \
+                    + datetime.timedelta(minutes=SLOT_MINUTES * offset)
+                if when.date() >= today:
+                    status = "Cancelled" if rng.random() < 0.05 else "Pending"
+                else:
+                    status = rng.choices(["Completed", "Cancelled", "Pending"], weights=[85, 10, 5])[0]
+                rows.append((next_id, self.patient_ids[patient_index], self.physician_ids[physician_index],
+                             when, status, rng.choice(REASONS)))
+                next_id += 1
+        self._appointments = rows
+        return rows
+
+    def appointments(self):
+        return iter(self.appointment_rows())
+
+    def record_visits(self):
+        """The completed appointments that produced a health record, in record_id order."""
+        if self._visits is not None:
+            return self._visits
+        rng = make_rng(self.seed, "visits")
+        completed = [r for r in self.appointment_rows() if r[4] == "Completed"]
+        count = self.counts["records"]
+        if not completed:
+            visits = []
+        elif count <= len(completed):
+            visits = [completed[i] for i in sorted(rng.sample(range(len(completed)), count))]
+        else:
+            visits = sorted(rng.choices(completed, k=count))
+        self._visits = visits
+        return visits
+
+    def health_records(self):
+        rng = make_rng(self.seed, "HealthRecord")
+        followups = set()
+        for offset, (_, patient_id, physician_id, when, _, _) in enumerate(self.record_visits()):
+            record_id = self.first_id["HealthRecord"] + offset
+            visit_date = when.date()
+            follow_up = "No"
+            if rng.random() < 0.1 and (physician_id, visit_date) not in followups:
+                # auto_followup_appointment books the physician at midnight 30 days later.
+                followups.add((physician_id, visit_date))
+                follow_up = "Yes"
+            if len(self.record_sample) < 1000:
+                self.record_sample.append([record_id, patient_id, physician_id])
+            yield (record_id, patient_id, physician_id, visit_date, rng.choice(DIAGNOSES),
+                   rng.choice(["Fever", "Cough", "Fatigue", "Pain", "None"]),
+                   rng.choice(["Normal", "Elevated", "Pending", None]), follow_up)
+
+    def prescriptions(self):
+        """About 70% of records get a prescription; prescription ids follow record order."""
+        rng = make_rng(self.seed, "Prescription")
+        prescription_id = self.first_id["Prescription"]
+        for offset in range(len(self.record_visits())):
+            if rng.random() < 0.7:
+                yield prescription_id, self.first_id["HealthRecord"] + offset
+                prescription_id += 1
+
+    def medicines(self):
+        rng = make_rng(self.seed, "Medicine")
+        cum = list(itertools.accumulate(self.medication_weights))
+        total = sum(1 for _ in self.prescriptions())
+        for prescription_id in range(self.first_id["Prescription"], self.first_id["Prescription"] + total):
+            wanted = min(len(self.medication_ids), rng.choice([1, 1, 2, 2, 3, 4]))
+            chosen = set()
+            while len(chosen) < wanted:
+                chosen.add(rng.choices(self.medication_ids, cum_weights=cum)[0])
+            for medication_id in sorted(chosen):
+                yield (medication_id, prescription_id, f"{rng.choice([5, 10, 20, 50, 100])}mg",
+                       rng.choice(["Once daily", "Twice daily", "Every 8 hours", "As needed"]),
+                       f"{rng.choice([5, 7, 10, 14, 30])} days", rng.choice(["With food", "Before bed", None]))
+
+    def activity_logs(self, batch=10000):
+        rng = make_rng(self.seed, "ActivityLog")
+        cum = list(itertools.accumulate(self.patient_weights))
+        baseline_rng = make_rng(self.seed, "baseline_weight")
+        baseline = {i: baseline_rng.uniform(50, 120) for i in self.patient_ids}
+        log_id = self.first_id["ActivityLog"]
+        remaining = self.counts["logs"]
+        while remaining > 0:
+            for patient_id in rng.choices(self.patient_ids, cum_weights=cum, k=min(batch, remaining)):
+                weight = max(30.0, round(baseline[patient_id] + rng.gauss(0, 1.5), 2))
+                systolic = rng.randint(100, 160)
+                if len(self.log_sample) < 1000:
+                    self.log_sample.append([log_id, patient_id])
+                log_date = self.start + datetime.timedelta(days=rng.randrange(self.days))
+                diastolic = rng.randint(60, min(100, systolic - 20))
+                yield (log_id, patient_id, log_date, weight, f"{systolic}/{diastolic}", rng.randint(1200, 3800),
+                       rng.choice([0, 0, 15, 20, 30, 45, 60, 90]), systolic, diastolic)
+                log_id += 1
+            remaining -= batch
+
+    def activity_log_audits(self):
+        """Audit rows for logs that were deleted before the generated ones (ids below the first log)."""
+        rng = make_rng(self.seed, "Activity_Log_Audit")
+        first = self.first_id["Activity_Log_Audit"]
+        start = datetime.datetime.combine(self.start, datetime.time())
+        for offset in range(self.counts["logs"] // 100):
+            yield (first + offset, rng.randrange(1, max(2, self.first_id["ActivityLog"])),
+                   start + datetime.timedelta(seconds=rng.randrange(self.days * 86400)))
+
+    def tables(self):
+        yield "Insurance", ("insurance_id", "provider_name", "policy_number"), self.insurances()
+        yield "Pharmacy", ("pharmacy_id", "pharmacy_name", "location", "phone"), self.pharmacies()
+        yield "Specialization", ("specialization_id", "specialization_name"), self.specializations()
+        yield ("Medications", ("medication_id", "medication_name", "dosage_form", "storage_instructions",
+                               "common_side_effects", "description"), self.medications())
+        yield ("Account", ("account_id", "user_name", "password", "role", "first_name", "last_name", "email",
+                           "phone"), self.accounts())
+        yield "Physician", ("account_id", "specialization_id", "license_number"), self.physicians()
+        yield ("Patient", ("account_id", "date_of_birth", "gender", "address", "insurance_id", "pharmacy_id",
+                           "emergency_contact"), self.patients())
+        yield ("Appointment", ("appointment_id", "patient_id", "physician_id", "date", "status", "reason"),
+               self.appointments())
+        yield ("HealthRecord", ("record_id", "patient_id", "physician_id", "visit_date", "diagnosis", "symptoms",
+                                "lab_results", "follow_up_required"), self.health_records())
+        yield "Prescription", ("prescription_id", "record_id"), self.prescriptions()
+        yield ("Medicine", ("medication_id", "prescription_id", "dosage", "frequency", "duration",
+                            "instructions"), self.medicines())
+        yield ("ActivityLog", ("log_id", "patient_id", "log_date", "weight", "bp", "calories",
+                               "duration_of_physical_activity", "bp_systolic", "bp_diastolic"), self.activity_logs())
+        yield "Activity_Log_Audit", ("audit_id", "log_id", "deleted_at"), self.activity_log_audits()
+
+    def manifest(self):
+        """Ids for benchmarks.loadtest --manifest."""
+        pairs = sorted({(r[1], r[2]) for r in self.appointment_rows()})
+        return {
+            "physician_ids": self.physician_ids,
+            "patient_ids": self.patient_ids,
+            "pairs": [list(p) for p in make_rng(self.seed, "manifest").sample(pairs, min(len(pairs), 10000))],
+            "records": self.record_sample,
+            "logs": self.log_sample,
+            "password": GEN_PASSWORD,
+            "user_prefix": USER_PREFIX,
+        }
+
+
+def _chunks(rows, size):
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class InsertWriter:
+    """Multi-row INSERTs: pymysql's executemany folds each batch into one INSERT ... VALUES (...), (...)."""
+
+    def __init__(self, conn, batch_size=5000):
+        self.conn = conn
+        self.batch_size = batch_size
+
+    def write(self, table, columns, rows):
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        total = 0
+        with self.conn.cursor() as cursor:
+            for chunk in _chunks(rows, self.batch_size):
+                cursor.executemany(sql, chunk)
+                self.conn.commit()
+                total += len(chunk)
+        return total
+
+
+def _tsv_field(value):
+    if value is None:
+        return "\\N"
+    text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+class LoadDataWriter:
+    """Streams chunks of rows to a temporary TSV file and loads each with LOAD DATA LOCAL INFILE."""
+
+    def __init__(self, conn, batch_size=200000):
+        self.conn = conn
+        self.batch_size = batch_size
+
+    def write(self, table, columns, rows):
+        total = 0
+        with self.conn.cursor() as cursor:
+            for chunk in _chunks(rows, self.batch_size):
+                fd, path = tempfile.mkstemp(suffix=".tsv", prefix=f"mediflow_{table}_")
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                        for row in chunk:
+                            fh.write("\t".join(_tsv_field(v) for v in row))
+                            fh.write("\n")
+                    cursor.execute(
+                        f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+                        f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+                        (path,),
+                    )
+                    self.conn.commit()
+                finally:
+                    os.unlink(path)
+                total += len(chunk)
+        return total
+
+
+WRITERS = {"insert": InsertWriter, "load-data": LoadDataWriter}
+
+
+def connect(db_params, local_infile=False):
+    return pymysql.connect(
+        host=db_params['host'],
+        port=db_params['port'],
+        user=db_params['user'],
+        password=db_params['password'],
+        database=db_params['database'],
+        charset=db_params['charset'],
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=False,
+        local_infile=local_infile,
+    )
+
+
+def truncate(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        try:
+            for table in DERIVED_TABLES + TRIGGER_TABLES + list(reversed(TABLES)):
+                cursor.execute(f"TRUNCATE TABLE {table}")
+        finally:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+
+
+def clear_derived(conn):
+    with conn.cursor() as cursor:
+        for table in DERIVED_TABLES:
+            cursor.execute(f"DELETE FROM {table}")
+    conn.commit()
+
+
+def current_offsets(conn):
+    offsets = {}
+    with conn.cursor() as cursor:
+        for table, column in ID_COLUMNS.items():
+            cursor.execute(f"SELECT COALESCE(MAX({column}), 0) AS max_id FROM {table}")
+            offsets[table] = cursor.fetchone()["max_id"]
+    return offsets
+
+
+def generate(conn, counts, seed=0, start=datetime.date(2023, 1, 1), days=730, method="insert",
+             batch_size=None, truncate_first=False, log=print):
+    """Write a Dataset of `counts` rows after the current ids (or into emptied tables); returns the Dataset."""
+    if truncate_first:
+        truncate(conn)
+    data = Dataset(counts, seed=seed, start=start, days=days, offsets=current_offsets(conn))
+    writer = WRITERS[method](conn, **({"batch_size": batch_size} if batch_size else {}))
+
+    overall = time.perf_counter()
+    for table, columns, rows in data.tables():
+        started = time.perf_counter()
+        written = writer.write(table, columns, rows)
+        elapsed = time.perf_counter() - started
+        log(f"{table:<20} {written:>10} rows {elapsed:>8.1f}s {written / elapsed if elapsed else 0:>10.0f} rows/s")
+    clear_derived(conn)
+    log(f"Done in {time.perf_counter() - overall:.1f}s")
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    for name in PRESETS["small"]:
+        parser.add_argument(f"--{name}", type=int, help=f"override the preset's {name} count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=datetime.date(2023, 1, 1),
+                        help="first day of generated activity (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=730, help="span of generated activity")
+    parser.add_argument("--method", choices=sorted(WRITERS), default="insert")
+    parser.add_argument("--batch-size", type=int, help="rows per INSERT / per LOAD DATA file")
+    parser.add_argument("--truncate", action="store_true", help="empty every MediFlow table first (destructive)")
+    parser.add_argument("--manifest", help="write seeded ids here for benchmarks.loadtest --manifest")
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    app = create_app()
+    conn = connect(app.config['DB_PARAMS'], local_infile=args.method == "load-data")
+    try:
+        data = generate(conn, preset_counts(args.preset, args), seed=args.seed, start=args.start, days=args.days,
+                        method=args.method, batch_size=args.batch_size, truncate_first=args.truncate)
+    finally:
+        conn.close()
+
+    if args.manifest:
+        with open(args.manifest, "w") as fh:
+            json.dump(data.manifest(), fh)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
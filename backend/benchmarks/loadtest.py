@@ -0,0 +1,360 @@
+"""
+Load test and latency benchmark for the patient and physician API routes.
+
+Seeds a synthetic dataset with the data generator (benchmarks/datagen.py),
+or reads the --manifest of an earlier generator run, mints JWTs for the
+seeded accounts, drives every route with concurrent workers and writes a JSON
+report with per-route throughput and p50/p95/p99 latency. With --baseline the
+report is compared against an earlier one and the exit status is 1 when any
+route regressed by more than --tolerance.
+
+    cd backend
+    python -m benchmarks.loadtest --seed --preset small --patients 1000 --appointments 20000
+    python -m benchmarks.loadtest --requests 500 --concurrency 16 --json report.json
+    python -m benchmarks.loadtest --baseline report.json --tolerance 0.15
+
+By default requests go through the in-process Flask test client against the
+database in DB_PARAMS. --base-url sends real HTTP requests to a running server
+instead; it must share this process's SECRET_KEY so the minted tokens verify.
+Runs are repeatable: the dataset and the per-worker request mix come from --random-seed.
+Seeding appends a generated dataset after the current ids; add --truncate to
+start from empty tables instead (destructive).
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from app import create_app
+from benchmarks import datagen
+from utils.auth_utils import generate_token
+
+DEFAULT_MANIFEST = "loadtest_manifest.json"
+
+
+def _pick(rng, items):
+    return items[rng.randrange(len(items))]
+
+
+def _as(role, path, body=None):
+    """A route called by a random seeded account of `role`."""
+    ids = f"{role}_ids"
+    return lambda m, rng: (role, _pick(rng, m[ids]), path, body)
+
+
+def _record(role, template):
+    """A route for a sampled health record, called by its patient or physician."""
+    owner = 1 if role == "patient" else 2
+    def build(m, rng):
+        record = _pick(rng, m["records"])
+        return role, record[owner], template.format(record_id=record[0]), None
+    return build
+
+
+def _log(template):
+    def build(m, rng):
+        log_id, patient_id = _pick(rng, m["logs"])
+        return "patient", patient_id, template.format(log_id=log_id), None
+    return build
+
+
+def _pair(template):
+    """A physician route about one of the physician's own patients."""
+    def build(m, rng):
+        patient_id, physician_id = _pick(rng, m["pairs"])
+        return "physician", physician_id, template.format(patient_id=patient_id), None
+    return build
+
+
+def _availability(m, rng):
+    """A patient looking up the free slots of one of their physicians."""
+    patient_id, physician_id = _pick(rng, m["pairs"])
+    return "patient", patient_id, f"/api/patient/physicians/{physician_id}/availability", None
+
+
+# name -> (method, build(manifest, rng) -> (role, account_id, path, json_body))
+ROUTES = {
+    "patient.healthRecords": ("POST", _as("patient", "/api/patient/healthRecord", {})),
+    "patient.healthRecord": ("GET", _record("patient", "/api/patient/healthRecord/record/{record_id}")),
+    "patient.dashboard": ("POST", _as("patient", "/api/patient/dashboard", {})),
+    "patient.profile": ("GET", _as("patient", "/api/patient/profile")),
+    "patient.activitylogs": ("GET", _as("patient", "/api/patient/activitylogs")),
+    "patient.activitylog": ("GET", _log("/api/patient/activitylog/{log_id}")),
+    "patient.physicians": ("GET", _as("patient", "/api/patient/physicians")),
+    "patient.specializations": ("GET", _as("patient", "/api/patient/specializations")),
+    "patient.insurances": ("GET", _as("patient", "/api/patient/insurances")),
+    "patient.pharmacies": ("GET", _as("patient", "/api/patient/pharmacies")),
+    "patient.appointments": ("GET", _as("patient", "/api/patient/appointments")),
+    "patient.physician_availability": ("GET", _availability),
+    "physician.healthRecord": ("GET", _record("physician", "/api/physician/healthRecord/record/{record_id}")),
+    "physician.medications": ("GET", _as("physician", "/api/physician/medications")),
+    "physician.appointments": ("GET", _as("physician", "/api/physician/appointments")),
+    "physician.patients": ("GET", _as("physician", "/api/physician/patients")),
+    "physician.visits": ("GET", _pair("/api/physician/patient/{patient_id}/visits")),
+    "physician.dashboard_summary": ("GET", _as("physician", "/api/physician/dashboard-summary")),
+    "physician.profile": ("GET", _as("physician", "/api/physician/profile")),
+    "physician.patient_activitylogs": ("GET", _pair("/api/physician/patient/{patient_id}/activitylogs")),
+}
+
+
+def _login(m, rng):
+    user_name = f"{m['user_prefix']}patient_{rng.randrange(len(m['patient_ids']))}"
+    return None, None, "/api/patient/login", {"user_name": user_name, "password": m["password"]}
+
+
+def _new_activity_log(m, rng):
+    return "patient", _pick(rng, m["patient_ids"]), "/api/patient/activitylog/new", {
+        "date": datetime.date.today().isoformat(),
+        "weight": round(rng.uniform(50, 120), 2),
+        "bp_systolic": rng.randint(100, 150),
+        "bp_diastolic": rng.randint(60, 95),
+        "calories": rng.randint(1200, 3500),
+        "duration": rng.randint(0, 120),
+    }
+
+
+def _bulk_activity_logs(m, rng, size=50):
+    role, account_id, _, log = _new_activity_log(m, rng)
+    return role, account_id, "/api/patient/activitylog/bulk", [
+        dict(log, date=(datetime.date.today() - datetime.timedelta(days=i)).isoformat()) for i in range(size)
+    ]
+
+
+# Routes that write or burn KDF time; only run with --include-writes.
+WRITE_ROUTES = {
+    "patient.login": ("POST", _login),
+    "patient.activitylog_new": ("POST", _new_activity_log),
+    "patient.activitylog_bulk": ("POST", _bulk_activity_logs),
+}
+
+
+class TestClientTransport:
+    """In-process requests through one Flask test client per worker."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, headers, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, headers=headers, json=body)
+        response.close()
+        return response.status_code
+
+
+class HttpTransport:
+    def __init__(self, base_url, timeout=30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method, path, headers, body):
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers = {**headers, "Content-Type": "application/json"}
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_route(transport, tokens, manifest, method, build, requests, concurrency, warmup, seed):
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker(worker_id):
+        rng = random.Random(f"{seed}:{worker_id}")
+        for _ in range(warmup):
+            role, account_id, path, body = build(manifest, rng)
+            transport.request(method, path, tokens.headers(role, account_id), body)
+        local_latencies, local_statuses = [], Counter()
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            role, account_id, path, body = build(manifest, rng)
+            start = time.perf_counter()
+            try:
+                status = transport.request(method, path, tokens.headers(role, account_id), body)
+            except Exception:
+                status = "error"
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] += 1
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(n for status, n in statuses.items() if status == "error" or status >= 400)
+    return {
+        "method": method,
+        "requests": len(latencies),
+        "errors": errors,
+        "status_counts": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        } if latencies else None,
+    }
+
+
+class TokenMinter:
+    """Mints (and memoizes) a JWT per seeded account with the app's SECRET_KEY."""
+
+    def __init__(self, app):
+        self.app = app
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def headers(self, role, account_id):
+        if role is None:
+            return {}
+        key = (role, account_id)
+        token = self._tokens.get(key)
+        if token is None:
+            with self._lock, self.app.app_context():
+                token = self._tokens.setdefault(key, generate_token(account_id, role))
+        return {"Authorization": f"Bearer {token}"}
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of regression messages for routes present in both reports."""
+    regressions = []
+    for name, current in report["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if not previous or not previous.get("latency_ms") or not current.get("latency_ms"):
+            continue
+        for metric in ("p95", "p99"):
+            before, after = previous["latency_ms"][metric], current["latency_ms"][metric]
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {before}ms -> {after}ms")
+        before, after = previous.get("throughput_rps"), current.get("throughput_rps")
+        if before and after is not None and after < before * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before}/s -> {after}/s")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="(re)seed the synthetic dataset before running")
+    parser.add_argument("--seed-only", action="store_true", help="seed and exit without driving any route")
+    parser.add_argument("--preset", choices=sorted(datagen.PRESETS), default="small", help="dataset size to seed")
+    for name in datagen.PRESETS["small"]:
+        parser.add_argument(f"--{name}", type=int, help=f"override the preset's {name} count")
+    parser.add_argument("--truncate", action="store_true", help="empty every MediFlow table before seeding")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="ids of the seeded dataset")
+    parser.add_argument("--routes", nargs="+", help="route names to run (default: all read routes)")
+    parser.add_argument("--include-writes", action="store_true", help="also run login and activity log inserts")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests per worker and route")
+    parser.add_argument("--base-url", help="drive a running server over HTTP instead of the test client")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    if args.seed or args.seed_only:
+        conn = datagen.connect(app.config['DB_PARAMS'])
+        try:
+            manifest = datagen.generate(conn, datagen.preset_counts(args.preset, args), seed=args.random_seed,
+                                        truncate_first=args.truncate).manifest()
+        finally:
+            conn.close()
+        with open(args.manifest, "w") as fh:
+            json.dump(manifest, fh)
+        print(f"Seeded {len(manifest['patient_ids'])} patients, {len(manifest['physician_ids'])} physicians")
+        if args.seed_only:
+            return 0
+    else:
+        with open(args.manifest) as fh:
+            manifest = json.load(fh)
+
+    routes = dict(ROUTES)
+    if args.include_writes:
+        routes.update(WRITE_ROUTES)
+    if args.routes:
+        unknown = set(args.routes) - set(routes)
+        if unknown:
+            parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+        routes = {name: routes[name] for name in args.routes}
+
+    transport = HttpTransport(args.base_url) if args.base_url else TestClientTransport(app)
+    tokens = TokenMinter(app)
+    report = {
+        "meta": {
+            "created_at": datetime.datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "target": args.base_url or "test_client",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "random_seed": args.random_seed,
+        },
+        "routes": {},
+    }
+
+    print(f"{'route':<34} {'req':>6} {'err':>5} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, (method, build) in routes.items():
+        result = run_route(transport, tokens, manifest, method, build, args.requests,
+                           args.concurrency, args.warmup, f"{args.random_seed}:{name}")
+        report["routes"][name] = result
+        latency = result["latency_ms"] or {}
+        print(f"{name:<34} {result['requests']:>6} {result['errors']:>5} {result['throughput_rps']:>9} "
+              f"{latency.get('p50', '-'):>8} {latency.get('p95', '-'):>8} {latency.get('p99', '-'):>8}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(report, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,22 @@
+# gunicorn loads ./gunicorn.conf.py automatically (the Dockerfile runs from /app).
+import os
+import shutil
+
+# Shared sample files so /api/metrics reports every worker. Set here rather than image-wide:
+# only gunicorn creates the directory (on_starting), other processes keep single-process metrics.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/mediflow-metrics")
+
+
+def on_starting(server):
+    # Samples left by a previous container run would be summed into the new totals.
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (in-flight requests, pool connections).
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
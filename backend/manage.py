@@ -0,0 +1,176 @@
+"""
+Database management commands for MediFlow.
+
+Usage (from the repo root):
+
+    python backend/manage.py schema    # backend/sql/schema.sql
+    python backend/manage.py migrate   # pending backend/sql/schema/vNNN__*.sql files
+    python backend/manage.py seed      # backend/sql/seeds.sql
+    python backend/manage.py all       # schema, migrate, seed
+    python backend/manage.py backfill-bp [--batch-size N]   # parse ActivityLog.bp into bp_systolic/bp_diastolic (v005)
+
+Stored procedures and triggers (backend/sql/procedures_triggers.sql) use DELIMITER
+blocks and must still be applied with the mysql CLI.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pymysql
+
+from app import create_app
+from app.db_utils import run_sql_file, split_sql
+
+SQL_DIR = Path(__file__).resolve().parent / 'sql'
+MIGRATIONS_DIR = SQL_DIR / 'schema'
+
+
+def schema(app):
+    run_sql_file(str(SQL_DIR / 'schema.sql'), app=app)
+    print("Applied schema.sql")
+
+
+def seed(app):
+    run_sql_file(str(SQL_DIR / 'seeds.sql'), app=app)
+    print("Applied seeds.sql")
+
+
+MIGRATION_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(32) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS schema_migration_steps (
+        version VARCHAR(32) NOT NULL,
+        step INT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (version, step)
+    )
+    """,
+]
+
+
+class MigrationError(Exception):
+    """A migration statement failed; the statements before it stay applied and recorded."""
+
+
+def migrate(app):
+    """
+    Apply every vNNN__*.sql file under sql/schema/ that is not yet recorded in schema_migrations.
+
+    Each file is split with split_sql() and run statement by statement on one
+    connection. MySQL commits DDL implicitly, so a half-applied file cannot be
+    rolled back; instead every statement that succeeds is recorded in
+    schema_migration_steps, and re-running migrate after a failure resumes at
+    the failed statement instead of repeating (and failing on) the earlier ones.
+    """
+    conn = pymysql.connect(cursorclass=pymysql.cursors.DictCursor, autocommit=False, **app.config['DB_PARAMS'])
+    try:
+        cursor = conn.cursor()
+        for ddl in MIGRATION_TABLES:
+            cursor.execute(ddl)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {r['version'] for r in cursor.fetchall()}
+
+        pending = [p for p in sorted(MIGRATIONS_DIR.glob('v*__*.sql')) if p.name.split('__')[0] not in applied]
+        if not pending:
+            print("No pending migrations")
+            return
+
+        for path in pending:
+            version = path.name.split('__')[0]
+            statements = split_sql(path.read_text(encoding='utf-8'))
+            cursor.execute("SELECT step FROM schema_migration_steps WHERE version = %s", (version,))
+            done = {r['step'] for r in cursor.fetchall()}
+            for step, statement in enumerate(statements, 1):
+                if step in done:
+                    continue
+                try:
+                    cursor.execute(statement)
+                except pymysql.MySQLError as e:
+                    conn.rollback()
+                    raise MigrationError(
+                        f"{path.name}: statement {step} of {len(statements)} failed: {e}. "
+                        f"Fix the cause and re-run migrate to resume at statement {step}."
+                    ) from e
+                cursor.execute(
+                    "INSERT INTO schema_migration_steps (version, step) VALUES (%s, %s)", (version, step)
+                )
+                conn.commit()
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, path.name))
+            conn.commit()
+            print(f"Applied {path.name}")
+    finally:
+        conn.close()
+
+
+BP_BACKFILL_SQL = """
+    UPDATE ActivityLog
+    SET bp_systolic = CAST(SUBSTRING_INDEX(bp, '/', 1) AS UNSIGNED),
+        bp_diastolic = CAST(SUBSTRING_INDEX(bp, '/', -1) AS UNSIGNED)
+    WHERE log_id >= %s AND log_id < %s
+      AND bp_systolic IS NULL
+      AND bp REGEXP '^[0-9]+/[0-9]+$'
+"""
+
+
+def backfill_bp(app):
+    """
+    Parse the legacy bp strings of existing ActivityLog rows into bp_systolic / bp_diastolic.
+
+    Walks the primary key in ranges of --batch-size ids and commits after each
+    range, so row locks are short and the command can be stopped and re-run at
+    any time (rows already parsed are skipped).
+    """
+    batch_size = app.config['BACKFILL_BATCH_SIZE']
+    conn = pymysql.connect(cursorclass=pymysql.cursors.DictCursor, autocommit=False, **app.config['DB_PARAMS'])
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT MIN(log_id) AS first_id, MAX(log_id) AS last_id FROM ActivityLog")
+            bounds = cursor.fetchone()
+            if bounds['first_id'] is None:
+                print("ActivityLog is empty")
+                return
+            started = time.perf_counter()
+            updated = 0
+            for low in range(bounds['first_id'], bounds['last_id'] + 1, batch_size):
+                updated += cursor.execute(BP_BACKFILL_SQL, (low, low + batch_size))
+                conn.commit()
+            print(f"Parsed bp of {updated} activity logs in {time.perf_counter() - started:.1f}s")
+    finally:
+        conn.close()
+
+
+COMMANDS = {
+    'schema': [schema],
+    'migrate': [migrate],
+    'seed': [seed],
+    'all': [schema, migrate, seed],
+    'backfill-bp': [backfill_bp],
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MediFlow database management")
+    parser.add_argument('command', choices=sorted(COMMANDS))
+    parser.add_argument('--batch-size', type=int, default=5000, help="rows per transaction for backfill commands")
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    app.config['BACKFILL_BATCH_SIZE'] = args.batch_size
+    try:
+        for step in COMMANDS[args.command]:
+            step(app)
+    except MigrationError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,21 @@
+import datetime
+
 import pymysql
-from flask import Blueprint, request, jsonify, g
-from utils.db_utils import get_db_connection
-from utils.auth_utils import hash_password, generate_token, login_required
+from flask import Blueprint, current_app, request, jsonify, g
+from utils import booking, diagnostics, physician_summary
+from utils.activity_logs import (BulkPayloadError, INSERT_SQL, LIST_SQL, insert_logs, iter_bulk_entries,
+                                 validate_bp, validate_log)
+from utils.activity_trends import fetch_trends, trend_params
+from utils.availability import (UnknownPhysicianError, availability_params, free_slots, invalidate_availability,
+                                next_free_slots)
+from utils.db_utils import after_commit, get_cursor
+from utils.filters import activity_log_filters, appointment_filters, parse_filters
+from utils.health_records import FLAT_RECORD_SQL, get_nested_record, record_format
+from utils.pagination import get_page
+from utils.streaming import stream_query, wants_stream
+from utils.reference_cache import register_dataset, reference_response
+from utils.auth_utils import ACCOUNT_ID_SQL, authenticate, hash_password, generate_token, login_required
+from utils.care_access import invalidate_access
 
 patient_bp = Blueprint("patient_bp", __name__)
 
@@ -17,8 +31,7 @@ def signup():
     if missing_fields:
         return jsonify({"success": False, "message": f"Missing fields: {', '.join(missing_fields)}"}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
 
     try:
         # Use stored procedure for account registration
@@ -33,7 +46,7 @@ def signup():
         ])
         
         # Get the newly created account_id
-        cursor.execute("SELECT account_id FROM Account WHERE user_name=%s", (data['user_name'],))
+        cursor.execute(ACCOUNT_ID_SQL, (data['user_name'],))
         account = cursor.fetchone()
         account_id = account['account_id']
 
@@ -50,22 +63,15 @@ def signup():
             data.get('pharmacy_id'),
             data.get('emergency_contact')
         ))
-
-        conn.commit()
         token = generate_token(account_id, 'patient')
         return jsonify({"success": True, "message": "Account created successfully", "token": token})
 
     except pymysql.err.OperationalError as e:
-        conn.rollback()
         if 'Email address already registered' in str(e):
             return jsonify({"success": False, "message": "Email address already registered"}), 400
         return jsonify({"success": False, "message": str(e)}), 500
     except Exception as e:
-        conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
@@ -74,15 +80,11 @@ def signup():
 @patient_bp.route("/login", methods=["POST"])
 def login():
     data = request.json
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)  # <-- Use DictCursor here
+    cursor = get_cursor()
 
 
     try:
-        hashed_pw = hash_password(data['password'])
-        cursor.execute("SELECT * FROM Account WHERE user_name=%s AND password=%s AND role='patient'",
-                       (data['user_name'], hashed_pw))
-        account = cursor.fetchone()
+        account = authenticate(cursor, data['user_name'], data['password'], 'patient')
 
         if not account:
             return jsonify({"success": False, "message": "Invalid credentials"}), 401
@@ -102,9 +104,17 @@ def login():
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
+# -------------------
+# Reference data (cached, see utils/reference_cache.py)
+# -------------------
+register_dataset("insurances", "SELECT insurance_id, provider_name FROM Insurance")
+register_dataset("pharmacies", "SELECT pharmacy_id, pharmacy_name FROM Pharmacy")
+register_dataset(
+    "specializations",
+    "SELECT specialization_id, specialization_name FROM Specialization ORDER BY specialization_name",
+    envelope="specializations",
+)
+
 
 # -------------------
 # Get all insurances
@@ -112,70 +122,58 @@ def login():
 # Get all insurances to be displayed on the signup page and profile update page
 @patient_bp.route('/insurances', methods=['GET'])
 def get_insurances():
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
     try:
-        cursor.execute("SELECT insurance_id, provider_name FROM Insurance")
-        insurances = cursor.fetchall()
-        return jsonify(insurances)
+        return reference_response("insurances")
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # Get all pharmacies
 @patient_bp.route("/pharmacies", methods=["GET"])
 def get_pharmacies():
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
     try:
-        cursor.execute("SELECT pharmacy_id, pharmacy_name FROM Pharmacy")
-        pharmacies = cursor.fetchall()
-        return jsonify(pharmacies)
+        return reference_response("pharmacies")
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 
 # -------------------
 # Patient Health Records API
 # -------------------
+_HEALTH_RECORDS_SQL = """
+    SELECT h.record_id, h.visit_date, h.diagnosis, h.symptoms, h.lab_results,
+           h.follow_up_required, CONCAT(a.first_name,' ', a.last_name) AS physician_name
+    FROM HealthRecord h
+    INNER JOIN Account a ON a.account_id = h.physician_id
+    WHERE h.patient_id = %s {keyset}
+    ORDER BY h.visit_date DESC, h.record_id DESC
+    LIMIT %s
+"""
+
+
 @patient_bp.route("/healthRecord", methods=["POST"])
 @login_required(role="patient")
 def healthRecords():
     """Return all health records for the logged-in patient."""
     patient_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    cursor.execute("SELECT DATABASE();")
-    print(cursor.fetchone())
+    page = get_page()
+    cursor = get_cursor()
+    diagnostics.debug("health_records.fetch", database=current_app.config['DB_PARAMS']['database'])
 
     try:
+        keyset, keyset_params = page.keyset("h.visit_date", "h.record_id")
         cursor.execute(
-            """
-            SELECT h.record_id, h.visit_date, h.diagnosis, h.symptoms, h.lab_results,
-                   h.follow_up_required, CONCAT(a.first_name,' ', a.last_name) AS physician_name
-            FROM HealthRecord h
-            INNER JOIN Account a ON a.account_id = h.physician_id
-            WHERE h.patient_id = %s
-            """,
-            (patient_account_id,),
+            _HEALTH_RECORDS_SQL.format(keyset=keyset),
+            (patient_account_id, *keyset_params, page.fetch_size),
         )
         
-        healthrecords = cursor.fetchall()
-        return jsonify({"success": True, "message": "Health Records obtained successfully", "healthrecords": healthrecords})
+        healthrecords, paging = page.finish(cursor.fetchall(), "visit_date", "record_id")
+        return jsonify({"success": True, "message": "Health Records obtained successfully",
+                        "healthrecords": healthrecords, **paging})
 
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 
 # -------------------
 # Patient Specific Health Record API
@@ -183,37 +181,22 @@ def healthRecords():
 @patient_bp.route("/healthRecord/record/<record_id>", methods=["GET"])
 @login_required(role="patient")
 def healthRecord(record_id):
-    print("record_id=",record_id)
-    # data = request.json
-    # print(request.data)
-    # record_id = data.get('record_id')
     if not record_id:
         return jsonify({"error": "record_id is required"}), 400
    
     patient_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    cursor.execute("SELECT DATABASE();")
-    print(cursor.fetchone())
+    fmt = record_format()
+    cursor = get_cursor()
+    diagnostics.debug("health_record.fetch", record_id=record_id, format=fmt,
+                      database=current_app.config['DB_PARAMS']['database'])
     try:
-        cursor.execute(
-            """
-            SELECT h.record_id, h.patient_id, h.visit_date, h.diagnosis, h.symptoms,
-                   h.lab_results, h.follow_up_required,
-                   CONCAT(a.first_name,' ', a.last_name) AS physician_name,
-                   p.prescription_id, m.medication_id, m.dosage, m.frequency,
-                   m.duration, m.instructions,
-                   med.medication_name, med.dosage_form, med.storage_instructions,
-                   med.common_side_effects, med.description
-            FROM HealthRecord h
-            INNER JOIN Account a ON a.account_id = h.physician_id
-            LEFT JOIN Prescription p ON p.record_id = h.record_id
-            LEFT JOIN Medicine m ON m.prescription_id = p.prescription_id
-            LEFT JOIN Medications med ON med.medication_id = m.medication_id
-            WHERE h.patient_id = %s AND h.record_id = %s
-            """,
-            (patient_account_id, record_id),
-        )
+        if fmt == "nested":
+            healthrecord = get_nested_record(cursor, record_id, "patient_id", patient_account_id)
+            if healthrecord is None:
+                return jsonify({"error": "You do not have access to the health record!"}), 400
+            return jsonify({"success": True, "message": "Health Record obtained successfully", "healthrecord": healthrecord})
+
+        cursor.execute(FLAT_RECORD_SQL.format(owner="patient_id"), (patient_account_id, record_id))
         healthrecord = cursor.fetchall()
         if not healthrecord:
             return jsonify({"error": "You do not have access to the health record!"}), 400
@@ -223,69 +206,61 @@ def healthRecord(record_id):
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 
 # -------------------
 # Patient Dashboard API
 # -------------------
+_DASHBOARD_SQL = """
+    SELECT 
+        a.appointment_id,
+        a.date,
+        a.status,
+        a.reason,
+        a.notes,
+        CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name
+    FROM Appointment a
+    INNER JOIN Account ac ON a.physician_id = ac.account_id
+    WHERE a.patient_id = %s {keyset}
+    ORDER BY a.date DESC, a.appointment_id DESC
+    LIMIT %s
+"""
+
+
 @patient_bp.route("/dashboard", methods=["POST"])
 @login_required(role="patient")
 def dashboard():
-    print("Fetching dashboard data")
-
     patient_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    cursor.execute("SELECT DATABASE();")
-    print(cursor.fetchone())
+    page = get_page()
+    cursor = get_cursor()
+    diagnostics.debug("dashboard.fetch", database=current_app.config['DB_PARAMS']['database'])
 
     try:
+        keyset, keyset_params = page.keyset("a.date", "a.appointment_id")
         cursor.execute(
-            """
-            SELECT 
-                a.appointment_id,
-                a.date,
-                a.status,
-                a.reason,
-                a.notes,
-                CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name
-            FROM Appointment a
-            INNER JOIN Account ac ON a.physician_id = ac.account_id
-            WHERE a.patient_id = %s
-            ORDER BY a.date DESC
-        """,
-            (patient_account_id,),
+            _DASHBOARD_SQL.format(keyset=keyset),
+            (patient_account_id, *keyset_params, page.fetch_size),
         )
         
-        appointments = cursor.fetchall()
-        print(appointments)
+        appointments, paging = page.finish(cursor.fetchall(), "date", "appointment_id")
+        diagnostics.debug("dashboard.loaded", appointments=len(appointments))
         return jsonify({
             "success": True, 
             "message": "Dashboard data obtained successfully", 
-            "appointments": appointments
+            "appointments": appointments,
+            **paging
         })
 
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 # -------------------
 # Patient Profile API
 # -------------------
 @patient_bp.route('/profile', methods=['GET'])
 @login_required(role="patient")
 def profile():
-    print("Fetching profile data")
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    cursor.execute("SELECT DATABASE();")
-    print(cursor.fetchone())
+    cursor = get_cursor()
+    diagnostics.debug("profile.fetch", database=current_app.config['DB_PARAMS']['database'])
     try:
         patient_account_id = g.current_user["account_id"]
         cursor.execute("""
@@ -326,9 +301,6 @@ def profile():
         })
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # -------------------
 # Update Patient Profile API
@@ -336,11 +308,9 @@ def profile():
 @patient_bp.route('/profile/update', methods=['PUT'])
 @login_required(role="patient")
 def update_profile():
-    print("Updating profile data")
     data = request.json
     
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     
     try:
         # Update Account table
@@ -380,18 +350,12 @@ def update_profile():
             patient_account_id
         ))
         
-        conn.commit()
-        
         return jsonify({
             "success": True, 
             "message": "Profile updated successfully"
         })
     except Exception as e:
-        conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # -------------------
 # Activity Log API
@@ -399,35 +363,44 @@ def update_profile():
 @patient_bp.route("/activitylogs", methods=["GET"])
 @login_required(role="patient")
 def get_activity_logs():
-    """Get all activity logs for the current patient."""
+    """Get the current patient's activity logs, newest first, one page at a time."""
     patient_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    page = get_page()
+    filters, filter_params = parse_filters(activity_log_filters())
+    cursor = get_cursor()
     try:
-        cursor.execute(
-            """
-            SELECT 
-                log_id,
-                log_date,
-                weight,
-                bp,
-                calories,
-                duration_of_physical_activity
-            FROM ActivityLog
-            WHERE patient_id = %s
-            ORDER BY log_date DESC
-        """,
-            (patient_account_id,),
-        )
+        keyset, keyset_params = page.keyset("log_date", "log_id")
+        query = LIST_SQL.format(filters=filters, keyset=keyset)
+        params = (patient_account_id, *filter_params, *keyset_params)
+        if wants_stream():
+            return stream_query(query, params, "logs")
+
+        cursor.execute(query + " LIMIT %s", (*params, page.fetch_size))
         
-        logs = cursor.fetchall()
-        return jsonify({"success": True, "logs": logs}), 200
+        logs, paging = page.finish(cursor.fetchall(), "log_date", "log_id")
+        return jsonify({"success": True, "logs": logs, **paging}), 200
+    except Exception as e:
+        diagnostics.error("get_activity_logs.failed", error=str(e))
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+# -------------------
+# Activity Log Trends (daily / weekly / monthly rollups)
+# -------------------
+@patient_bp.route("/activitylog/trends", methods=["GET"])
+@login_required(role="patient")
+def get_activity_trends():
+    """Per-bucket count/min/max/mean of weight, calories, duration and BP from the daily rollups."""
+    granularity, start, end = trend_params()
+    patient_account_id = g.current_user["account_id"]
+    cursor = get_cursor()
+    try:
+        buckets = fetch_trends(cursor, patient_account_id, granularity, start, end)
+        return jsonify({"success": True, "granularity": granularity, "from": start.isoformat(),
+                        "to": end.isoformat(), "buckets": buckets}), 200
     except Exception as e:
-        print(f"Error in get_activity_logs: {str(e)}")
+        diagnostics.error("get_activity_trends.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
@@ -438,8 +411,7 @@ def get_activity_logs():
 def get_activity_log(log_id):
     """Get a specific activity log by log_id."""
     patient_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     try:
         cursor.execute(
             """
@@ -448,6 +420,8 @@ def get_activity_log(log_id):
                 log_date,
                 weight,
                 bp,
+                bp_systolic,
+                bp_diastolic,
                 calories,
                 duration_of_physical_activity
             FROM ActivityLog
@@ -462,11 +436,8 @@ def get_activity_log(log_id):
         
         return jsonify({"success": True, "log": log}), 200
     except Exception as e:
-        print(f"Error in get_activity_log: {str(e)}")
+        diagnostics.error("get_activity_log.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
@@ -476,45 +447,55 @@ def get_activity_log(log_id):
 @login_required(role="patient")
 def create_activity_log():
     """Create a new activity log."""
-    data = request.json
-    
-    # Validate required fields
-    required_fields = ['date', 'weight', 'bp_systolic', 'bp_diastolic', 'calories', 'duration']
-    missing_fields = [f for f in required_fields if f not in data]
-    if missing_fields:
-        return jsonify({"success": False, "message": f"Missing fields: {', '.join(missing_fields)}"}), 400
-    
+    try:
+        # Same rules as trg_validate_activity_data, answered with a 400 instead of a database error
+        values = validate_log(request.json)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
     patient_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     try:
-        # Format BP as "systolic/diastolic"
-        bp = f"{data['bp_systolic']}/{data['bp_diastolic']}"
-        
-        cursor.execute(
-            """
-            INSERT INTO ActivityLog (patient_id, log_date, weight, bp, calories, duration_of_physical_activity)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """,
-            (
-                patient_account_id,
-                data["date"],
-                data["weight"],
-                bp,
-                data["calories"],
-                data["duration"],
-            ),
-        )
-        
-        conn.commit()
+        cursor.execute(INSERT_SQL, (patient_account_id, *values))
+        physician_summary.on_activity_log_created(cursor, cursor.lastrowid)
         return jsonify({"success": True, "message": "Activity log created successfully"}), 201
     except Exception as e:
-        conn.rollback()
-        print(f"Error in create_activity_log: {str(e)}")
+        diagnostics.error("create_activity_log.failed", error=str(e))
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+# -------------------
+# Bulk Create Activity Logs (device sync)
+# -------------------
+@patient_bp.route("/activitylog/bulk", methods=["POST"])
+@login_required(role="patient")
+def create_activity_logs_bulk():
+    """
+    Create many activity logs in one transaction.
+
+    The body is a JSON array of logs (same fields as /activitylog/new) or
+    application/x-ndjson with one log per line. Invalid entries are skipped and
+    reported in `results` by their position; the valid ones are inserted.
+    """
+    patient_account_id = g.current_user["account_id"]
+    cursor = get_cursor()
+    try:
+        results = insert_logs(cursor, patient_account_id, iter_bulk_entries())
+    except BulkPayloadError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        diagnostics.error("create_activity_logs_bulk.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+    created = sum(1 for r in results if r["status"] == "created")
+    if created:
+        physician_summary.on_activity_log_changed(cursor, patient_account_id)
+    return jsonify({
+        "success": created == len(results),
+        "created": created,
+        "invalid": len(results) - created,
+        "results": results,
+    }), 201 if created else 400
 
 
 # -------------------
@@ -527,8 +508,7 @@ def update_activity_log(log_id):
     data = request.json
     
     patient_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     try:
         # Verify ownership
         cursor.execute(
@@ -538,10 +518,13 @@ def update_activity_log(log_id):
         if not cursor.fetchone():
             return jsonify({"success": False, "message": "Activity log not found"}), 404
         
-        # Format BP if provided
+        # Numeric BP columns (and the legacy "systolic/diastolic" string) if provided
         bp = None
         if 'bp_systolic' in data and 'bp_diastolic' in data:
-            bp = f"{data['bp_systolic']}/{data['bp_diastolic']}"
+            try:
+                bp = validate_bp(data['bp_systolic'], data['bp_diastolic'])
+            except ValueError as e:
+                return jsonify({"success": False, "message": str(e)}), 400
         
         # Build update query dynamically
         update_fields = []
@@ -551,8 +534,8 @@ def update_activity_log(log_id):
             update_fields.append("weight = %s")
             params.append(data['weight'])
         if bp:
-            update_fields.append("bp = %s")
-            params.append(bp)
+            update_fields.append("bp = %s, bp_systolic = %s, bp_diastolic = %s")
+            params.extend((f"{bp[0]}/{bp[1]}", *bp))
         if 'calories' in data:
             update_fields.append("calories = %s")
             params.append(data['calories'])
@@ -568,16 +551,12 @@ def update_activity_log(log_id):
         query = f"UPDATE ActivityLog SET {', '.join(update_fields)} WHERE log_id = %s"
         
         cursor.execute(query, params)
-        conn.commit()
+        physician_summary.on_activity_log_changed(cursor, patient_account_id)
         
         return jsonify({"success": True, "message": "Activity log updated successfully"}), 200
     except Exception as e:
-        conn.rollback()
-        print(f"Error in update_activity_log: {str(e)}")
+        diagnostics.error("update_activity_log.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
@@ -588,8 +567,7 @@ def update_activity_log(log_id):
 def delete_activity_log(log_id):
     """Delete an activity log."""
     patient_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     try:
         # Verify ownership
         cursor.execute(
@@ -601,16 +579,12 @@ def delete_activity_log(log_id):
         
         # Delete the activity log
         cursor.execute("DELETE FROM ActivityLog WHERE log_id = %s", (log_id,))
-        conn.commit()
+        physician_summary.on_activity_log_changed(cursor, patient_account_id)
         
         return jsonify({"success": True, "message": "Activity log deleted successfully"}), 200
     except Exception as e:
-        conn.rollback()
-        print(f"Error in delete_activity_log: {str(e)}")
+        diagnostics.error("delete_activity_log.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # -------------------
 # Get Available Physicians API
@@ -618,9 +592,7 @@ def delete_activity_log(log_id):
 @patient_bp.route('/physicians', methods=['GET'])
 @login_required(role="patient")
 def get_physicians():
-    print("Fetching physicians")
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     
     try:
         cursor.execute("""
@@ -643,40 +615,42 @@ def get_physicians():
         })
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # -------------------
-# Get Specializations API
+# Physician Availability API
 # -------------------
-@patient_bp.route('/specializations', methods=['GET'])
+@patient_bp.route('/physicians/<int:physician_id>/availability', methods=['GET'])
 @login_required(role="patient")
-def get_specializations():
-    print("Fetching specializations")
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    
+def get_physician_availability(physician_id):
+    first, last, start, end = availability_params()
+    cursor = get_cursor()
+
     try:
-        cursor.execute("""
-            SELECT 
-                specialization_id,
-                specialization_name
-            FROM Specialization
-            ORDER BY specialization_name
-        """)
-        
-        specializations = cursor.fetchall()
-        
+        slots = free_slots(cursor, physician_id, start, end)
         return jsonify({
             "success": True,
-            "specializations": specializations
+            "physician_id": physician_id,
+            "from": first.isoformat(),
+            "to": last.isoformat(),
+            "slot_minutes": booking.SLOT_MINUTES,
+            "slots": [s.isoformat(sep=" ") for s in slots]
         })
+    except UnknownPhysicianError as e:
+        return jsonify({"success": False, "message": str(e)}), 404
+    except Exception as e:
+        diagnostics.error("physician_availability.failed", physician_id=physician_id, error=str(e))
+        return jsonify({"success": False, "message": str(e)}), 500
+
+# -------------------
+# Get Specializations API
+# -------------------
+@patient_bp.route('/specializations', methods=['GET'])
+@login_required(role="patient")
+def get_specializations():
+    try:
+        return reference_response("specializations")
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # -------------------
 # Book Appointment API
@@ -684,11 +658,9 @@ def get_specializations():
 @patient_bp.route('/appointment/book', methods=['POST'])
 @login_required(role="patient")
 def book_appointment():
-    print("Booking appointment")
     data = request.json
     
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     
     try:
         # Validate required fields
@@ -697,89 +669,93 @@ def book_appointment():
             if not data.get(field):
                 return jsonify({"success": False, "message": f"{field} is required"}), 400
         
-        # Check if physician already has an appointment at this date/time
-        cursor.execute("""
-            SELECT appointment_id 
-            FROM Appointment 
-            WHERE physician_id = %s 
-            AND date = %s 
-            AND status != 'Cancelled'
-        """, (data.get('physician_id'), data.get('date')))
-        
-        existing = cursor.fetchone()
-        if existing:
-            return jsonify({
-                "success": False, 
-                "message": "This physician already has an appointment at this time. Please choose a different time."
-            }), 400
-        
-        # Insert new appointment
-        patient_account_id = g.current_user["account_id"]
-        cursor.execute("""
-            INSERT INTO Appointment (patient_id, physician_id, date, status, reason, notes)
-            VALUES (%s, %s, %s, 'Pending', %s, %s)
-        """, (
-            patient_account_id,
-            data.get('physician_id'),
-            data.get('date'),
-            data.get('reason'),
-            data.get('notes', '')
-        ))
+        try:
+            when = booking.parse_time(data.get('date'))
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
 
-        conn.commit()
+        # One INSERT reserves the slot; UNIQUE (physician_id, active_slot) refuses a taken one
+        patient_account_id = g.current_user["account_id"]
+        try:
+            appointment_id = booking.book(cursor, patient_account_id, data.get('physician_id'), when,
+                                          data.get('reason'), data.get('notes', ''))
+        except booking.SlotUnavailableError as e:
+            # This worker's view of the agenda was stale; reload it for the suggestions
+            invalidate_availability(e.physician_id)
+            suggestions = next_free_slots(cursor, e.physician_id, max(when, datetime.datetime.now()))
+            return jsonify({
+                "success": False,
+                "error": "slot_unavailable",
+                "message": str(e),
+                "slot": {
+                    "start": booking.slot_start(e.slot).isoformat(sep=" "),
+                    "minutes": booking.SLOT_MINUTES,
+                },
+                "suggestions": [s.isoformat(sep=" ") for s in suggestions],
+            }), 409
+        except booking.UnknownPhysicianError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        physician_summary.on_appointment_booked(cursor, appointment_id)
+        after_commit(invalidate_access, data.get('physician_id'))
+        after_commit(invalidate_availability, data.get('physician_id'))
         
         return jsonify({
             "success": True,
-            "message": "Appointment booked successfully!"
+            "message": "Appointment booked successfully!",
+            "appointment_id": appointment_id
         })
     except Exception as e:
-        conn.rollback()
-        print("Error booking appointment:", str(e))
+        diagnostics.error("book_appointment.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # -------------------
 # Get Patient Appointments API
 # -------------------
+_APPOINTMENTS_SQL = """
+    SELECT 
+        a.appointment_id,
+        a.date,
+        a.status,
+        a.reason,
+        a.notes,
+        CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name,
+        s.specialization_name
+    FROM Appointment a
+    INNER JOIN Account ac ON a.physician_id = ac.account_id
+    INNER JOIN Physician p ON a.physician_id = p.account_id
+    INNER JOIN Specialization s ON p.specialization_id = s.specialization_id
+    WHERE a.patient_id = %s {filters} {keyset}
+    ORDER BY a.date DESC, a.appointment_id DESC
+"""
+
+
 @patient_bp.route('/appointments', methods=['GET'])
 @login_required(role="patient")
 def get_appointments():
-    print("Fetching patient appointments")
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    page = get_page()
+    filters, filter_params = parse_filters(appointment_filters("physician"))
+    cursor = get_cursor()
     
     try:
         patient_account_id = g.current_user["account_id"]
-        cursor.execute("""
-            SELECT 
-                a.appointment_id,
-                a.date,
-                a.status,
-                a.reason,
-                a.notes,
-                CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name,
-                s.specialization_name
-            FROM Appointment a
-            INNER JOIN Account ac ON a.physician_id = ac.account_id
-            INNER JOIN Physician p ON a.physician_id = p.account_id
-            INNER JOIN Specialization s ON p.specialization_id = s.specialization_id
-            WHERE a.patient_id = %s
-            ORDER BY a.date DESC
-        """, (patient_account_id,))
+        keyset, keyset_params = page.keyset("a.date", "a.appointment_id")
+        query = _APPOINTMENTS_SQL.format(filters=filters, keyset=keyset)
+        params = (patient_account_id, *filter_params, *keyset_params)
+        if wants_stream():
+            return stream_query(query, params, "appointments")
+
+        cursor.execute(query + " LIMIT %s", (*params, page.fetch_size))
         
-        appointments = cursor.fetchall()
+        appointments, paging = page.finish(cursor.fetchall(), "date", "appointment_id")
         
         return jsonify({
             "success": True,
-            "appointments": appointments
+            "appointments": appointments,
+            **paging
         })
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 # -------------------
 # Cancel Appointment API
@@ -787,16 +763,13 @@ def get_appointments():
 @patient_bp.route('/appointment/<int:appointment_id>/cancel', methods=['PUT'])
 @login_required(role="patient")
 def cancel_appointment(appointment_id):
-    print(f"Cancelling appointment {appointment_id}")
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     
     try:
         # Verify appointment belongs to patient
         patient_account_id = g.current_user["account_id"]
         cursor.execute("""
-            SELECT appointment_id 
+            SELECT appointment_id, physician_id
             FROM Appointment 
             WHERE appointment_id = %s AND patient_id = %s
         """, (appointment_id, patient_account_id))
@@ -814,17 +787,14 @@ def cancel_appointment(appointment_id):
             SET status = 'Cancelled'
             WHERE appointment_id = %s
         """, (appointment_id,))
-        
-        conn.commit()
+        physician_summary.on_appointment_status_changed(cursor, appointment["physician_id"])
+        after_commit(invalidate_access, appointment["physician_id"])
+        after_commit(invalidate_availability, appointment["physician_id"])
         
         return jsonify({
             "success": True,
             "message": "Appointment cancelled successfully"
         })
     except Exception as e:
-        conn.rollback()
-        print("Error cancelling appointment:", str(e))
+        diagnostics.error("cancel_appointment.failed", appointment_id=appointment_id, error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
@@ -1,7 +1,17 @@
-import pymysql
-from flask import Blueprint, request, jsonify, g
-from utils.db_utils import get_db_connection
-from utils.auth_utils import hash_password, generate_token, login_required
+from flask import Blueprint, current_app, request, jsonify, g
+from utils import booking, diagnostics, physician_summary
+from utils.activity_logs import LIST_SQL
+from utils.activity_trends import fetch_trends, trend_params
+from utils.availability import invalidate_availability
+from utils.db_utils import after_commit, get_cursor
+from utils.filters import activity_log_filters, appointment_filters, parse_filters
+from utils.health_records import (FLAT_RECORD_SQL, get_nested_record, insert_medicines, record_format,
+                                   validate_prescriptions)
+from utils.pagination import get_page
+from utils.streaming import stream_query, wants_stream
+from utils.reference_cache import register_dataset, reference_response
+from utils.auth_utils import ACCOUNT_ID_SQL, authenticate, hash_password, generate_token, login_required
+from utils.care_access import accessible_patients, can_access
 
 physician_bp = Blueprint("physician_bp", __name__)
 
@@ -18,8 +28,7 @@ def signup():
     if missing_fields:
         return jsonify({"success": False, "message": f"Missing fields: {', '.join(missing_fields)}"}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
 
     try:
         # Use stored procedure for account registration
@@ -34,7 +43,7 @@ def signup():
         ])
         
         # Get the newly created account_id
-        cursor.execute("SELECT account_id FROM Account WHERE user_name=%s", (data['user_name'],))
+        cursor.execute(ACCOUNT_ID_SQL, (data['user_name'],))
         account = cursor.fetchone()
         account_id = account['account_id']
     
@@ -47,19 +56,12 @@ def signup():
             data.get('specialization_id'),
             data.get('license_number')
         ))
-
-        conn.commit()
         token = generate_token(account_id, 'physician')
         return jsonify({"success": True, "message": "Account created successfully", "token": token})
 
     except Exception as e:
-        conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 
 # -------------------
 # Login API
@@ -67,14 +69,10 @@ def signup():
 @physician_bp.route("/login", methods=["POST"])
 def login():
     data = request.json
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
 
     try:
-        hashed_pw = hash_password(data['password'])
-        cursor.execute("SELECT * FROM Account WHERE user_name=%s AND password=%s AND role='physician'",
-                       (data['user_name'], hashed_pw))
-        account = cursor.fetchone()
+        account = authenticate(cursor, data['user_name'], data['password'], 'physician')
 
         if not account:
             return jsonify({"success": False, "message": "Invalid credentials"}), 401
@@ -94,44 +92,28 @@ def login():
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 # -------------------
 # Physician Specific Health Record API
 # -------------------
 @physician_bp.route("/healthRecord/record/<record_id>", methods=["GET"])
 @login_required(role="physician")
 def healthRecord(record_id):
-    print("record_id=",record_id)
     if not record_id:
         return jsonify({"error": "record_id is required"}), 400
    
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    cursor.execute("SELECT DATABASE();")
-    print(cursor.fetchone())
+    fmt = record_format()
+    cursor = get_cursor()
+    diagnostics.debug("health_record.fetch", record_id=record_id, format=fmt,
+                      database=current_app.config['DB_PARAMS']['database'])
     try:
-        cursor.execute(
-            """
-            SELECT h.record_id, h.patient_id, h.visit_date, h.diagnosis, h.symptoms,
-                   h.lab_results, h.follow_up_required,
-                   CONCAT(a.first_name,' ', a.last_name) AS physician_name,
-                   p.prescription_id, m.medication_id, m.dosage, m.frequency,
-                   m.duration, m.instructions,
-                   med.medication_name, med.dosage_form, med.storage_instructions,
-                   med.common_side_effects, med.description
-            FROM HealthRecord h
-            INNER JOIN Account a ON a.account_id = h.physician_id
-            LEFT JOIN Prescription p ON p.record_id = h.record_id
-            LEFT JOIN Medicine m ON m.prescription_id = p.prescription_id
-            LEFT JOIN Medications med ON med.medication_id = m.medication_id
-            WHERE h.physician_id = %s AND h.record_id = %s
-            """,
-            (physician_account_id, record_id),
-        )
+        if fmt == "nested":
+            healthrecord = get_nested_record(cursor, record_id, "physician_id", physician_account_id)
+            if healthrecord is None:
+                return jsonify({"error": "You do not have access to the health record!"}), 400
+            return jsonify({"success": True, "message": "Health Record obtained successfully", "healthrecord": healthrecord})
+
+        cursor.execute(FLAT_RECORD_SQL.format(owner="physician_id"), (physician_account_id, record_id))
         healthrecord = cursor.fetchall()
         if not healthrecord:
             return jsonify({"error": "You do not have access to the health record!"}), 400
@@ -141,10 +123,6 @@ def healthRecord(record_id):
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 # -------------------
 # Physician Create Health Record API
 # -------------------
@@ -164,17 +142,20 @@ def create_health_record():
         return jsonify({"error": "All health record fields are required"}), 400
 
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
 
     try:
-        cursor.execute(
-            "SELECT 1 FROM Appointment WHERE patient_id=%s AND physician_id=%s LIMIT 1",
-            (patient_id, physician_account_id)
-        )
-        if not cursor.fetchone():
+        if not can_access(cursor, physician_account_id, patient_id):
             return jsonify({"error": "You are not authorized to create a record for this patient"}), 403
 
+        # Every prescription item is checked (one medication lookup) before anything is written
+        try:
+            medicines, errors = validate_prescriptions(cursor, prescriptions)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if errors:
+            return jsonify({"error": "Invalid prescriptions", "errors": errors}), 400
+
         cursor.execute(
             """
             INSERT INTO HealthRecord 
@@ -191,35 +172,11 @@ def create_health_record():
         )
         prescription_id = cursor.lastrowid
 
-        for pres in prescriptions:
-            medication_id = pres.get("medication_id")
-            dosage = pres.get("dosage")
-            frequency = pres.get("frequency")
-            duration = pres.get("duration")
-            instructions = pres.get("instructions")
-
-            if not all([medication_id, dosage, frequency, duration, instructions]):
-                conn.rollback()
-                return jsonify({"error": "All prescription fields are required"}), 400
-
-            cursor.execute(
-                "SELECT 1 FROM Medications WHERE medication_id=%s",
-                (medication_id,)
-            )
-            if not cursor.fetchone():
-                conn.rollback()
-                return jsonify({"error": "Invalid medication_id"}), 400
-
-            cursor.execute(
-                """
-                INSERT INTO Medicine 
-                (prescription_id, medication_id, dosage, frequency, duration, instructions)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (prescription_id, medication_id, dosage, frequency, duration, instructions)
-            )
-
-        conn.commit()
+        insert_medicines(cursor, prescription_id, medicines)
+
+        physician_summary.on_health_record_created(cursor, physician_account_id, follow_up_required == "Yes")
+        if follow_up_required == "Yes":
+            after_commit(invalidate_availability, physician_account_id)
 
         return jsonify({
             "success": True,
@@ -228,67 +185,70 @@ def create_health_record():
         })
 
     except Exception as e:
-        conn.rollback()
+        if booking.is_slot_conflict(e):
+            # auto_followup_appointment books visit_date + 30 days, which is already taken
+            return jsonify({"success": False, "error": "slot_unavailable",
+                            "message": "The follow-up time (visit date + 30 days) is already booked."}), 409
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 # -------------------
 # Get list of medications(for physician)
 # -------------------
+register_dataset("medications", "SELECT medication_id, medication_name FROM Medications ORDER BY medication_name")
+
+
 @physician_bp.route("/medications", methods=["GET"])
 @login_required(role="physician")
 def get_medications():
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
-    cursor.execute("SELECT medication_id, medication_name FROM Medications ORDER BY medication_name")
-    meds = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return jsonify(meds)
+    try:
+        return reference_response("medications")
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
 
 
 # -------------------
 # Physician Appointments (for physician dashboard)
 # -------------------
+_APPOINTMENTS_SQL = """
+    SELECT 
+        a.appointment_id,
+        a.patient_id,
+        a.date,
+        a.status,
+        a.reason,
+        a.notes,
+        CONCAT(pf.first_name, ' ', pf.last_name) AS patient_name,
+        CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name,
+        YEAR(CURDATE()) - YEAR(pa.date_of_birth) AS age
+    FROM Appointment a
+    INNER JOIN Account ac ON a.physician_id = ac.account_id
+    LEFT JOIN Account pf ON a.patient_id = pf.account_id
+    LEFT JOIN Patient pa ON a.patient_id = pa.account_id
+    WHERE a.physician_id = %s {filters} {keyset}
+    ORDER BY a.date DESC, a.appointment_id DESC
+"""
+
+
 @physician_bp.route("/appointments", methods=["GET"])
 @login_required(role="physician")
 def appointments():
     """Return appointments assigned to the hard-coded physician user (demo)."""
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    page = get_page()
+    filters, filter_params = parse_filters(appointment_filters("patient"))
+    cursor = get_cursor()
     try:
-        cursor.execute(
-            """
-            SELECT 
-                a.appointment_id,
-                a.patient_id,
-                a.date,
-                a.status,
-                a.reason,
-                a.notes,
-                CONCAT(pf.first_name, ' ', pf.last_name) AS patient_name,
-                CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name,
-                YEAR(CURDATE()) - YEAR(pa.date_of_birth) AS age
-            FROM Appointment a
-            INNER JOIN Account ac ON a.physician_id = ac.account_id
-            LEFT JOIN Account pf ON a.patient_id = pf.account_id
-            LEFT JOIN Patient pa ON a.patient_id = pa.account_id
-            WHERE a.physician_id = %s
-            ORDER BY a.date DESC
-        """,
-            (physician_account_id,),
-        )
-        appointments = cursor.fetchall()
-        return jsonify({"success": True, "appointments": appointments}), 200
+        keyset, keyset_params = page.keyset("a.date", "a.appointment_id")
+        query = _APPOINTMENTS_SQL.format(filters=filters, keyset=keyset)
+        params = (physician_account_id, *filter_params, *keyset_params)
+        if wants_stream():
+            return stream_query(query, params, "appointments")
+
+        cursor.execute(query + " LIMIT %s", (*params, page.fetch_size))
+        appointments, paging = page.finish(cursor.fetchall(), "date", "appointment_id")
+        return jsonify({"success": True, "appointments": appointments, **paging}), 200
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
@@ -303,103 +263,132 @@ def update_appointment_status(appointment_id):
         return jsonify({'success': False, 'message': 'Invalid or missing status'}), 400
 
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    cursor = get_cursor()
     try:
         # Ensure the physician owns the appointment (demo uses hard-coded physician id)
         cursor.execute("SELECT physician_id FROM Appointment WHERE appointment_id=%s", (appointment_id,))
         row = cursor.fetchone()
         if not row:
             return jsonify({'success': False, 'message': 'Appointment not found'}), 404
-        physician_id = row[0] if isinstance(row, tuple) else row.get('physician_id')
-        if int(physician_id) != int(physician_account_id):
+        if int(row['physician_id']) != int(physician_account_id):
             return jsonify({'success': False, 'message': 'Not authorized to modify this appointment'}), 403
 
         cursor.execute("UPDATE Appointment SET status=%s WHERE appointment_id=%s", (new_status, appointment_id))
-        conn.commit()
+        physician_summary.on_appointment_status_changed(cursor, physician_account_id)
+        after_commit(invalidate_availability, physician_account_id)
         return jsonify({'success': True, 'message': 'Status updated'}), 200
     except Exception as e:
-        conn.rollback()
+        if booking.is_slot_conflict(e):
+            # Re-opening a cancelled appointment whose slot has been booked since
+            return jsonify({'success': False, 'error': 'slot_unavailable',
+                            'message': 'Another appointment now holds this time slot.'}), 409
         return jsonify({'success': False, 'message': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
 # Physician Patients (distinct patients the physician has appointments with)
 # -------------------
+_PATIENTS_SQL = """
+    SELECT
+        pp.patient_id,
+        CONCAT(pf.first_name, ' ', pf.last_name) AS patient_name,
+        YEAR(CURDATE()) - YEAR(pa.date_of_birth) AS age,
+        pp.last_visit AS recent_date,
+        pp.visit_count,
+        CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name
+    FROM PhysicianPatient pp
+    INNER JOIN Account pf ON pp.patient_id = pf.account_id
+    LEFT JOIN Patient pa ON pp.patient_id = pa.account_id
+    INNER JOIN Account ac ON pp.physician_id = ac.account_id
+    WHERE pp.physician_id = %s {keyset}
+    ORDER BY pp.last_visit DESC, pp.patient_id DESC
+    LIMIT %s
+"""
+
+
 @physician_bp.route("/patients", methods=["GET"])
 @login_required(role="physician")
 def get_patients():
     """Return distinct patients (with their most recent appointment info) for the physician."""
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    page = get_page()
+    cursor = get_cursor()
     try:
-        # Get distinct patients from appointments for this physician, with most recent appointment details
+        # One PhysicianPatient row per patient on the panel (migration v003), newest visit first
+        keyset, keyset_params = page.keyset("pp.last_visit", "pp.patient_id")
         cursor.execute(
-            """
-            SELECT DISTINCT
-                a.patient_id,
-                CONCAT(pf.first_name, ' ', pf.last_name) AS patient_name,
-                YEAR(CURDATE()) - YEAR(pa.date_of_birth) AS age,
-                (SELECT MAX(ap.date) FROM Appointment ap WHERE ap.patient_id = a.patient_id AND ap.physician_id = %s) AS recent_date,
-                CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name
-            FROM Appointment a
-            INNER JOIN Account pf ON a.patient_id = pf.account_id
-            LEFT JOIN Patient pa ON a.patient_id = pa.account_id
-            INNER JOIN Account ac ON a.physician_id = ac.account_id
-            WHERE a.physician_id = %s
-            ORDER BY recent_date DESC
-        """,
-            (physician_account_id, physician_account_id),
+            _PATIENTS_SQL.format(keyset=keyset),
+            (physician_account_id, *keyset_params, page.fetch_size),
         )
-        patients = cursor.fetchall()
-        return jsonify({"success": True, "patients": patients}), 200
+        patients, paging = page.finish(cursor.fetchall(), "recent_date", "patient_id")
+        return jsonify({"success": True, "patients": patients, **paging}), 200
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+# -------------------
+# Bulk access check: which of these patients may the physician see
+# -------------------
+MAX_ACCESS_CHECK_IDS = 1000
+
+
+@physician_bp.route("/patients/access", methods=["POST"])
+@login_required(role="physician")
+def check_patient_access():
+    """Body {"patient_ids": [...]}; answers {"allowed": [...], "denied": [...]} in request order."""
+    patient_ids = (request.get_json(silent=True) or {}).get("patient_ids")
+    if not isinstance(patient_ids, list) or not all(isinstance(p, int) and not isinstance(p, bool) for p in patient_ids):
+        return jsonify({"success": False, "message": "patient_ids must be a list of integers"}), 400
+    if len(patient_ids) > MAX_ACCESS_CHECK_IDS:
+        return jsonify({"success": False, "message": f"At most {MAX_ACCESS_CHECK_IDS} patient_ids per request"}), 400
+
+    physician_account_id = g.current_user["account_id"]
+    cursor = get_cursor()
+    try:
+        allowed = accessible_patients(cursor, physician_account_id, patient_ids)
+        patient_ids = list(dict.fromkeys(patient_ids))
+        return jsonify({
+            "success": True,
+            "allowed": [p for p in patient_ids if p in allowed],
+            "denied": [p for p in patient_ids if p not in allowed],
+        }), 200
     except Exception as e:
+        diagnostics.error("check_patient_access.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
 # Physician Patient Visits (health records for a specific patient)
 # -------------------
+_VISITS_SQL = """
+    SELECT 
+        h.record_id,
+        h.visit_date,
+        h.diagnosis,
+        h.symptoms,
+        h.lab_results,
+        h.follow_up_required,
+        CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name
+    FROM HealthRecord h
+    INNER JOIN Account ac ON h.physician_id = ac.account_id
+    WHERE h.patient_id = %s AND h.physician_id = %s
+    ORDER BY h.visit_date DESC
+"""
+
+
 @physician_bp.route("/patient/<int:patient_id>/visits", methods=["GET"])
 @login_required(role="physician")
 def get_patient_visits(patient_id):
     """Return health records (visits) for a specific patient, physician-specific."""
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     try:
         # Fetch all health records for the patient where this physician was the provider
-        cursor.execute(
-            """
-            SELECT 
-                h.record_id,
-                h.visit_date,
-                h.diagnosis,
-                h.symptoms,
-                h.lab_results,
-                h.follow_up_required,
-                CONCAT(ac.first_name, ' ', ac.last_name) AS physician_name
-            FROM HealthRecord h
-            INNER JOIN Account ac ON h.physician_id = ac.account_id
-            WHERE h.patient_id = %s AND h.physician_id = %s
-            ORDER BY h.visit_date DESC
-        """,
-            (patient_id, physician_account_id),
-        )
+        cursor.execute(_VISITS_SQL, (patient_id, physician_account_id))
         visits = cursor.fetchall()
         return jsonify({"success": True, "visits": visits}), 200
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
@@ -408,74 +397,16 @@ def get_patient_visits(patient_id):
 @physician_bp.route("/dashboard-summary", methods=["GET"])
 @login_required(role="physician")
 def dashboard_summary():
-    """Return dashboard summary: recent activity logs and prescriptions."""
+    """Return dashboard summary: latest patient activity log, recent prescriptions and next appointment."""
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     try:
-        # Get most recent activity logs from the physician's patients
-        cursor.execute(
-            """
-            SELECT a.log_id, a.patient_id, a.log_date, a.weight, a.bp, a.calories, a.duration_of_physical_activity
-            FROM ActivityLog a
-            INNER JOIN Appointment ap ON a.patient_id = ap.patient_id
-            WHERE ap.physician_id = %s
-            ORDER BY a.log_date DESC
-            LIMIT 1
-        """,
-            (physician_account_id,),
-        )
-        activity_log = cursor.fetchone()
-
-        # Get recent prescriptions from the physician's patients
-        # Join Medicine -> Prescription -> HealthRecord -> Medications
-        cursor.execute(
-            """
-            SELECT m.dosage, m.frequency, med.medication_name
-            FROM Medicine m
-            INNER JOIN Prescription p ON m.Prescription_id = p.prescription_id
-            INNER JOIN HealthRecord h ON p.record_id = h.record_id
-            INNER JOIN Medications med ON m.Medication_id = med.medication_id
-            WHERE h.physician_id = %s
-            ORDER BY h.visit_date DESC
-            LIMIT 2
-        """,
-            (physician_account_id,),
-        )
-        prescriptions = cursor.fetchall()
-
-        # Get next upcoming appointment for the physician (exclude Completed/Cancelled)
-        cursor.execute("""
-            SELECT
-                a.appointment_id,
-                a.patient_id,
-                a.date,
-                a.status,
-                a.reason,
-                a.notes,
-                CONCAT(pf.first_name, ' ', pf.last_name) AS patient_name
-            FROM Appointment a
-            LEFT JOIN Account pf ON a.patient_id = pf.account_id
-            WHERE a.physician_id = %s
-              AND a.status = 'Pending'
-              AND a.date >= NOW()
-            ORDER BY a.date ASC
-            LIMIT 1
-        """, (physician_account_id,))
-        next_appointment = cursor.fetchone()
-
-        return jsonify({
-            "success": True,
-            "activity_log": activity_log,
-            "prescriptions": prescriptions,
-            "next_appointment": next_appointment
-        }), 200
+        # One primary-key read of the PhysicianDashboardSummary projection (utils/physician_summary.py)
+        summary = physician_summary.get_summary(cursor, physician_account_id)
+        return jsonify({"success": True, **summary}), 200
     except Exception as e:
-        print(f"Error in dashboard_summary: {str(e)}")
+        diagnostics.error("dashboard_summary.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
@@ -486,8 +417,7 @@ def dashboard_summary():
 def get_profile():
     """Return physician profile information."""
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     try:
         cursor.execute(
             """
@@ -506,11 +436,8 @@ def get_profile():
         
         return jsonify({"success": True, "profile": profile}), 200
     except Exception as e:
-        print(f"Error in get_profile: {str(e)}")
+        diagnostics.error("get_profile.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
@@ -519,49 +446,52 @@ def get_profile():
 @physician_bp.route("/patient/<int:patient_id>/activitylogs", methods=["GET"])
 @login_required(role="physician")
 def get_patient_activity_logs(patient_id):
-    """Get all activity logs for a specific patient (for physician view)."""
+    """Get a specific patient's activity logs, newest first, one page at a time (for physician view)."""
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    page = get_page()
+    filters, filter_params = parse_filters(activity_log_filters())
+    cursor = get_cursor()
     try:
         # Verify physician has access to this patient
-        cursor.execute(
-            """
-            SELECT patient_id FROM Appointment
-            WHERE patient_id = %s AND physician_id = %s
-            LIMIT 1
-        """,
-            (patient_id, physician_account_id),
-        )
-        
-        if not cursor.fetchone():
+        if not can_access(cursor, physician_account_id, patient_id):
             return jsonify({"success": False, "message": "Access denied"}), 403
         
         # Get activity logs
-        cursor.execute(
-            """
-            SELECT 
-                log_id,
-                log_date,
-                weight,
-                bp,
-                calories,
-                duration_of_physical_activity
-            FROM ActivityLog
-            WHERE patient_id = %s
-            ORDER BY log_date DESC
-        """,
-            (patient_id,),
-        )
+        keyset, keyset_params = page.keyset("log_date", "log_id")
+        query = LIST_SQL.format(filters=filters, keyset=keyset)
+        params = (patient_id, *filter_params, *keyset_params)
+        if wants_stream():
+            return stream_query(query, params, "logs")
+
+        cursor.execute(query + " LIMIT %s", (*params, page.fetch_size))
         
-        logs = cursor.fetchall()
-        return jsonify({"success": True, "logs": logs}), 200
+        logs, paging = page.finish(cursor.fetchall(), "log_date", "log_id")
+        return jsonify({"success": True, "logs": logs, **paging}), 200
+    except Exception as e:
+        diagnostics.error("get_patient_activity_logs.failed", error=str(e))
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+# -------------------
+# Physician View Patient Activity Trends
+# -------------------
+@physician_bp.route("/patient/<int:patient_id>/activitylog/trends", methods=["GET"])
+@login_required(role="physician")
+def get_patient_activity_trends(patient_id):
+    """Per-bucket activity statistics of a patient (see patient_bp.get_activity_trends)."""
+    granularity, start, end = trend_params()
+    physician_account_id = g.current_user["account_id"]
+    cursor = get_cursor()
+    try:
+        if not can_access(cursor, physician_account_id, patient_id):
+            return jsonify({"success": False, "message": "Access denied"}), 403
+
+        buckets = fetch_trends(cursor, patient_id, granularity, start, end)
+        return jsonify({"success": True, "granularity": granularity, "from": start.isoformat(),
+                        "to": end.isoformat(), "buckets": buckets}), 200
     except Exception as e:
-        print(f"Error in get_patient_activity_logs: {str(e)}")
+        diagnostics.error("get_patient_activity_trends.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # -------------------
@@ -572,20 +502,10 @@ def get_patient_activity_logs(patient_id):
 def get_patient_activity_log(patient_id, log_id):
     """Get a specific activity log for a patient (for physician view)."""
     physician_account_id = g.current_user["account_id"]
-    conn = get_db_connection()
-    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor = get_cursor()
     try:
         # Verify physician has access to this patient
-        cursor.execute(
-            """
-            SELECT patient_id FROM Appointment
-            WHERE patient_id = %s AND physician_id = %s
-            LIMIT 1
-        """,
-            (patient_id, physician_account_id),
-        )
-        
-        if not cursor.fetchone():
+        if not can_access(cursor, physician_account_id, patient_id):
             return jsonify({"success": False, "message": "Access denied"}), 403
         
         # Get activity log
@@ -596,6 +516,8 @@ def get_patient_activity_log(patient_id, log_id):
                 log_date,
                 weight,
                 bp,
+                bp_systolic,
+                bp_diastolic,
                 calories,
                 duration_of_physical_activity
             FROM ActivityLog
@@ -610,9 +532,6 @@ def get_patient_activity_log(patient_id, log_id):
         
         return jsonify({"success": True, "log": log}), 200
     except Exception as e:
-        print(f"Error in get_patient_activity_log: {str(e)}")
+        diagnostics.error("get_patient_activity_log.failed", error=str(e))
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
@@ -23,6 +23,10 @@ GRANT SELECT ON mediflow_db.Pharmacy TO 'mediflow_user'@'localhost';
 GRANT SELECT ON mediflow_db.Specialization TO 'mediflow_user'@'localhost';
 GRANT SELECT ON mediflow_db.ActivityLog TO 'mediflow_user'@'localhost';
 GRANT SELECT ON mediflow_db.Activity_Log_Audit TO 'mediflow_user'@'localhost';
+GRANT SELECT ON mediflow_db.PhysicianDashboardSummary TO 'mediflow_user'@'localhost';
+GRANT SELECT ON mediflow_db.PhysicianPatient TO 'mediflow_user'@'localhost';
+GRANT SELECT ON mediflow_db.ActivityLogDaily TO 'mediflow_user'@'localhost';
+GRANT SELECT ON mediflow_db.RevokedToken TO 'mediflow_user'@'localhost';
 
 -- Grant INSERT privileges
 GRANT INSERT ON mediflow_db.Account TO 'mediflow_user'@'localhost';
@@ -34,15 +38,20 @@ GRANT INSERT ON mediflow_db.Prescription TO 'mediflow_user'@'localhost';
 GRANT INSERT ON mediflow_db.Medicine TO 'mediflow_user'@'localhost';
 GRANT INSERT ON mediflow_db.ActivityLog TO 'mediflow_user'@'localhost';
 GRANT INSERT ON mediflow_db.Activity_Log_Audit TO 'mediflow_user'@'localhost';
+GRANT INSERT ON mediflow_db.PhysicianDashboardSummary TO 'mediflow_user'@'localhost';
+GRANT INSERT ON mediflow_db.RevokedToken TO 'mediflow_user'@'localhost';
 
 -- Grant UPDATE privileges
 GRANT UPDATE ON mediflow_db.Account TO 'mediflow_user'@'localhost';
 GRANT UPDATE ON mediflow_db.Patient TO 'mediflow_user'@'localhost';
 GRANT UPDATE ON mediflow_db.Appointment TO 'mediflow_user'@'localhost';
 GRANT UPDATE ON mediflow_db.ActivityLog TO 'mediflow_user'@'localhost';
+GRANT UPDATE ON mediflow_db.PhysicianDashboardSummary TO 'mediflow_user'@'localhost';
 
 -- Grant DELETE privileges (limited)
 GRANT DELETE ON mediflow_db.ActivityLog TO 'mediflow_user'@'localhost';
+GRANT DELETE ON mediflow_db.PhysicianDashboardSummary TO 'mediflow_user'@'localhost';
+GRANT DELETE ON mediflow_db.RevokedToken TO 'mediflow_user'@'localhost';
 
 -- Grant EXECUTE privileges on stored procedures
 GRANT EXECUTE ON PROCEDURE mediflow_db.register_account TO 'mediflow_user'@'localhost';
@@ -8,18 +8,9 @@ DELIMITER $$
 -- Triggers
 -- ==============================
 
+-- Double bookings are refused by UNIQUE (physician_id, active_slot) since
+-- migration v006; the former prevent_double_booking trigger is removed.
 DROP TRIGGER IF EXISTS prevent_double_booking$$
-CREATE TRIGGER prevent_double_booking
-BEFORE INSERT ON Appointment FOR EACH ROW
-BEGIN
-    IF EXISTS (
-        SELECT 1 FROM Appointment
-        WHERE physician_id = NEW.physician_id AND date = NEW.date AND status <> 'Cancelled'
-    ) THEN
-        SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = 'Physician already has an appointment at this date!';
-    END IF;
-END $$
 
 DROP TRIGGER IF EXISTS auto_followup_appointment$$
 CREATE TRIGGER auto_followup_appointment
@@ -31,6 +22,147 @@ BEGIN
     END IF;
 END $$
 
+-- PhysicianPatient (migration v003) follows every appointment write. Inserts only
+-- move the pair forward; updates and deletes recompute the affected pairs from
+-- idx_appointment_physician_patient_date.
+DROP PROCEDURE IF EXISTS refresh_physician_patient$$
+CREATE PROCEDURE refresh_physician_patient (IN p_physician_id INT, IN p_patient_id INT)
+BEGIN
+    DECLARE v_last_visit DATETIME;
+    DECLARE v_visit_count INT;
+    SELECT MAX(date), COALESCE(SUM(status <> 'Cancelled'), 0) INTO v_last_visit, v_visit_count
+    FROM Appointment
+    WHERE physician_id = p_physician_id AND patient_id = p_patient_id;
+    IF v_last_visit IS NULL THEN
+        DELETE FROM PhysicianPatient WHERE physician_id = p_physician_id AND patient_id = p_patient_id;
+    ELSE
+        INSERT INTO PhysicianPatient (physician_id, patient_id, last_visit, visit_count)
+        VALUES (p_physician_id, p_patient_id, v_last_visit, v_visit_count)
+        ON DUPLICATE KEY UPDATE last_visit = v_last_visit, visit_count = v_visit_count;
+    END IF;
+END $$
+
+DROP TRIGGER IF EXISTS physician_patient_after_insert$$
+CREATE TRIGGER physician_patient_after_insert
+AFTER INSERT ON Appointment FOR EACH ROW
+BEGIN
+    INSERT INTO PhysicianPatient (physician_id, patient_id, last_visit, visit_count)
+    VALUES (NEW.physician_id, NEW.patient_id, NEW.date, NEW.status <> 'Cancelled')
+    ON DUPLICATE KEY UPDATE
+        last_visit = GREATEST(last_visit, VALUES(last_visit)),
+        visit_count = visit_count + VALUES(visit_count);
+END $$
+
+DROP TRIGGER IF EXISTS physician_patient_after_update$$
+CREATE TRIGGER physician_patient_after_update
+AFTER UPDATE ON Appointment FOR EACH ROW
+BEGIN
+    IF NOT (NEW.physician_id <=> OLD.physician_id AND NEW.patient_id <=> OLD.patient_id
+            AND NEW.date <=> OLD.date AND NEW.status <=> OLD.status) THEN
+        CALL refresh_physician_patient(NEW.physician_id, NEW.patient_id);
+        IF NOT (NEW.physician_id <=> OLD.physician_id AND NEW.patient_id <=> OLD.patient_id) THEN
+            CALL refresh_physician_patient(OLD.physician_id, OLD.patient_id);
+        END IF;
+    END IF;
+END $$
+
+DROP TRIGGER IF EXISTS physician_patient_after_delete$$
+CREATE TRIGGER physician_patient_after_delete
+AFTER DELETE ON Appointment FOR EACH ROW
+BEGIN
+    CALL refresh_physician_patient(OLD.physician_id, OLD.patient_id);
+END $$
+
+-- ActivityLogDaily (migration v004) rolls activity logs up per patient and day.
+-- Inserts add to the day's row; updates and deletes recompute the affected days
+-- from idx_activitylog_patient_date.
+DROP PROCEDURE IF EXISTS refresh_activity_log_daily$$
+CREATE PROCEDURE refresh_activity_log_daily (IN p_patient_id INT, IN p_log_date DATE)
+BEGIN
+    DELETE FROM ActivityLogDaily WHERE patient_id = p_patient_id AND log_date = p_log_date;
+    INSERT INTO ActivityLogDaily
+    SELECT patient_id, log_date, COUNT(*),
+           COUNT(weight), COALESCE(SUM(weight), 0), MIN(weight), MAX(weight),
+           COUNT(calories), COALESCE(SUM(calories), 0), MIN(calories), MAX(calories),
+           COUNT(duration_of_physical_activity), COALESCE(SUM(duration_of_physical_activity), 0),
+           MIN(duration_of_physical_activity), MAX(duration_of_physical_activity),
+           COUNT(systolic), COALESCE(SUM(systolic), 0), MIN(systolic), MAX(systolic),
+           COUNT(diastolic), COALESCE(SUM(diastolic), 0), MIN(diastolic), MAX(diastolic)
+    FROM (
+        SELECT patient_id, log_date, weight, calories, duration_of_physical_activity,
+               -- Rows not yet reached by `manage.py backfill-bp` only have the bp string
+               COALESCE(bp_systolic, IF(bp REGEXP '^[0-9]+/[0-9]+$', CAST(SUBSTRING_INDEX(bp, '/', 1) AS UNSIGNED), NULL)) AS systolic,
+               COALESCE(bp_diastolic, IF(bp REGEXP '^[0-9]+/[0-9]+$', CAST(SUBSTRING_INDEX(bp, '/', -1) AS UNSIGNED), NULL)) AS diastolic
+        FROM ActivityLog
+        WHERE patient_id = p_patient_id AND log_date = p_log_date
+    ) logs
+    GROUP BY patient_id, log_date;
+END $$
+
+DROP TRIGGER IF EXISTS activity_log_daily_after_insert$$
+CREATE TRIGGER activity_log_daily_after_insert
+AFTER INSERT ON ActivityLog FOR EACH ROW
+BEGIN
+    -- trg_validate_activity_data has filled bp_systolic / bp_diastolic from bp
+    DECLARE v_systolic INT DEFAULT NEW.bp_systolic;
+    DECLARE v_diastolic INT DEFAULT NEW.bp_diastolic;
+    INSERT INTO ActivityLogDaily (
+        patient_id, log_date, log_count,
+        weight_count, weight_sum, weight_min, weight_max,
+        calories_count, calories_sum, calories_min, calories_max,
+        duration_count, duration_sum, duration_min, duration_max,
+        systolic_count, systolic_sum, systolic_min, systolic_max,
+        diastolic_count, diastolic_sum, diastolic_min, diastolic_max
+    ) VALUES (
+        NEW.patient_id, NEW.log_date, 1,
+        NEW.weight IS NOT NULL, COALESCE(NEW.weight, 0), NEW.weight, NEW.weight,
+        NEW.calories IS NOT NULL, COALESCE(NEW.calories, 0), NEW.calories, NEW.calories,
+        NEW.duration_of_physical_activity IS NOT NULL, COALESCE(NEW.duration_of_physical_activity, 0), NEW.duration_of_physical_activity, NEW.duration_of_physical_activity,
+        v_systolic IS NOT NULL, COALESCE(v_systolic, 0), v_systolic, v_systolic,
+        v_diastolic IS NOT NULL, COALESCE(v_diastolic, 0), v_diastolic, v_diastolic
+    )
+    ON DUPLICATE KEY UPDATE
+        log_count = log_count + 1,
+        weight_count = weight_count + VALUES(weight_count), weight_sum = weight_sum + VALUES(weight_sum),
+        weight_min = LEAST(COALESCE(weight_min, VALUES(weight_min)), COALESCE(VALUES(weight_min), weight_min)),
+        weight_max = GREATEST(COALESCE(weight_max, VALUES(weight_max)), COALESCE(VALUES(weight_max), weight_max)),
+        calories_count = calories_count + VALUES(calories_count), calories_sum = calories_sum + VALUES(calories_sum),
+        calories_min = LEAST(COALESCE(calories_min, VALUES(calories_min)), COALESCE(VALUES(calories_min), calories_min)),
+        calories_max = GREATEST(COALESCE(calories_max, VALUES(calories_max)), COALESCE(VALUES(calories_max), calories_max)),
+        duration_count = duration_count + VALUES(duration_count), duration_sum = duration_sum + VALUES(duration_sum),
+        duration_min = LEAST(COALESCE(duration_min, VALUES(duration_min)), COALESCE(VALUES(duration_min), duration_min)),
+        duration_max = GREATEST(COALESCE(duration_max, VALUES(duration_max)), COALESCE(VALUES(duration_max), duration_max)),
+        systolic_count = systolic_count + VALUES(systolic_count), systolic_sum = systolic_sum + VALUES(systolic_sum),
+        systolic_min = LEAST(COALESCE(systolic_min, VALUES(systolic_min)), COALESCE(VALUES(systolic_min), systolic_min)),
+        systolic_max = GREATEST(COALESCE(systolic_max, VALUES(systolic_max)), COALESCE(VALUES(systolic_max), systolic_max)),
+        diastolic_count = diastolic_count + VALUES(diastolic_count), diastolic_sum = diastolic_sum + VALUES(diastolic_sum),
+        diastolic_min = LEAST(COALESCE(diastolic_min, VALUES(diastolic_min)), COALESCE(VALUES(diastolic_min), diastolic_min)),
+        diastolic_max = GREATEST(COALESCE(diastolic_max, VALUES(diastolic_max)), COALESCE(VALUES(diastolic_max), diastolic_max));
+END $$
+
+DROP TRIGGER IF EXISTS activity_log_daily_after_update$$
+CREATE TRIGGER activity_log_daily_after_update
+AFTER UPDATE ON ActivityLog FOR EACH ROW
+BEGIN
+    -- bp and bp_systolic/bp_diastolic move together (trg_sync_activity_bp), so comparing bp covers
+    -- both; the BP backfill only fills the numeric columns and leaves the rollups alone.
+    IF NOT (NEW.patient_id <=> OLD.patient_id AND NEW.log_date <=> OLD.log_date AND NEW.weight <=> OLD.weight
+            AND NEW.calories <=> OLD.calories AND NEW.bp <=> OLD.bp
+            AND NEW.duration_of_physical_activity <=> OLD.duration_of_physical_activity) THEN
+        CALL refresh_activity_log_daily(NEW.patient_id, NEW.log_date);
+        IF NOT (NEW.patient_id <=> OLD.patient_id AND NEW.log_date <=> OLD.log_date) THEN
+            CALL refresh_activity_log_daily(OLD.patient_id, OLD.log_date);
+        END IF;
+    END IF;
+END $$
+
+DROP TRIGGER IF EXISTS activity_log_daily_after_delete$$
+CREATE TRIGGER activity_log_daily_after_delete
+AFTER DELETE ON ActivityLog FOR EACH ROW
+BEGIN
+    CALL refresh_activity_log_daily(OLD.patient_id, OLD.log_date);
+END $$
+
 DROP TRIGGER IF EXISTS before_activity_log_delete$$
 CREATE TRIGGER before_activity_log_delete
 BEFORE DELETE ON ActivityLog
@@ -45,6 +177,17 @@ CREATE TRIGGER trg_validate_activity_data
 BEFORE INSERT ON ActivityLog
 FOR EACH ROW
 BEGIN
+    -- Fill whichever blood pressure representation the writer left out (migration v005)
+    IF NEW.bp_systolic IS NULL AND NEW.bp REGEXP '^[0-9]+/[0-9]+$' THEN
+        SET NEW.bp_systolic = CAST(SUBSTRING_INDEX(NEW.bp, '/', 1) AS UNSIGNED);
+        SET NEW.bp_diastolic = CAST(SUBSTRING_INDEX(NEW.bp, '/', -1) AS UNSIGNED);
+    ELSEIF NEW.bp IS NULL AND NEW.bp_systolic IS NOT NULL AND NEW.bp_diastolic IS NOT NULL THEN
+        SET NEW.bp = CONCAT(NEW.bp_systolic, '/', NEW.bp_diastolic);
+    END IF;
+    IF NEW.bp_systolic = 0 OR NEW.bp_diastolic = 0 THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Blood pressure values must be positive.';
+    END IF;
     IF NEW.weight <= 0 THEN
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Weight must be positive.';
@@ -55,6 +198,22 @@ BEGIN
     END IF;
 END $$
 
+DROP TRIGGER IF EXISTS trg_sync_activity_bp$$
+CREATE TRIGGER trg_sync_activity_bp
+BEFORE UPDATE ON ActivityLog
+FOR EACH ROW
+BEGIN
+    IF NEW.bp_systolic <=> OLD.bp_systolic AND NEW.bp_diastolic <=> OLD.bp_diastolic THEN
+        -- Only the string changed (legacy writer): re-parse it
+        IF NOT (NEW.bp <=> OLD.bp) THEN
+            SET NEW.bp_systolic = IF(NEW.bp REGEXP '^[0-9]+/[0-9]+$', CAST(SUBSTRING_INDEX(NEW.bp, '/', 1) AS UNSIGNED), NULL);
+            SET NEW.bp_diastolic = IF(NEW.bp REGEXP '^[0-9]+/[0-9]+$', CAST(SUBSTRING_INDEX(NEW.bp, '/', -1) AS UNSIGNED), NULL);
+        END IF;
+    ELSEIF NEW.bp_systolic IS NOT NULL AND NEW.bp_diastolic IS NOT NULL THEN
+        SET NEW.bp = CONCAT(NEW.bp_systolic, '/', NEW.bp_diastolic);
+    END IF;
+END $$
+
 -- ==============================
 -- Stored Procedures
 -- ==============================
@@ -73,4 +232,4 @@ BEGIN
         INSERT INTO Account (user_name, password, role, first_name, last_name, email, phone)
         VALUES (un, pw, r, f_name, l_name, em, ph);
     END IF;
-END $$
\ No newline at end of file
+END $$
@@ -0,0 +1,35 @@
+-- ================================================================
+-- v001: composite secondary indexes for the blueprint access paths
+-- ================================================================
+-- Every WHERE / ORDER BY in routes/patient_routes.py and
+-- routes/physician_routes.py is served by one of these indexes (InnoDB
+-- secondary indexes carry the primary key, so "ORDER BY date, id" style
+-- keyset scans are covered as well). The implicit single-column FK
+-- indexes on Appointment / HealthRecord / ActivityLog become redundant and
+-- are dropped by MySQL automatically once a composite index with the same
+-- leading column exists.
+
+-- Login / signup: WHERE user_name = ? AND role = ?
+CREATE INDEX idx_account_user_role ON Account (user_name, role);
+
+-- book_appointment + prevent_double_booking trigger:
+--   WHERE physician_id = ? AND date = ? AND status <> 'Cancelled'
+-- physician appointments / next pending appointment:
+--   WHERE physician_id = ? [AND status = 'Pending' AND date >= NOW()] ORDER BY date
+CREATE INDEX idx_appointment_physician_date_status ON Appointment (physician_id, date, status);
+
+-- Patient dashboard / get_appointments: WHERE patient_id = ? ORDER BY date DESC
+CREATE INDEX idx_appointment_patient_date ON Appointment (patient_id, date);
+
+-- Physician get_patients and physician->patient authorization checks:
+--   WHERE physician_id = ? [AND patient_id = ?], MAX(date) per patient
+CREATE INDEX idx_appointment_physician_patient_date ON Appointment (physician_id, patient_id, date);
+
+-- Activity log listings: WHERE patient_id = ? ORDER BY log_date DESC
+CREATE INDEX idx_activitylog_patient_date ON ActivityLog (patient_id, log_date);
+
+-- Patient health records / physician visits: WHERE patient_id = ? ORDER BY visit_date DESC
+CREATE INDEX idx_healthrecord_patient_date ON HealthRecord (patient_id, visit_date);
+
+-- Physician dashboard prescriptions: WHERE physician_id = ? ORDER BY visit_date DESC
+CREATE INDEX idx_healthrecord_physician_date ON HealthRecord (physician_id, visit_date);
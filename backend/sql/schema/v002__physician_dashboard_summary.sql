@@ -0,0 +1,23 @@
+-- ================================================================
+-- v002: per-physician dashboard projection
+-- ================================================================
+-- One row per physician with the three dashboard sections pre-serialized as
+-- JSON, so GET /api/physician/dashboard-summary is a primary-key read.
+-- Rows are written by utils/physician_summary.py: built on the first
+-- dashboard read and patched in the same transaction as activity log,
+-- health record and appointment writes. The *_date / *_at / *_id columns
+-- let those patches decide with one UPDATE whether a new row is newer.
+-- Deleting rows is always safe: they are rebuilt on the next read.
+
+CREATE TABLE IF NOT EXISTS PhysicianDashboardSummary (
+    physician_id INT PRIMARY KEY,
+    activity_log JSON NULL,
+    activity_log_date DATE NULL,
+    activity_log_id INT NULL,
+    prescriptions JSON NULL,
+    next_appointment JSON NULL,
+    next_appointment_at DATETIME NULL,
+    next_appointment_id INT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    CONSTRAINT dashboard_summary_physician_fk FOREIGN KEY (physician_id) REFERENCES Physician(account_id) ON DELETE CASCADE
+);
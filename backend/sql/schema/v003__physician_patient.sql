@@ -0,0 +1,31 @@
+-- ================================================================
+-- v003: physician-patient relationships
+-- ================================================================
+-- One row per (physician, patient) pair that has at least one appointment,
+-- so the physician's patient list scales with the size of the panel instead
+-- of the number of appointments. last_visit is the latest appointment date
+-- (any status, like the former MAX(date) subquery), and visit_count counts
+-- the appointments that are not cancelled.
+--
+-- Kept up to date by the Appointment triggers in procedures_triggers.sql
+-- (physician_patient_after_insert / _after_update / _after_delete). Apply
+-- that file after this migration. The INSERT below backfills existing
+-- appointments and is safe to re-run.
+
+CREATE TABLE IF NOT EXISTS PhysicianPatient (
+    physician_id INT NOT NULL,
+    patient_id INT NOT NULL,
+    last_visit DATETIME NOT NULL,
+    visit_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (physician_id, patient_id),
+    -- GET /api/physician/patients: WHERE physician_id = ? ORDER BY last_visit DESC, patient_id DESC (keyset)
+    INDEX idx_physician_patient_recent (physician_id, last_visit, patient_id),
+    CONSTRAINT physician_patient_physician_fk FOREIGN KEY (physician_id) REFERENCES Physician(account_id) ON DELETE CASCADE,
+    CONSTRAINT physician_patient_patient_fk FOREIGN KEY (patient_id) REFERENCES Patient(account_id) ON DELETE CASCADE
+);
+
+INSERT INTO PhysicianPatient (physician_id, patient_id, last_visit, visit_count)
+SELECT physician_id, patient_id, MAX(date), SUM(status <> 'Cancelled')
+FROM Appointment
+GROUP BY physician_id, patient_id
+ON DUPLICATE KEY UPDATE last_visit = VALUES(last_visit), visit_count = VALUES(visit_count);
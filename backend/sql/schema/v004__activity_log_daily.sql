@@ -0,0 +1,69 @@
+-- ================================================================
+-- v004: daily activity log rollups
+-- ================================================================
+-- One row per patient and day with count / sum / min / max of every
+-- activity metric, so trend charts read O(days) rollup rows instead of every
+-- raw log (GET .../activitylog/trends, utils/activity_trends.py). Weekly and
+-- monthly buckets are summed from the daily rows. The *_count columns count
+-- non-NULL values, and systolic/diastolic are parsed from the "120/80" bp string.
+--
+-- Kept up to date by the ActivityLog triggers in procedures_triggers.sql
+-- (activity_log_daily_after_insert / _after_update / _after_delete). Apply
+-- that file after this migration. The INSERT below backfills existing logs
+-- and is safe to re-run.
+
+CREATE TABLE IF NOT EXISTS ActivityLogDaily (
+    patient_id INT NOT NULL,
+    log_date DATE NOT NULL,
+    log_count INT NOT NULL DEFAULT 0,
+    weight_count INT NOT NULL DEFAULT 0,
+    weight_sum DECIMAL(12,2) NOT NULL DEFAULT 0,
+    weight_min DECIMAL(5,2) NULL,
+    weight_max DECIMAL(5,2) NULL,
+    calories_count INT NOT NULL DEFAULT 0,
+    calories_sum BIGINT NOT NULL DEFAULT 0,
+    calories_min INT NULL,
+    calories_max INT NULL,
+    duration_count INT NOT NULL DEFAULT 0,
+    duration_sum BIGINT NOT NULL DEFAULT 0,
+    duration_min INT NULL,
+    duration_max INT NULL,
+    systolic_count INT NOT NULL DEFAULT 0,
+    systolic_sum BIGINT NOT NULL DEFAULT 0,
+    systolic_min INT NULL,
+    systolic_max INT NULL,
+    diastolic_count INT NOT NULL DEFAULT 0,
+    diastolic_sum BIGINT NOT NULL DEFAULT 0,
+    diastolic_min INT NULL,
+    diastolic_max INT NULL,
+    PRIMARY KEY (patient_id, log_date),
+    CONSTRAINT activity_log_daily_patient_fk FOREIGN KEY (patient_id) REFERENCES Patient(account_id) ON DELETE CASCADE
+);
+
+INSERT INTO ActivityLogDaily
+SELECT patient_id, log_date, COUNT(*),
+       COUNT(weight), COALESCE(SUM(weight), 0), MIN(weight), MAX(weight),
+       COUNT(calories), COALESCE(SUM(calories), 0), MIN(calories), MAX(calories),
+       COUNT(duration_of_physical_activity), COALESCE(SUM(duration_of_physical_activity), 0),
+       MIN(duration_of_physical_activity), MAX(duration_of_physical_activity),
+       COUNT(systolic), COALESCE(SUM(systolic), 0), MIN(systolic), MAX(systolic),
+       COUNT(diastolic), COALESCE(SUM(diastolic), 0), MIN(diastolic), MAX(diastolic)
+FROM (
+    SELECT patient_id, log_date, weight, calories, duration_of_physical_activity,
+           IF(bp REGEXP '^[0-9]+/[0-9]+$', CAST(SUBSTRING_INDEX(bp, '/', 1) AS UNSIGNED), NULL) AS systolic,
+           IF(bp REGEXP '^[0-9]+/[0-9]+$', CAST(SUBSTRING_INDEX(bp, '/', -1) AS UNSIGNED), NULL) AS diastolic
+    FROM ActivityLog
+) logs
+GROUP BY patient_id, log_date
+ON DUPLICATE KEY UPDATE
+    log_count = VALUES(log_count),
+    weight_count = VALUES(weight_count), weight_sum = VALUES(weight_sum),
+    weight_min = VALUES(weight_min), weight_max = VALUES(weight_max),
+    calories_count = VALUES(calories_count), calories_sum = VALUES(calories_sum),
+    calories_min = VALUES(calories_min), calories_max = VALUES(calories_max),
+    duration_count = VALUES(duration_count), duration_sum = VALUES(duration_sum),
+    duration_min = VALUES(duration_min), duration_max = VALUES(duration_max),
+    systolic_count = VALUES(systolic_count), systolic_sum = VALUES(systolic_sum),
+    systolic_min = VALUES(systolic_min), systolic_max = VALUES(systolic_max),
+    diastolic_count = VALUES(diastolic_count), diastolic_sum = VALUES(diastolic_sum),
+    diastolic_min = VALUES(diastolic_min), diastolic_max = VALUES(diastolic_max);
@@ -0,0 +1,20 @@
+-- ================================================================
+-- v005: blood pressure as numeric columns
+-- ================================================================
+-- ActivityLog.bp stays as the legacy "systolic/diastolic" string in API
+-- responses, and bp_systolic / bp_diastolic hold the parsed numbers so BP range
+-- filters and rollups run inside MySQL. The two representations are kept in
+-- step by trg_validate_activity_data (insert) and trg_sync_activity_bp
+-- (update) in procedures_triggers.sql.
+--
+-- Existing rows are parsed afterwards in small batches, without holding long
+-- locks on the table:
+--
+--     python backend/manage.py backfill-bp [--batch-size 5000]
+
+ALTER TABLE ActivityLog
+    ADD COLUMN bp_systolic SMALLINT UNSIGNED NULL AFTER bp,
+    ADD COLUMN bp_diastolic SMALLINT UNSIGNED NULL AFTER bp_systolic;
+
+-- BP range filters within a patient's date range: WHERE patient_id = ? AND log_date BETWEEN ? AND ? AND bp_systolic >= ?
+CREATE INDEX idx_activitylog_patient_date_bp ON ActivityLog (patient_id, log_date, bp_systolic, bp_diastolic);
@@ -0,0 +1,31 @@
+-- ================================================================
+-- v006: one active appointment per physician and slot, enforced by MySQL
+-- ================================================================
+-- active_slot numbers the 30-minute slot an appointment falls into and is
+-- NULL for cancelled appointments (NULLs never collide in a UNIQUE index).
+-- book_appointment is then a single INSERT that either reserves the slot or
+-- fails with a duplicate-key error (utils/booking.py), with no
+-- check-then-insert race and no per-insert EXISTS scan. This replaces the
+-- prevent_double_booking trigger.
+--
+-- Behaviour change: the trigger only refused an identical date, whereas two
+-- active appointments of a physician in the same 30-minute slot (10:00 and
+-- 10:15) now conflict too. The slot length is fixed by the DIV 30 below and
+-- by booking.SLOT_MINUTES, and changing it takes a new migration.
+--
+-- Each statement is recorded by manage.py migrate as it succeeds. If the
+-- unique index fails because existing active appointments of one physician
+-- already share a slot, the column is in place, so list the clashes with
+--   SELECT physician_id, active_slot, COUNT(*) FROM Appointment
+--   WHERE active_slot IS NOT NULL GROUP BY physician_id, active_slot HAVING COUNT(*) > 1
+-- then cancel or move the extras and run manage.py migrate again. It resumes
+-- at the index and does not add the column twice.
+
+DROP TRIGGER IF EXISTS prevent_double_booking;
+
+ALTER TABLE Appointment
+    ADD COLUMN active_slot INT GENERATED ALWAYS AS (
+        IF(status = 'Cancelled', NULL, TIMESTAMPDIFF(MINUTE, '2000-01-01 00:00:00', date) DIV 30)
+    ) STORED;
+
+CREATE UNIQUE INDEX uq_appointment_physician_active_slot ON Appointment (physician_id, active_slot);
@@ -0,0 +1,18 @@
+-- ================================================================
+-- v007: revoked bearer tokens, shared by every API worker
+-- ================================================================
+-- POST /api/logout stores the SHA-256 digest of the caller's token here.
+-- Each worker keeps a copy of the table (utils/auth_utils.py RevocationList)
+-- and reads only the rows added since its last refresh, by revocation_id,
+-- at most once per TOKEN_REVOCATION_TTL seconds. expires_at is the token's
+-- exp claim (Unix time): older rows can no longer verify and are deleted.
+
+CREATE TABLE IF NOT EXISTS RevokedToken (
+    revocation_id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    digest BINARY(32) NOT NULL,
+    account_id INT NULL,
+    expires_at BIGINT NULL,
+    revoked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_revoked_token_digest (digest),
+    INDEX idx_revoked_token_expires (expires_at)
+);
@@ -0,0 +1,113 @@
+import pytest
+from pymysql.constants import SERVER_STATUS
+
+from utils.db_pool import ConnectionPool
+
+
+class FakeCursor:
+    """Cursor double returning the rows queued on its connection."""
+
+    def __init__(self, conn, cursorclass=None):
+        self.conn = conn
+        self.cursorclass = cursorclass
+        self._rows = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, query, args=None):
+        if "FROM RevokedToken" in query and query.lstrip().startswith("SELECT"):
+            # Revocation-list refreshes read the shared table, not the handler's queued results.
+            self._rows = [r for r in self.conn.revoked if r["revocation_id"] > args[0]]
+            return len(self._rows)
+        self.conn.executed.append((query, args))
+        if "INSERT INTO RevokedToken" in query:
+            self.conn.revoked.append({"revocation_id": len(self.conn.revoked) + 1, "digest": args[0],
+                                      "expires_at": args[2]})
+        self._rows = list(self.conn.results.pop(0)) if self.conn.results else []
+        self.rowcount = len(self._rows)
+        return self.rowcount
+
+    def executemany(self, query, args):
+        self.conn.executed.append((query, list(args)))
+        self.rowcount = len(self.conn.executed[-1][1])
+        return self.rowcount
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Just enough of a pymysql connection for the pool bookkeeping."""
+
+    def __init__(self):
+        self.open = True
+        self.server_status = 0
+        self.autocommit_value = False
+        self.rollbacks = 0
+        self.commits = 0
+        self.pings = 0
+        self.alive = True
+        self.results = []    # queued result sets, one per execute()
+        self.executed = []
+        self.revoked = []    # rows of the shared RevokedToken table
+
+    def get_autocommit(self):
+        return self.autocommit_value
+
+    def autocommit(self, value):
+        self.autocommit_value = value
+
+    def cursor(self, cursorclass=None):
+        return FakeCursor(self, cursorclass)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.server_status &= ~SERVER_STATUS.SERVER_STATUS_IN_TRANS
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.alive:
+            raise OSError("gone")
+
+    def close(self):
+        self.open = False
+
+
+@pytest.fixture
+def created():
+    return []
+
+
+@pytest.fixture
+def make_pool(created):
+    def factory(**kwargs):
+        def connect():
+            conn = FakeConnection()
+            created.append(conn)
+            return conn
+        return ConnectionPool(connect, **kwargs)
+    return factory
+
+
+@pytest.fixture
+def fake_db():
+    """Install a single-connection fake pool on an app; returns the FakeConnection."""
+    def install(app):
+        conn = FakeConnection()
+        app.extensions['db_pool'] = ConnectionPool(lambda: conn, max_size=1, timeout=0.05)
+        return conn
+    return install
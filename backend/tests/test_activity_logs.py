@@ -0,0 +1,98 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+
+from app import create_app
+from utils.activity_logs import validate_log
+from utils.auth_utils import generate_token
+
+LOG = {"date": "2024-03-01", "weight": 70.5, "bp_systolic": 120, "bp_diastolic": 80, "calories": 300, "duration": 30}
+
+
+def _post(app, path, **kwargs):
+    with app.app_context():
+        token = generate_token(2, "patient")
+    return app.test_client().post(path, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+
+
+def test_validate_log_mirrors_the_trigger_rules():
+    assert validate_log(LOG) == (datetime.date(2024, 3, 1), Decimal("70.5"), "120/80", 120, 80, 300, 30)
+    for change, message in (({"weight": 0}, "Weight must be positive."),
+                            ({"weight": "abc"}, "weight must be a number"),
+                            ({"bp_systolic": "120/80"}, "bp_systolic must be an integer"),
+                            ({"date": "01/03/2024"}, "date must be YYYY-MM-DD"),
+                            ({"calories": -1}, "calories must be at least 0"),
+                            ({"bp_diastolic": 0}, "bp_diastolic must be at least 1"),
+                            ({"bp_systolic": 70000}, "bp_systolic must be at most 65535")):
+        with pytest.raises(ValueError, match=message):
+            validate_log(dict(LOG, **change))
+    with pytest.raises(ValueError, match="Missing fields: duration"):
+        validate_log({k: v for k, v in LOG.items() if k != "duration"})
+
+
+def test_bulk_array_inserts_valid_logs_in_batches(fake_db):
+    app = create_app()
+    app.config['ACTIVITY_BULK_BATCH_SIZE'] = 2
+    conn = fake_db(app)
+    body = [LOG, dict(LOG, weight=-1), dict(LOG, date="2024-03-02"), dict(LOG, date="2024-03-03")]
+
+    response = _post(app, '/api/patient/activitylog/bulk', json=body)
+    assert response.status_code == 201
+    payload = response.get_json()
+    assert (payload["created"], payload["invalid"], payload["success"]) == (3, 1, False)
+    assert payload["results"][1] == {"index": 1, "status": "invalid", "error": "Weight must be positive."}
+
+    inserts = [(sql, rows) for sql, rows in conn.executed if "INSERT INTO ActivityLog" in sql]
+    assert [len(rows) for _, rows in inserts] == [2, 1]
+    assert inserts[1][1][0][:3] == (2, datetime.date(2024, 3, 3), Decimal("70.5"))
+    assert conn.commits == 1
+
+
+def test_bulk_ndjson_reports_bad_lines_and_limits(fake_db):
+    app = create_app()
+    app.config['ACTIVITY_BULK_MAX_ITEMS'] = 3
+    conn = fake_db(app)
+    lines = "\n".join([json.dumps(LOG), "{not json", "", json.dumps(dict(LOG, date="2024-03-02"))])
+
+    response = _post(app, '/api/patient/activitylog/bulk', data=lines, content_type="application/x-ndjson")
+    assert response.status_code == 201
+    assert [r["status"] for r in response.get_json()["results"]] == ["created", "invalid", "created"]
+
+    too_many = "\n".join(json.dumps(LOG) for _ in range(4))
+    response = _post(app, '/api/patient/activitylog/bulk', data=too_many, content_type="application/x-ndjson")
+    assert response.status_code == 400
+    assert conn.rollbacks >= 1
+
+    assert _post(app, '/api/patient/activitylog/bulk', json={"logs": []}).status_code == 400
+
+
+def test_bulk_rejects_an_empty_payload(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    for kwargs in ({"json": []}, {"data": "\n\n", "content_type": "application/x-ndjson"}):
+        response = _post(app, '/api/patient/activitylog/bulk', **kwargs)
+        assert response.status_code == 400
+        assert response.get_json() == {"success": False, "message": "No activity logs in the request body"}
+    assert conn.executed == []
+
+
+def test_update_writes_numeric_bp_with_the_legacy_string(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[{"log_id": 4}]]
+    with app.app_context():
+        token = generate_token(2, "patient")
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.put('/api/patient/activitylog/4/edit', headers=headers, json={"bp_systolic": 130, "bp_diastolic": 85})
+    assert response.status_code == 200
+    sql, args = conn.executed[1]
+    assert "bp = %s, bp_systolic = %s, bp_diastolic = %s" in sql
+    assert args == ["130/85", 130, 85, 4]
+
+    conn.results = [[{"log_id": 4}]]
+    response = client.put('/api/patient/activitylog/4/edit', headers=headers, json={"bp_systolic": "x", "bp_diastolic": 85})
+    assert response.status_code == 400
@@ -0,0 +1,55 @@
+import datetime
+from decimal import Decimal
+
+from app import create_app
+from utils.auth_utils import generate_token
+
+
+def _rollup(bucket, logs, weights):
+    row = {"bucket": bucket, "log_count": Decimal(logs)}
+    for column in ("weight", "calories", "duration", "systolic", "diastolic"):
+        row.update({f"{column}_count": Decimal(0), f"{column}_sum": None, f"{column}_min": None, f"{column}_max": None})
+    row.update(weight_count=Decimal(len(weights)), weight_sum=Decimal(sum(weights)),
+               weight_min=Decimal(min(weights)), weight_max=Decimal(max(weights)))
+    return row
+
+
+def _get(app, path, role="patient", account_id=2):
+    with app.app_context():
+        token = generate_token(account_id, role)
+    return app.test_client().get(path, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_weekly_trends_read_the_rollups(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[_rollup(datetime.date(2024, 3, 4), 3, [70, 71, 72]), _rollup("2024-03-11", 1, [69])]]
+
+    response = _get(app, '/api/patient/activitylog/trends?granularity=week&from=2024-03-01&to=2024-03-31')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["from"], body["to"], body["granularity"]) == ("2024-03-01", "2024-03-31", "week")
+    first, second = body["buckets"]
+    assert first["start"] == "2024-03-04" and first["logs"] == 3
+    assert first["weight"] == {"count": 3, "min": 70.0, "max": 72.0, "mean": 71.0}
+    assert first["bp_systolic"] == {"count": 0, "min": None, "max": None, "mean": None}
+    assert second["start"] == "2024-03-11"
+
+    (sql, args), = conn.executed
+    assert "FROM ActivityLogDaily d" in sql and "WEEKDAY(d.log_date)" in sql
+    assert args == (2, datetime.date(2024, 3, 1), datetime.date(2024, 3, 31))
+
+
+def test_trend_parameters_are_validated(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    for query in ("granularity=hour", "from=2024-03-10&to=2024-03-01", "from=yesterday", "from=2000-01-01&to=2024-01-01"):
+        assert _get(app, f'/api/patient/activitylog/trends?{query}').status_code == 400
+    assert conn.executed == []
+
+
+def test_physician_trends_require_access(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[{"patient_id": 3}]]
+    assert _get(app, '/api/physician/patient/2/activitylog/trends', "physician", 1).status_code == 403
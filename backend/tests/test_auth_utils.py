@@ -0,0 +1,113 @@
+import datetime
+import hashlib
+
+import jwt
+import pytest
+
+from app import create_app
+from utils.auth_utils import TokenCache, generate_token, get_revocation_list, get_token_cache, verify_token
+from utils.db_pool import ConnectionPool
+from utils.passwords import hash_password, verify_password
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        yield app
+
+
+def test_repeat_verification_is_served_from_cache(app):
+    token = generate_token(7, "patient")
+    assert verify_token(token)["account_id"] == 7
+    assert verify_token(token)["account_id"] == 7
+    stats = get_token_cache().stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_invalid_tokens_are_rejected_and_never_cached(app):
+    assert verify_token("not-a-token") is None
+    forged = jwt.encode({"account_id": 1, "role": "patient"}, "other-secret", algorithm="HS256")
+    assert verify_token(forged) is None
+    assert verify_token(forged) is None
+    assert get_token_cache().stats()["size"] == 0
+
+
+def _logout(app, token):
+    return app.test_client().post('/api/logout', headers={"Authorization": f"Bearer {token}"})
+
+
+def test_revoked_tokens_are_rejected_after_being_cached(fake_db):
+    app = create_app()
+    fake_db(app)
+    with app.app_context():
+        token = generate_token(8, "physician")
+        assert verify_token(token) is not None
+        assert verify_token(token) is not None
+        assert get_token_cache().stats()["hits"] == 1
+
+    assert _logout(app, token).status_code == 200
+    with app.app_context():
+        assert verify_token(token) is None
+    assert _logout(app, token).status_code == 401
+
+
+def test_revocations_reach_the_other_workers(fake_db):
+    worker_a, worker_b = create_app(), create_app()
+    conn = fake_db(worker_a)
+    worker_b.extensions['db_pool'] = ConnectionPool(lambda: conn, max_size=1, timeout=0.05)
+    worker_b.config['TOKEN_REVOCATION_TTL'] = 0
+    with worker_b.app_context():
+        token = generate_token(8, "patient")
+        assert verify_token(token) is not None
+
+    assert _logout(worker_a, token).status_code == 200
+    assert any("INSERT INTO RevokedToken" in sql for sql, _ in conn.executed)
+    with worker_b.app_context():
+        assert verify_token(token) is None
+        assert get_revocation_list().stats()["size"] == 1
+
+
+def test_a_failed_logout_revokes_nothing(fake_db, monkeypatch):
+    app = create_app()
+    fake_db(app)
+    with app.app_context():
+        token = generate_token(8, "patient")
+
+    def refuse(cursor, token, payload):
+        raise RuntimeError("MySQL went away")
+    monkeypatch.setattr("app.routes.revoke_token", refuse)
+    assert _logout(app, token).status_code == 500
+    with app.app_context():
+        assert verify_token(token) is not None
+
+
+def test_cached_entries_expire_with_the_token():
+    cache = TokenCache(max_size=2)
+    now = datetime.datetime.utcnow().timestamp()
+    cache.put(b"a", {"exp": now + 10})
+    assert cache.get(b"a", now=now) is not None
+    assert cache.get(b"a", now=now + 11) is None
+
+    cache.put(b"a", {"exp": now + 10})
+    cache.put(b"b", {"exp": now + 10})
+    cache.put(b"c", {"exp": now + 10})
+    assert cache.get(b"a", now=now) is None
+    assert cache.stats()["size"] == 2
+
+
+@pytest.mark.parametrize("scheme,cost", [("scrypt", 10), ("pbkdf2_sha256", 1000)])
+def test_password_round_trip(scheme, cost):
+    stored = hash_password("s3cret", scheme=scheme, cost=cost)
+    assert len(stored) <= 100
+    assert verify_password("s3cret", stored, scheme=scheme, cost=cost) == (True, False)
+    assert verify_password("wrong", stored, scheme=scheme, cost=cost) == (False, False)
+    # A cost change flags the hash for an upgrade on the next login.
+    assert verify_password("s3cret", stored, scheme=scheme, cost=cost + 1) == (True, True)
+
+
+def test_legacy_sha256_hashes_verify_and_need_rehash():
+    legacy = hashlib.sha256(b"s3cret").hexdigest()
+    assert verify_password("s3cret", legacy, scheme="scrypt", cost=10) == (True, True)
+    assert verify_password("nope", legacy, scheme="scrypt", cost=10)[0] is False
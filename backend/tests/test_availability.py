@@ -0,0 +1,125 @@
+import datetime
+import time
+
+from app import create_app
+from utils import booking
+from utils.auth_utils import generate_token
+from utils.availability import Agenda, AvailabilityIndex, get_availability_index
+
+DAY = datetime.date(2099, 3, 4)
+
+
+def _at(hour, minute=0, day=DAY):
+    return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+
+def _get(app, path, account_id=7, role="patient"):
+    with app.app_context():
+        token = generate_token(account_id, role)
+    return app.test_client().get(path, headers={"Authorization": f"Bearer {token}"})
+
+
+def _agenda_rows(physician_id, *times):
+    return [{"account_id": physician_id, "active_slot": booking.slot_of(t, 30)} for t in times] \
+        or [{"account_id": physician_id, "active_slot": None}]
+
+
+def test_agenda_membership_is_a_bisection():
+    agenda = Agenda(0, 100, [3, 7, 42])
+    assert 7 in agenda and 42 in agenda
+    assert 8 not in agenda and 100 not in agenda
+    assert len(agenda) == 3
+
+
+def test_availability_lists_free_slots_from_one_query(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [_agenda_rows(3, _at(9), _at(9, 30), _at(16, 30))]
+
+    response = _get(app, f"/api/patient/physicians/3/availability?from={DAY}&to={DAY}")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["slot_minutes"] == 30 and body["from"] == body["to"] == DAY.isoformat()
+    assert body["slots"][0] == f"{DAY} 10:00:00" and body["slots"][-1] == f"{DAY} 16:00:00"
+    assert len(body["slots"]) == 16 - 3
+    assert len(conn.executed) == 1
+
+    # The next days of the window come from memory.
+    next_day = DAY + datetime.timedelta(days=1)
+    response = _get(app, f"/api/patient/physicians/3/availability?from={next_day}&to={next_day}")
+    assert len(response.get_json()["slots"]) == 16
+    assert len(conn.executed) == 1
+    assert get_availability_index(app).stats()["hits"] == 1
+
+
+def test_writes_invalidate_the_agenda(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    # Agenda, booking INSERT, dashboard summary lookup, reloaded agenda
+    conn.results = [_agenda_rows(3), [], [], _agenda_rows(3, _at(9))]
+
+    assert len(_get(app, f"/api/patient/physicians/3/availability?from={DAY}&to={DAY}").get_json()["slots"]) == 16
+    with app.app_context():
+        token = generate_token(7, "patient")
+    booked = app.test_client().post('/api/patient/appointment/book', headers={"Authorization": f"Bearer {token}"},
+                                    json={"physician_id": 3, "date": f"{DAY} 09:00:00", "reason": "Checkup"})
+    assert booked.status_code == 200
+    assert get_availability_index(app).stats()["size"] == 0
+
+    slots = _get(app, f"/api/patient/physicians/3/availability?from={DAY}&to={DAY}").get_json()["slots"]
+    assert f"{DAY} 09:00:00" not in slots and len(slots) == 15
+
+
+def test_unknown_physician_and_bad_ranges(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[]]
+    assert _get(app, f"/api/patient/physicians/999/availability?from={DAY}").status_code == 404
+    assert get_availability_index(app).stats()["size"] == 0
+
+    assert _get(app, "/api/patient/physicians/3/availability?from=soon").status_code == 400
+    assert _get(app, "/api/patient/physicians/3/availability?from=2099-03-05&to=2099-03-04").status_code == 400
+    assert _get(app, "/api/patient/physicians/3/availability?from=2099-01-01&to=2099-12-31").status_code == 400
+    assert _get(app, "/api/patient/physicians/3/availability", role="physician").status_code == 403
+
+
+def test_index_reloads_outside_its_window_and_after_ttl(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    cursor = conn.cursor()
+    index = AvailabilityIndex(ttl=60, window_days=7)
+    conn.results = [_agenda_rows(3), _agenda_rows(3)]
+
+    def day(offset):
+        return _at(9, day=DAY + datetime.timedelta(days=offset)), _at(17, day=DAY + datetime.timedelta(days=offset))
+
+    index.agenda(cursor, 3, *day(0), 30)
+    index.agenda(cursor, 3, *day(6), 30)
+    assert len(conn.executed) == 1
+    index.agenda(cursor, 3, *day(8), 30)
+    assert len(conn.executed) == 2
+
+    index.ttl = 0
+    conn.results = [_agenda_rows(3), _agenda_rows(3)]
+    index.invalidate()
+    index.agenda(cursor, 3, _at(9), _at(17), 30)
+    index.agenda(cursor, 3, _at(9), _at(17), 30)
+    assert len(conn.executed) == 4
+
+
+def test_free_slot_search_is_fast_on_a_busy_agenda(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    # Every other slot of four weeks is booked.
+    first = booking.slot_of(_at(0), 30)
+    conn.results = [[{"account_id": 3, "active_slot": slot} for slot in range(first, first + 48 * 28, 2)]]
+    index = AvailabilityIndex()
+    agenda = index.agenda(conn.cursor(), 3, _at(0), _at(0) + datetime.timedelta(days=28), 30)
+
+    started = time.perf_counter()
+    for _ in range(100):
+        free = list(booking.free_slots(agenda, _at(0), _at(0) + datetime.timedelta(days=7), 30,
+                                       (datetime.time(9), datetime.time(17))))
+    per_search = (time.perf_counter() - started) / 100
+    assert len(free) == 7 * 8
+    assert per_search < 0.001
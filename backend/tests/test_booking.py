@@ -0,0 +1,168 @@
+import datetime
+import os
+import threading
+
+import pymysql
+import pytest
+
+from app import create_app
+from utils import booking
+from utils.auth_utils import generate_token
+
+HOURS = (datetime.time(9, 0), datetime.time(17, 0))
+
+
+def _book(app, account_id, **payload):
+    with app.app_context():
+        token = generate_token(account_id, "patient")
+    return app.test_client().post('/api/patient/appointment/book', json=payload,
+                                  headers={"Authorization": f"Bearer {token}"})
+
+
+def _refuse_inserts(conn, code):
+    """Make the fake connection's cursors fail INSERTs into Appointment like MySQL would."""
+    cursor_factory = conn.cursor
+
+    def cursor(cursorclass=None):
+        cur = cursor_factory(cursorclass)
+        execute = cur.execute
+
+        def refusing_execute(query, args=None):
+            if "INSERT INTO Appointment" in query:
+                conn.executed.append((query, args))
+                raise pymysql.err.IntegrityError(code, "refused")
+            return execute(query, args)
+        cur.execute = refusing_execute
+        return cur
+    conn.cursor = cursor
+
+
+def test_slot_numbers_match_the_generated_column():
+    when = datetime.datetime(2025, 3, 4, 10, 45)
+    slot = booking.slot_of(when, 30)
+    assert slot == int((when - booking.SLOT_EPOCH).total_seconds() // 60) // 30
+    assert booking.slot_start(slot, 30) == datetime.datetime(2025, 3, 4, 10, 30)
+    assert booking.slot_of(datetime.datetime(2025, 3, 4, 10, 59, 59), 30) == slot
+
+
+def test_free_slots_skip_taken_slots_and_closed_hours():
+    start = datetime.datetime(2025, 3, 4, 16, 10)
+    taken = {booking.slot_of(datetime.datetime(2025, 3, 4, 16, 30), 30),
+             booking.slot_of(datetime.datetime(2025, 3, 5, 9, 0), 30)}
+    free = list(booking.free_slots(taken, start, datetime.datetime(2025, 3, 5, 10, 0), 30, HOURS))
+    assert free == [datetime.datetime(2025, 3, 5, 9, 30)]
+
+
+def test_parse_time_rejects_garbage_and_times_inside_a_slot():
+    assert booking.parse_time("2025-03-04T10:30:00Z") == datetime.datetime(2025, 3, 4, 10, 30)
+    for value in ("tomorrow", None, 20250304, "2025-03-04 10:20:00", "2025-03-04 10:30:01"):
+        with pytest.raises(ValueError):
+            booking.parse_time(value)
+
+
+def test_booking_is_a_single_insert(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+
+    response = _book(app, 7, physician_id=3, date="2099-03-04 10:30:00", reason="Checkup")
+    assert response.status_code == 200
+    assert "INSERT INTO Appointment" in conn.executed[0][0]
+    assert conn.executed[0][1] == (7, 3, datetime.datetime(2099, 3, 4, 10, 30), "Checkup", "")
+    assert not any("SELECT appointment_id FROM Appointment" in sql for sql, _ in conn.executed)
+
+
+def test_taken_slot_is_a_conflict_with_suggestions(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    _refuse_inserts(conn, 1062)
+    # Agenda read for the suggestions: 10:30 and 11:00 are booked too.
+    conn.results = [[{"account_id": 3, "active_slot": booking.slot_of(datetime.datetime(2099, 3, 4, h, m), 30)}
+                     for h, m in ((10, 30), (11, 0))]]
+
+    response = _book(app, 7, physician_id=3, date="2099-03-04 10:30:00", reason="Checkup")
+    assert response.status_code == 409
+    body = response.get_json()
+    assert body["error"] == "slot_unavailable"
+    assert body["slot"] == {"start": "2099-03-04 10:30:00", "minutes": 30}
+    assert body["suggestions"] == ["2099-03-04 11:30:00", "2099-03-04 12:00:00", "2099-03-04 12:30:00"]
+    assert conn.rollbacks >= 1 and conn.commits == 0
+
+
+def test_unknown_physician_and_bad_dates_are_client_errors(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    _refuse_inserts(conn, 1452)
+    assert _book(app, 7, physician_id=999, date="2099-03-04 10:30:00", reason="Checkup").status_code == 400
+    assert _book(app, 7, physician_id=3, date="soon", reason="Checkup").status_code == 400
+    assert _book(app, 7, physician_id=3, date="2099-03-04 10:20:00", reason="Checkup").status_code == 400
+
+
+@pytest.mark.skipif(
+    os.getenv('MEDIFLOW_DB_TESTS', '').lower() not in ('1', 'true', 'yes'),
+    reason="needs a seeded MySQL database (set MEDIFLOW_DB_TESTS=1)",
+)
+def test_concurrent_bookings_never_double_book():
+    """Many connections race for a handful of slots; each slot is won exactly once."""
+    app = create_app()
+    params = app.config['DB_PARAMS']
+    setup = pymysql.connect(cursorclass=pymysql.cursors.DictCursor, autocommit=True, **params)
+    with setup.cursor() as cur:
+        cur.execute("SELECT account_id FROM Physician LIMIT 1")
+        physician_id = cur.fetchone()["account_id"]
+        cur.execute("SELECT account_id FROM Patient LIMIT 1")
+        patient_id = cur.fetchone()["account_id"]
+
+    # Far in the future so the seeded agenda never interferes.
+    day = datetime.date(2099, 1, 5)
+    slots = [datetime.datetime.combine(day, datetime.time(10, 0)) + datetime.timedelta(minutes=30 * i)
+             for i in range(8)]
+    attempts = 16
+    barrier = threading.Barrier(len(slots) * attempts)
+    outcomes = []
+    lock = threading.Lock()
+
+    def attempt(when):
+        conn = pymysql.connect(cursorclass=pymysql.cursors.DictCursor, **params)
+        try:
+            with app.app_context(), conn.cursor() as cur:
+                barrier.wait()
+                try:
+                    booking.book(cur, patient_id, physician_id, when, "Concurrency test")
+                    conn.commit()
+                    result = "booked"
+                except booking.SlotUnavailableError:
+                    conn.rollback()
+                    result = "conflict"
+            with lock:
+                outcomes.append((booking.slot_of(when), result))
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=attempt, args=(when,)) for when in slots for _ in range(attempts)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        distinct = {slot for slot, _ in outcomes}
+        assert len(outcomes) == len(threads) and len(distinct) == len(slots)
+        assert sorted(slot for slot, result in outcomes if result == "booked") == sorted(distinct)
+        with setup.cursor() as cur:
+            cur.execute(
+                """
+                SELECT active_slot, COUNT(*) AS n FROM Appointment
+                WHERE physician_id = %s AND date >= %s AND date < %s AND status <> 'Cancelled'
+                GROUP BY active_slot
+                """,
+                (physician_id, day, day + datetime.timedelta(days=1)),
+            )
+            rows = cur.fetchall()
+        assert len(rows) == len(distinct) and all(row["n"] == 1 for row in rows)
+    finally:
+        with setup.cursor() as cur:
+            cur.execute(
+                "DELETE FROM Appointment WHERE physician_id = %s AND date >= %s AND date < %s",
+                (physician_id, day, day + datetime.timedelta(days=1)),
+            )
+        setup.close()
@@ -0,0 +1,53 @@
+from app import create_app
+from utils.auth_utils import generate_token
+from utils.care_access import CareAccessCache
+
+
+def _post(app, path, account_id, **kwargs):
+    with app.app_context():
+        token = generate_token(account_id, "physician")
+    return app.test_client().post(path, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+
+
+def test_panel_is_loaded_once_and_reloaded_for_unknown_patients(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    cursor = conn.cursor()
+    cache = CareAccessCache(ttl=60)
+    conn.results = [[{"patient_id": 2}, {"patient_id": 3}], [{"patient_id": 2}, {"patient_id": 3}, {"patient_id": 4}]]
+
+    assert cache.allowed(cursor, 1, [2]) == {2}
+    assert cache.allowed(cursor, 1, [3, 2]) == {2, 3}
+    assert len(conn.executed) == 1
+    # Patient 4 was booked through another worker: one reload, then granted.
+    assert cache.allowed(cursor, 1, [4, 9]) == {4}
+    assert len(conn.executed) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1 and cache.stats()["reloads"] == 1
+
+    cache.invalidate(1)
+    assert cache.stats()["size"] == 0
+
+
+def test_expired_panels_are_reloaded(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    cursor = conn.cursor()
+    cache = CareAccessCache(ttl=0)
+    conn.results = [[{"patient_id": 2}], [{"patient_id": 2}]]
+    cache.allowed(cursor, 1, [2])
+    cache.allowed(cursor, 1, [2])
+    assert len(conn.executed) == 2
+
+
+def test_bulk_access_endpoint(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[{"patient_id": 2}, {"patient_id": 5}]]
+
+    response = _post(app, '/api/physician/patients/access', 1, json={"patient_ids": [5, 7, 2, 5]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["allowed"] == [5, 2] and body["denied"] == [7]
+    assert conn.executed == [("SELECT patient_id FROM PhysicianPatient WHERE physician_id = %s", (1,))]
+
+    assert _post(app, '/api/physician/patients/access', 1, json={"patient_ids": ["2"]}).status_code == 400
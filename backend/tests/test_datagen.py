@@ -0,0 +1,72 @@
+import argparse
+
+from benchmarks.datagen import PRESETS, Dataset, allocate, preset_counts
+
+COUNTS = dict(insurances=3, pharmacies=4, specializations=5, medications=12, admins=1,
+              physicians=6, patients=40, appointments=600, records=150, logs=2000)
+
+
+def _materialize(data):
+    return {table: (columns, list(rows)) for table, columns, rows in data.tables()}
+
+
+def test_allocate_preserves_total():
+    counts = allocate(1000, [5.0, 1.0, 1.0, 0.5])
+    assert sum(counts) == 1000
+    assert counts[0] > counts[1]
+
+
+def test_preset_counts_apply_overrides():
+    counts = preset_counts("small", argparse.Namespace(patients=1000, logs=None))
+    assert counts == dict(PRESETS["small"], patients=1000)
+
+
+def test_same_seed_same_rows():
+    assert _materialize(Dataset(COUNTS, seed=3)) == _materialize(Dataset(COUNTS, seed=3))
+    assert _materialize(Dataset(COUNTS, seed=3)) != _materialize(Dataset(COUNTS, seed=4))
+
+
+def test_rows_respect_keys_and_triggers():
+    tables = _materialize(Dataset(COUNTS, seed=1, offsets={"Account": 100, "Appointment": 50}))
+    for table, (columns, rows) in tables.items():
+        assert all(len(row) == len(columns) for row in rows), table
+
+    accounts = {row[0]: row[3] for row in tables["Account"][1]}
+    physicians = {row[0] for row in tables["Physician"][1]}
+    patients = {row[0] for row in tables["Patient"][1]}
+    assert min(accounts) == 101
+    assert physicians == {a for a, role in accounts.items() if role == "physician"}
+    assert patients == {a for a, role in accounts.items() if role == "patient"}
+
+    appointments = tables["Appointment"][1]
+    assert len(appointments) == COUNTS["appointments"]
+    assert appointments[0][0] == 51
+    # uq_appointment_physician_active_slot: one appointment per physician and slot
+    assert len({(a[2], a[3]) for a in appointments}) == len(appointments)
+    assert all(a[1] in patients and a[2] in physicians for a in appointments)
+
+    records = tables["HealthRecord"][1]
+    assert len(records) == COUNTS["records"]
+    followups = [(r[2], r[3]) for r in records if r[7] == "Yes"]
+    assert len(followups) == len(set(followups))
+    assert all(r[1] in patients and r[2] in physicians for r in records)
+
+    record_ids = {r[0] for r in records}
+    prescriptions = tables["Prescription"][1]
+    assert all(p[1] in record_ids for p in prescriptions)
+    medicines = tables["Medicine"][1]
+    assert len({(m[0], m[1]) for m in medicines}) == len(medicines)
+    assert {m[1] for m in medicines} == {p[0] for p in prescriptions}
+
+    logs = tables["ActivityLog"][1]
+    assert len(logs) == COUNTS["logs"]
+    # trg_validate_activity_data: positive weight, "systolic/diastolic" bp
+    assert all(log[3] > 0 and "/" in log[4] and log[1] in patients for log in logs)
+    assert all(log[4] == f"{log[7]}/{log[8]}" for log in logs)
+
+
+def test_activity_is_skewed_towards_engaged_patients():
+    logs = _materialize(Dataset(COUNTS, seed=2))["ActivityLog"][1]
+    per_patient = sorted((sum(1 for log in logs if log[1] == p) for p in {log[1] for log in logs}), reverse=True)
+    top_fifth = per_patient[:max(1, len(per_patient) // 5)]
+    assert sum(top_fifth) > 0.35 * len(logs)
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+from flask import jsonify
+from pymysql.constants import SERVER_STATUS
+
+from app import create_app
+from utils.db_pool import PoolExhaustedError
+from utils.db_utils import after_commit, get_cursor
+
+
+def test_connections_are_reused(make_pool, created):
+    pool = make_pool(max_size=2)
+    conn = pool.acquire()
+    conn.close()
+    conn = pool.acquire()
+    conn.close()
+    assert len(created) == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_return_rolls_back_and_restores_autocommit(make_pool, created):
+    pool = make_pool()
+    conn = pool.acquire()
+    conn.autocommit(True)
+    conn.raw.server_status |= SERVER_STATUS.SERVER_STATUS_IN_TRANS
+    conn.close()
+    raw = created[0]
+    assert raw.rollbacks == 1
+    assert raw.autocommit_value is False
+
+
+def test_exhaustion_times_out_and_is_counted(make_pool):
+    pool = make_pool(max_size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire()
+    stats = pool.stats()
+    assert stats["exhausted"] == 1
+    assert stats["timeouts"] == 1
+    held.close()
+
+
+def test_waiter_gets_released_connection(make_pool, created):
+    pool = make_pool(max_size=1, timeout=2)
+    held = pool.acquire()
+    threading.Timer(0.05, held.close).start()
+    conn = pool.acquire()
+    conn.close()
+    assert len(created) == 1
+    assert pool.stats()["wait_time_max"] > 0
+
+
+def test_dead_connection_is_replaced_on_checkout(make_pool, created):
+    pool = make_pool(ping_interval=0)
+    conn = pool.acquire()
+    conn.close()
+    created[0].alive = False
+    conn = pool.acquire()
+    conn.close()
+    assert len(created) == 2
+    assert created[0].open is False
+
+
+def test_idle_and_lifetime_eviction(make_pool, created):
+    pool = make_pool(min_size=0, idle_timeout=0.01, max_lifetime=60)
+    pool.acquire().close()
+    time.sleep(0.02)
+    pool.acquire().close()
+    assert len(created) == 2
+
+    pool = make_pool(max_lifetime=0.01)
+    pool.acquire().close()
+    time.sleep(0.02)
+    pool.acquire().close()
+    assert len(created) == 4
+
+
+def test_request_session_shares_one_connection(make_pool, created):
+    app = create_app()
+    pool = make_pool(max_size=1, timeout=0.05)
+    app.extensions['db_pool'] = pool
+
+    @app.route('/_ok')
+    def ok():
+        get_cursor().execute("SELECT 1")
+        get_cursor().execute("SELECT 2")
+        return jsonify({"success": True})
+
+    @app.route('/_bad')
+    def bad():
+        get_cursor().execute("SELECT 1")
+        return jsonify({"success": False}), 400
+
+    @app.route('/_boom')
+    def boom():
+        get_cursor().execute("SELECT 1")
+        raise RuntimeError("boom")
+
+    client = app.test_client()
+    assert client.get('/_ok').status_code == 200
+    assert client.get('/_bad').status_code == 400
+    assert client.get('/_boom').status_code == 500
+
+    raw = created[0]
+    assert len(created) == 1
+    assert raw.commits == 1
+    assert raw.rollbacks == 2
+    assert pool.stats()["in_use"] == 0
+
+
+def test_after_commit_callbacks_run_only_once_committed(make_pool, created):
+    app = create_app()
+    app.extensions['db_pool'] = make_pool(max_size=1, timeout=0.05)
+    calls = []
+
+    def invalidate(name):
+        calls.append((name, created[0].commits))
+
+    @app.route('/_write/<int:status>')
+    def write(status):
+        get_cursor().execute("UPDATE t SET n = 1")
+        after_commit(invalidate, status)
+        return jsonify({"success": status < 400}), status
+
+    client = app.test_client()
+    assert client.get('/_write/200').status_code == 200
+    assert client.get('/_write/409').status_code == 409
+    # Ran after the first request's commit, never for the rolled-back one.
+    assert calls == [(200, 1)]
@@ -0,0 +1,64 @@
+import json
+import logging
+
+import pytest
+from flask import jsonify
+
+from app import create_app
+from utils import diagnostics
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def app_and_log():
+    app = create_app()
+    app.config['DIAGNOSTICS_ALLOW_HEADER'] = True
+
+    @app.route('/_traced')
+    def traced():
+        diagnostics.debug("traced.hit", value=1)
+        return jsonify({"success": True})
+
+    handler = ListHandler()
+    diagnostics.logger.addHandler(handler)
+    yield app, handler.messages
+    diagnostics.logger.removeHandler(handler)
+
+
+def test_debug_events_are_off_by_default(app_and_log):
+    app, messages = app_and_log
+    app.test_client().get('/_traced')
+    assert messages == []
+
+
+def test_header_and_route_switch_debug_on(app_and_log):
+    app, messages = app_and_log
+    client = app.test_client()
+    client.get('/_traced', headers={diagnostics.DIAGNOSTICS_HEADER: 'debug'})
+    assert len(messages) == 1
+    assert '"event": "traced.hit"' in messages[0]
+
+    app.config['DIAGNOSTICS_ROUTES'] = frozenset({'traced'})
+    client.get('/_traced')
+    assert len(messages) == 2
+
+
+def test_outside_a_request_the_configured_level_applies(app_and_log):
+    app, messages = app_and_log
+    diagnostics.debug("startup.no_app")
+    diagnostics.error("startup.no_app")
+    with app.app_context():
+        diagnostics.debug("cli.debug")
+        diagnostics.warning("cli.warning")
+        app.config['DIAGNOSTICS_LEVEL'] = 'debug'
+        diagnostics.debug("cli.traced")
+    assert [json.loads(m)["event"] for m in messages] == ["cli.warning", "cli.traced"]
+    assert diagnostics.logger.level == logging.NOTSET
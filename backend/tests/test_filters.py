@@ -0,0 +1,62 @@
+import datetime
+from decimal import Decimal
+
+from app import create_app
+from utils.auth_utils import generate_token
+
+
+def _get(app, path, role="patient", account_id=2):
+    with app.app_context():
+        token = generate_token(account_id, role)
+    return app.test_client().get(path, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_activity_log_filters_become_range_predicates(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[]]
+
+    response = _get(app, '/api/patient/activitylogs?from=2024-03-01&to=2024-03-31&min_weight=70.5&max_calories=2000')
+    assert response.status_code == 200
+    sql, args = conn.executed[0]
+    assert "WHERE patient_id = %s  AND log_date >= %s AND log_date <= %s AND weight >= %s AND calories <= %s" in sql
+    assert args == (2, datetime.date(2024, 3, 1), datetime.date(2024, 3, 31), Decimal("70.5"), Decimal("2000"), 101)
+
+
+def test_appointment_filters(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[]]
+
+    response = _get(app, '/api/patient/appointments?status=pending,Cancelled&physician=9&to=2024-03-31')
+    assert response.status_code == 200
+    sql, args = conn.executed[0]
+    assert "a.date < %s AND a.status IN (%s, %s) AND a.physician_id = %s" in sql
+    assert args == (2, datetime.date(2024, 4, 1), "Pending", "Cancelled", 9, 101)
+
+    conn.results = [[]]
+    assert _get(app, '/api/physician/appointments?patient=4', "physician", 1).status_code == 200
+    assert "a.patient_id = %s" in conn.executed[1][0]
+
+
+def test_invalid_filters_are_rejected(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    for query in ("status=Done", "from=March", "min_weight=heavy", "physician=dr",
+                  "from=2024-01-01&from=2024-02-01"):
+        path = '/api/patient/appointments?' if "weight" not in query else '/api/patient/activitylogs?'
+        response = _get(app, path + query)
+        assert response.status_code == 400, query
+    assert conn.executed == []
+
+
+def test_unknown_parameters_are_ignored(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[]]
+
+    response = _get(app, '/api/patient/appointments?_=1712345678&since=2024-01-01&status=Pending')
+    assert response.status_code == 200
+    sql, args = conn.executed[0]
+    assert "a.status IN (%s)" in sql and "since" not in sql
+    assert args == (2, "Pending", 101)
@@ -0,0 +1,124 @@
+import socket
+import struct
+import threading
+import time
+
+import pytest
+from pymysql.constants import CLIENT
+
+from app import create_app
+
+
+def test_live_never_touches_the_database():
+    app = create_app()
+    response = app.test_client().get('/api/health/live')
+    assert response.status_code == 200
+    assert 'db_pool' not in app.extensions
+
+
+def test_ready_pings_on_its_own_connection_and_caches(fake_db, monkeypatch):
+    app = create_app()
+    pooled = fake_db(app)
+    probe = type(pooled)()
+    opened = []
+
+    def open_probe_connection(app, timeout):
+        opened.append(timeout)
+        return probe
+    monkeypatch.setattr("utils.health.open_probe_connection", open_probe_connection)
+    client = app.test_client()
+
+    first = client.get('/api/health/ready')
+    assert first.status_code == 200
+    body = first.get_json()
+    assert body["status"] == "ready" and body["db"]["ok"] is True
+    assert body["cached"] is False
+    assert body["pool"]["max_size"] == 1 and body["pool"]["in_use"] == 0
+
+    second = client.get('/api/health/ready')
+    assert second.get_json()["cached"] is True
+    assert opened == [app.config['HEALTH_READY_TIMEOUT']]
+    assert probe.executed == [("SELECT 1", None)] and probe.open is False
+    assert pooled.executed == [] and app.extensions['db_pool'].stats()["size"] == 0
+
+
+def test_ready_fails_fast_when_the_pool_is_exhausted(fake_db, monkeypatch):
+    app = create_app()
+    fake_db(app)
+    monkeypatch.setattr("utils.health.open_probe_connection", pytest.fail)
+    held = app.extensions['db_pool'].acquire()
+    try:
+        response = app.test_client().get('/api/health/ready')
+    finally:
+        held.close()
+    assert response.status_code == 503
+    body = response.get_json()
+    assert body["db"]["error"] == "pool exhausted"
+    assert body["pool"]["saturation"] == 1.0
+
+
+def _unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_ready_reports_unreachable_database():
+    app = create_app()
+    app.config['DB_PARAMS'] = dict(app.config['DB_PARAMS'], host="127.0.0.1", port=_unused_port())
+
+    response = app.test_client().get('/api/health/ready')
+    assert response.status_code == 503
+    assert "Can't connect" in response.get_json()["db"]["error"]
+
+
+def _packet(seq, payload):
+    return struct.pack("<I", len(payload))[:3] + bytes([seq]) + payload
+
+
+def _stalled_mysql(stall_at):
+    """
+    A MySQL server on localhost that stops answering either before its
+    handshake or after accepting the login (so the SELECT 1 hangs).
+    Returns (port, stop).
+    """
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    stop = threading.Event()
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            if stall_at == "query":
+                capabilities = CLIENT.PROTOCOL_41 | CLIENT.SECURE_CONNECTION | CLIENT.PLUGIN_AUTH
+                conn.sendall(_packet(0, b"".join([
+                    b"\x0a8.0.0-stalled\x00", struct.pack("<I", 1), b"12345678\x00",
+                    struct.pack("<HBHHB", capabilities & 0xFFFF, 45, 0, capabilities >> 16, 21),
+                    b"\x00" * 10, b"123456789012\x00", b"mysql_native_password\x00",
+                ])))
+                conn.recv(4096)
+                conn.sendall(_packet(2, b"\x00\x00\x00\x00\x00\x00\x00"))
+            stop.wait(10)
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server.getsockname()[1], lambda: (stop.set(), server.close())
+
+
+@pytest.mark.parametrize("stall_at", ["handshake", "query"])
+def test_a_slow_database_is_not_ready_within_the_probe_timeout(stall_at):
+    app = create_app()
+    port, stop = _stalled_mysql(stall_at)
+    app.config['DB_PARAMS'] = dict(app.config['DB_PARAMS'], host="127.0.0.1", port=port, connect_timeout=30)
+    app.config['HEALTH_READY_TIMEOUT'] = 0.3
+    try:
+        started = time.monotonic()
+        response = app.test_client().get('/api/health/ready')
+        elapsed = time.monotonic() - started
+    finally:
+        stop()
+
+    assert response.status_code == 503
+    assert "timed out" in response.get_json()["db"]["error"]
+    assert 0.3 <= elapsed < 0.8
+    assert app.extensions['db_pool'].stats()["size"] == 0
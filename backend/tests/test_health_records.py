@@ -0,0 +1,110 @@
+from app import create_app
+from utils.auth_utils import generate_token
+
+HEADER = {"record_id": 7, "patient_id": 2, "physician_id": 1, "visit_date": "2024-03-01",
+          "diagnosis": "Asthma", "symptoms": "x" * 500, "lab_results": "Normal",
+          "follow_up_required": "No", "physician_name": "Ann Lee"}
+
+
+def _medicine(prescription_id, medication_id):
+    return {"record_id": 7, "prescription_id": prescription_id, "medication_id": medication_id,
+            "dosage": "10mg", "frequency": "Daily", "duration": "7 days", "instructions": None,
+            "medication_name": f"Med {medication_id}", "dosage_form": "Tablet",
+            "storage_instructions": None, "common_side_effects": None, "description": None}
+
+
+def _get(app, path, role, account_id):
+    with app.app_context():
+        token = generate_token(account_id, role)
+    return app.test_client().get(path, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_nested_record_reads_header_once(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    empty = dict(_medicine(11, None))
+    conn.results = [[HEADER], [_medicine(10, 3), _medicine(10, 4), empty]]
+
+    response = _get(app, '/api/patient/healthRecord/record/7?format=nested', "patient", 2)
+    assert response.status_code == 200
+    doc = response.get_json()["healthrecord"]
+    assert doc["record"]["symptoms"] == "x" * 500
+    assert [p["prescription_id"] for p in doc["prescriptions"]] == [10, 11]
+    assert [m["medication_id"] for m in doc["prescriptions"][0]["medicines"]] == [3, 4]
+    assert doc["prescriptions"][1]["medicines"] == []
+    assert "symptoms" not in doc["prescriptions"][0]["medicines"][0]
+
+    (header_sql, header_args), (medicines_sql, medicines_args) = conn.executed
+    assert "h.patient_id = %s" in header_sql and header_args == (2, "7")
+    assert "IN (%s)" in medicines_sql and medicines_args == [7]
+
+
+def test_nested_record_is_scoped_to_the_physician(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[]]
+    response = _get(app, '/api/physician/healthRecord/record/7?format=nested', "physician", 9)
+    assert response.status_code == 400
+    assert "h.physician_id = %s" in conn.executed[0][0]
+
+
+def test_flat_format_is_the_default_and_unknown_formats_are_rejected(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[dict(HEADER, **_medicine(10, 3))]]
+    response = _get(app, '/api/patient/healthRecord/record/7', "patient", 2)
+    assert isinstance(response.get_json()["healthrecord"], list)
+    assert _get(app, '/api/patient/healthRecord/record/7?format=xml', "patient", 2).status_code == 400
+
+
+def _post(app, path, account_id, **kwargs):
+    with app.app_context():
+        token = generate_token(account_id, "physician")
+    return app.test_client().post(path, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+
+
+RECORD = {"patient_id": 2, "visit_date": "2024-03-01", "diagnosis": "Asthma", "symptoms": "Wheezing",
+          "lab_results": "Normal", "follow_up_required": "No"}
+
+
+def _prescription(medication_id, **overrides):
+    return {"medication_id": medication_id, "dosage": "10mg", "frequency": "Daily", "duration": "7 days",
+            "instructions": "With food", **overrides}
+
+
+def test_create_record_inserts_medicines_in_one_statement(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    # Care panel, medication lookup, then the inserts
+    conn.results = [[{"patient_id": 2}], [{"medication_id": m} for m in (3, 4, 5)]]
+
+    prescriptions = [_prescription(m) for m in (3, 4, 5)]
+    response = _post(app, '/api/physician/healthRecord/create', 1, json={**RECORD, "prescriptions": prescriptions})
+    assert response.status_code == 200
+
+    lookup_sql, lookup_args = conn.executed[1]
+    assert "IN (%s, %s, %s)" in lookup_sql and lookup_args == [3, 4, 5]
+    medicines = [(sql, args) for sql, args in conn.executed if "INSERT INTO Medicine" in sql]
+    assert len(medicines) == 1
+    assert [row[1] for row in medicines[0][1]] == [3, 4, 5]
+    assert not any("SELECT 1 FROM Medications" in sql for sql, _ in conn.executed)
+
+
+def test_create_record_reports_every_bad_prescription(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[{"patient_id": 2}], [{"medication_id": 3}]]
+
+    prescriptions = [_prescription(3), _prescription(9), _prescription(3), _prescription(4, dosage=""),
+                     _prescription("x"), _prescription(5, instructions="y" * 300)]
+    response = _post(app, '/api/physician/healthRecord/create', 1, json={**RECORD, "prescriptions": prescriptions})
+    assert response.status_code == 400
+    errors = response.get_json()["errors"]
+    assert [(e["index"], e["error"]) for e in errors] == [
+        (1, "Invalid medication_id"),
+        (2, "Duplicate of prescription 0"),
+        (3, "All prescription fields are required"),
+        (4, "medication_id must be an integer"),
+        (5, "instructions must be at most 255 characters"),
+    ]
+    assert not any(sql.lstrip().startswith("INSERT") for sql, _ in conn.executed)
@@ -0,0 +1,33 @@
+from app import create_app
+from utils.auth_utils import generate_token
+
+
+def test_metrics_endpoint_reports_requests_and_jwt_checks():
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        token = generate_token(1, "physician")
+
+    client.get('/api/health')
+    # Verified, then refused for the role before any query runs.
+    client.get('/api/patient/activitylogs', headers={"Authorization": f"Bearer {token}"})
+    client.get('/api/patient/activitylogs', headers={"Authorization": "Bearer not-a-token"})
+
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    body = response.get_data(as_text=True)
+    assert 'mediflow_http_requests_total{endpoint="api.health",method="GET",status="200"}' in body
+    assert 'mediflow_http_request_duration_seconds_bucket{endpoint="api.health"' in body
+    assert 'mediflow_jwt_verifications_total{result="verified"}' in body
+    assert 'mediflow_jwt_verifications_total{result="invalid"}' in body
+    assert 'mediflow_cache_requests_total{cache="token",result="miss"}' in body
+    assert 'mediflow_http_requests_in_flight{endpoint="api.metrics",method="GET"} 1.0' in body
+
+
+def test_metrics_token():
+    app = create_app()
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+    client = app.test_client()
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
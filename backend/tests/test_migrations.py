@@ -0,0 +1,86 @@
+import re
+from pathlib import Path
+
+import pymysql
+import pytest
+
+import manage
+from app.db_utils import split_sql
+
+SCHEMA_DIR = Path(__file__).resolve().parent.parent / 'sql' / 'schema'
+SQL_START = re.compile(r"^(CREATE|ALTER|DROP|INSERT|UPDATE|DELETE|REPLACE|RENAME)\b", re.IGNORECASE)
+
+
+def test_split_sql_ignores_comments_and_quoted_semicolons():
+    sql = """
+    -- a comment; with a semicolon
+    INSERT INTO t VALUES ('a;b', 'it''s -- not a comment'); # trailing; comment
+    /* block; comment */ SELECT `odd;name` FROM t;
+    SELECT 1--2
+    """
+    assert split_sql(sql) == [
+        "INSERT INTO t VALUES ('a;b', 'it''s -- not a comment')",
+        "SELECT `odd;name` FROM t",
+        "SELECT 1--2",
+    ]
+
+
+@pytest.mark.parametrize("path", sorted(SCHEMA_DIR.glob('v*.sql')), ids=lambda p: p.name)
+def test_every_migration_splits_into_sql_statements(path):
+    statements = split_sql(path.read_text(encoding='utf-8'))
+    assert statements
+    for statement in statements:
+        assert SQL_START.match(statement), statement[:80]
+
+
+def _fail_on(conn, fragment):
+    """Make the fake connection's cursors fail statements containing `fragment` like MySQL would."""
+    cursor_factory = conn.cursor
+
+    def cursor(cursorclass=None):
+        cur = cursor_factory(cursorclass)
+        execute = cur.execute
+
+        def failing_execute(query, args=None):
+            if fragment in query:
+                raise pymysql.err.OperationalError(1060, "Duplicate column name")
+            return execute(query, args)
+        cur.execute = failing_execute
+        return cur
+    conn.cursor = cursor
+
+
+def _migrate(monkeypatch, tmp_path, app, conn):
+    (tmp_path / 'v001__demo.sql').write_text(
+        "-- step one; step two\nCREATE TABLE a (id INT);\nALTER TABLE a ADD COLUMN b INT;\nCREATE INDEX i ON a (b);\n"
+    )
+    monkeypatch.setattr(manage, 'MIGRATIONS_DIR', tmp_path)
+    monkeypatch.setattr(manage.pymysql, 'connect', lambda **kwargs: conn)
+    manage.migrate(app)
+
+
+def _statements(conn):
+    return [sql for sql, _ in conn.executed if not sql.lstrip().startswith(("CREATE TABLE IF", "SELECT", "INSERT"))]
+
+
+def test_migrate_records_each_statement_and_stops_at_the_failing_one(monkeypatch, tmp_path, fake_db):
+    app = manage.create_app()
+    conn = fake_db(app)
+    _fail_on(conn, "CREATE INDEX")
+    with pytest.raises(manage.MigrationError, match="statement 3 of 3"):
+        _migrate(monkeypatch, tmp_path, app, conn)
+    assert _statements(conn) == ["CREATE TABLE a (id INT)", "ALTER TABLE a ADD COLUMN b INT"]
+    steps = [args for sql, args in conn.executed if "schema_migration_steps (version, step)" in sql]
+    assert steps == [("v001", 1), ("v001", 2)]
+    assert not any("INSERT INTO schema_migrations" in sql for sql, _ in conn.executed)
+
+
+def test_migrate_resumes_after_the_recorded_statements(monkeypatch, tmp_path, fake_db):
+    app = manage.create_app()
+    conn = fake_db(app)
+    # Bookkeeping tables, applied versions, recorded steps of v001
+    conn.results = [[], [], [], [{"step": 1}, {"step": 2}]]
+    _migrate(monkeypatch, tmp_path, app, conn)
+    assert _statements(conn) == ["CREATE INDEX i ON a (b)"]
+    assert ("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", ("v001", "v001__demo.sql")) \
+        in conn.executed
@@ -0,0 +1,51 @@
+import pytest
+from flask import Flask
+
+from utils.pagination import Page, PaginationError, decode_cursor, encode_cursor, get_page
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(PAGE_SIZE_DEFAULT=2, PAGE_SIZE_MAX=3)
+
+    @app.route('/items/<int:owner_id>')
+    def items(owner_id):
+        return ''
+
+    return app
+
+
+def test_cursor_round_trip():
+    token = encode_cursor("2024-05-01", 42)
+    assert decode_cursor(token) == ("2024-05-01", 42)
+    with pytest.raises(PaginationError):
+        decode_cursor("not-a-cursor")
+
+
+def test_page_limits_are_bounded(app):
+    with app.test_request_context('/items/1'):
+        assert get_page().limit == 2
+    with app.test_request_context('/items/1?limit=50'):
+        assert get_page().limit == 3
+    with app.test_request_context('/items/1?limit=0'):
+        with pytest.raises(PaginationError):
+            get_page()
+
+
+def test_finish_trims_lookahead_and_links_next_page(app):
+    rows = [{"d": "2024-01-0%d" % i, "id": i} for i in (3, 2, 1)]
+    with app.test_request_context('/items/7?limit=2'):
+        page = get_page()
+        assert page.keyset("d", "id") == ("", ())
+        out, paging = page.finish(rows, "d", "id")
+    assert [r["id"] for r in out] == [3, 2]
+    assert decode_cursor(paging["next_cursor"]) == ("2024-01-02", 2)
+    assert paging["next"].startswith("/items/7?")
+
+    with app.test_request_context('/items/7?cursor=' + paging["next_cursor"]):
+        sql, params = get_page().keyset("d", "id")
+    assert params == ("2024-01-02", "2024-01-02", 2)
+
+    out, paging = Page(5).finish(rows, "d", "id")
+    assert paging == {"next_cursor": None, "next": None}
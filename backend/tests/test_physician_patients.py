@@ -0,0 +1,33 @@
+import datetime
+
+from app import create_app
+from utils.auth_utils import generate_token
+from utils.pagination import decode_cursor
+
+
+def _patient(patient_id, day):
+    return {"patient_id": patient_id, "patient_name": f"Patient {patient_id}", "age": 40,
+            "recent_date": datetime.datetime(2024, 5, day, 9, 0), "visit_count": 3, "physician_name": "Ann Lee"}
+
+
+def test_patients_page_through_the_relationship_table(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[_patient(7, 9), _patient(4, 8), _patient(5, 1)]]
+    with app.app_context():
+        token = generate_token(1, "physician")
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    body = client.get('/api/physician/patients?limit=2', headers=headers).get_json()
+    assert [p["patient_id"] for p in body["patients"]] == [7, 4]
+    assert body["patients"][0]["visit_count"] == 3
+    sql, args = conn.executed[0]
+    assert "FROM PhysicianPatient pp" in sql and "DISTINCT" not in sql
+    assert args == (1, 3)
+
+    client.get(body["next"], headers=headers)
+    sql, args = conn.executed[1]
+    assert "pp.last_visit < %s" in sql
+    key, row_id = decode_cursor(body["next_cursor"])
+    assert args == (1, key, key, row_id, 3) and row_id == 4
@@ -0,0 +1,74 @@
+import datetime
+import json
+
+from app import create_app
+from utils.auth_utils import generate_token
+
+LOG = {"log_id": 5, "patient_id": 2, "log_date": datetime.date(2024, 3, 1), "weight": 70,
+       "bp": "120/80", "calories": 300, "duration_of_physical_activity": 30}
+APPOINTMENT = {"appointment_id": 8, "patient_id": 2, "date": datetime.datetime(2030, 1, 2, 9, 0),
+               "status": "Pending", "reason": "Checkup", "notes": "", "patient_name": "Bo Li"}
+
+
+def _request(app, method, path, role, account_id, **kwargs):
+    with app.app_context():
+        token = generate_token(account_id, role)
+    return app.test_client().open(path, method=method, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+
+
+def test_dashboard_is_one_primary_key_read(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[{"activity_log": json.dumps({"log_id": 5}), "prescriptions": "[]",
+                      "next_appointment": None, "next_is_stale": None}]]
+
+    response = _request(app, "GET", "/api/physician/dashboard-summary", "physician", 1)
+    assert response.status_code == 200
+    assert response.get_json() == {"success": True, "activity_log": {"log_id": 5}, "prescriptions": [],
+                                   "next_appointment": None}
+    (sql, args), = conn.executed
+    assert "FROM PhysicianDashboardSummary" in sql and args == (1,)
+
+
+def test_missing_row_is_built_and_upserted(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    prescription = {"dosage": "10mg", "frequency": "Daily", "medication_name": "Med"}
+    conn.results = [[], [LOG], [prescription], [APPOINTMENT]]
+
+    body = _request(app, "GET", "/api/physician/dashboard-summary", "physician", 1).get_json()
+    assert body["activity_log"]["log_id"] == 5
+    assert body["prescriptions"] == [prescription]
+    assert body["next_appointment"]["appointment_id"] == 8
+
+    upsert_sql, upsert_args = conn.executed[-1]
+    assert "ON DUPLICATE KEY UPDATE" in upsert_sql
+    assert upsert_args[0] == 1 and LOG["log_date"] in upsert_args and APPOINTMENT["date"] in upsert_args
+    # Stored with jsonify's encoding, so a cached read answers exactly like a fresh one.
+    assert json.loads(upsert_args[1])["log_date"] == body["activity_log"]["log_date"]
+
+
+def test_stale_next_appointment_is_recomputed_alone(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[{"activity_log": None, "prescriptions": "[]", "next_appointment": "{}", "next_is_stale": 1}],
+                    []]
+
+    body = _request(app, "GET", "/api/physician/dashboard-summary", "physician", 1).get_json()
+    assert body["next_appointment"] is None
+    update_sql, update_args = conn.executed[-1]
+    assert update_sql.startswith("UPDATE PhysicianDashboardSummary SET next_appointment = %s")
+    assert update_args == (None, None, None, 1)
+
+
+def test_status_change_refreshes_the_next_appointment(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    conn.results = [[{"physician_id": 1}], [], [APPOINTMENT]]
+
+    response = _request(app, "PUT", "/api/physician/appointment/3/status", "physician", 1,
+                        json={"status": "Completed"})
+    assert response.status_code == 200
+    update_sql, update_args = conn.executed[-1]
+    assert "SET next_appointment = %s" in update_sql
+    assert update_args[1:] == (APPOINTMENT["date"], 8, 1)
@@ -0,0 +1,226 @@
+"""
+EXPLAIN-based regression test for the blueprint access paths.
+
+Runs only against a real MySQL loaded with the large synthetic dataset (the
+plans of the tiny seed data are meaningless, the optimizer happily scans
+small tables):
+
+    cd backend
+    python manage.py schema && python manage.py migrate
+    mysql mediflow < sql/procedures_triggers.sql
+    python -m benchmarks.datagen --preset medium --seed 7
+    MEDIFLOW_DB_TESTS=1 pytest tests/test_query_plans.py
+
+The queries are the handlers' own SQL constants, formatted the way the
+handlers format them, so a change to a query is checked here without being
+copied. Every query registered below must reach the large tables through an
+index; a plan row with type=ALL fails the test unless the alias is a small
+reference table listed in `scans`.
+"""
+import datetime
+import os
+
+import pymysql
+import pytest
+
+from app import create_app
+from routes import patient_routes, physician_routes
+from utils import activity_logs, activity_trends, availability, care_access, health_records, physician_summary
+from utils.auth_utils import ACCOUNT_ID_SQL, LOGIN_SQL
+from utils.booking import slot_of
+from utils.filters import activity_log_filters, appointment_filters
+from utils.pagination import Page
+
+pytestmark = pytest.mark.skipif(
+    os.getenv('MEDIFLOW_DB_TESTS', '').lower() not in ('1', 'true', 'yes'),
+    reason="needs a seeded MySQL database (set MEDIFLOW_DB_TESTS=1)",
+)
+
+PAGE_SIZE = 101
+
+
+def _filters(filters, **raw):
+    """The handler's filter predicates for the given query-string values."""
+    sql, params = "", ()
+    for f in filters:
+        if f.param in raw:
+            clause, bound = f.clause(raw[f.param])
+            sql += f" AND {clause}"
+            params += bound
+    return sql, params
+
+
+def _second_page(key_col, id_col, key):
+    """Keyset predicate of a page continuing after `key`."""
+    return Page(PAGE_SIZE - 1, (key, 2 ** 31 - 1)).keyset(key_col, id_col)
+
+
+# name -> (sql, params builder, aliases allowed to be scanned)
+REGISTERED_QUERIES = {
+    "patient.login": (
+        LOGIN_SQL,
+        lambda ids: (ids['user_name'], 'patient'),
+        (),
+    ),
+    "signup.account_lookup": (
+        ACCOUNT_ID_SQL,
+        lambda ids: (ids['user_name'],),
+        (),
+    ),
+    "patient.healthRecords": (
+        patient_routes._HEALTH_RECORDS_SQL.format(keyset=""),
+        lambda ids: (ids['patient_id'], PAGE_SIZE),
+        (),
+    ),
+    "patient.healthRecord": (
+        health_records.FLAT_RECORD_SQL.format(owner="patient_id"),
+        lambda ids: (ids['patient_id'], ids['record_id']),
+        (),
+    ),
+    "healthRecord.nested.header": (
+        health_records._HEADER_SQL.format(owner="physician_id"),
+        lambda ids: (ids['physician_id'], ids['record_id']),
+        (),
+    ),
+    "healthRecord.nested.medicines": (
+        health_records._MEDICINES_SQL.format(placeholders="%s"),
+        lambda ids: (ids['record_id'],),
+        (),
+    ),
+    "patient.dashboard": (
+        patient_routes._DASHBOARD_SQL.format(keyset=""),
+        lambda ids: (ids['patient_id'], PAGE_SIZE),
+        (),
+    ),
+    "patient.get_appointments": (
+        patient_routes._APPOINTMENTS_SQL.format(filters="", keyset="") + " LIMIT %s",
+        lambda ids: (ids['patient_id'], PAGE_SIZE),
+        ('s',),
+    ),
+    "patient.get_appointments.by_physician": (
+        patient_routes._APPOINTMENTS_SQL.format(
+            filters=_filters(appointment_filters("physician"), status="Pending", physician="0")[0], keyset=""
+        ) + " LIMIT %s",
+        lambda ids: (ids['patient_id'], 'Pending', ids['physician_id'], PAGE_SIZE),
+        ('s',),
+    ),
+    "patient.activity_logs": (
+        activity_logs.LIST_SQL.format(filters="", keyset=_second_page("log_date", "log_id", None)[0]) + " LIMIT %s",
+        lambda ids: (ids['patient_id'], *_second_page("log_date", "log_id", ids['date'])[1], PAGE_SIZE),
+        (),
+    ),
+    "patient.activity_logs.filtered": (
+        activity_logs.LIST_SQL.format(
+            filters=_filters(activity_log_filters(), **{"from": "2024-01-01", "to": "2024-12-31",
+                                                        "min_systolic": "140"})[0],
+            keyset="",
+        ) + " LIMIT %s",
+        lambda ids: (ids['patient_id'],
+                     *_filters(activity_log_filters(), **{"from": "2024-01-01", "to": "2024-12-31",
+                                                          "min_systolic": "140"})[1],
+                     PAGE_SIZE),
+        (),
+    ),
+    "patient.physician_availability": (
+        availability._AGENDA_SQL,
+        lambda ids: (slot_of(ids['date']), slot_of(ids['date'] + datetime.timedelta(days=42)), ids['physician_id']),
+        (),
+    ),
+    "physician.appointments": (
+        physician_routes._APPOINTMENTS_SQL.format(filters="", keyset="") + " LIMIT %s",
+        lambda ids: (ids['physician_id'], PAGE_SIZE),
+        (),
+    ),
+    "physician.appointments.by_patient": (
+        physician_routes._APPOINTMENTS_SQL.format(
+            filters=_filters(appointment_filters("patient"), patient="0")[0], keyset=""
+        ) + " LIMIT %s",
+        lambda ids: (ids['physician_id'], ids['patient_id'], PAGE_SIZE),
+        (),
+    ),
+    "physician.patient_access": (
+        care_access._PANEL_SQL,
+        lambda ids: (ids['physician_id'],),
+        (),
+    ),
+    "physician.get_patients": (
+        physician_routes._PATIENTS_SQL.format(keyset=""),
+        lambda ids: (ids['physician_id'], PAGE_SIZE),
+        (),
+    ),
+    "physician.visits": (
+        physician_routes._VISITS_SQL,
+        lambda ids: (ids['patient_id'], ids['physician_id']),
+        (),
+    ),
+    "physician.dashboard.prescriptions": (
+        physician_summary._PRESCRIPTIONS_SQL,
+        lambda ids: (ids['physician_id'], 2),
+        (),
+    ),
+    "physician.dashboard.next_appointment": (
+        physician_summary._NEXT_APPOINTMENT_SQL,
+        lambda ids: (ids['physician_id'],),
+        (),
+    ),
+    "physician.dashboard.activity_log": (
+        physician_summary._LATEST_ACTIVITY_LOG_SQL,
+        lambda ids: (ids['physician_id'],),
+        (),
+    ),
+    "physician.dashboard.patient_physicians": (
+        physician_summary._PATIENT_PHYSICIANS_SQL,
+        lambda ids: (ids['patient_id'],),
+        (),
+    ),
+    "physician.dashboard.summary": (
+        physician_summary._SUMMARY_SQL,
+        lambda ids: (ids['physician_id'],),
+        (),
+    ),
+    "activity_log.trends": (
+        activity_trends._TRENDS_SQL.format(bucket=activity_trends.GRANULARITIES["week"],
+                                           metrics=activity_trends._METRIC_COLUMNS),
+        lambda ids: (ids['patient_id'], '2000-01-01', '2100-01-01'),
+        (),
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def cursor():
+    app = create_app()
+    params = app.config['DB_PARAMS']
+    conn = pymysql.connect(cursorclass=pymysql.cursors.DictCursor, **params)
+    cur = conn.cursor()
+    yield cur
+    cur.close()
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def sample_ids(cursor):
+    cursor.execute("""
+        SELECT a.patient_id, a.physician_id, a.date, ac.user_name
+        FROM Appointment a INNER JOIN Account ac ON ac.account_id = a.patient_id
+        LIMIT 1
+    """)
+    ids = cursor.fetchone()
+    if not ids:
+        pytest.skip("database is not seeded")
+    cursor.execute("SELECT record_id FROM HealthRecord WHERE patient_id = %s LIMIT 1", (ids['patient_id'],))
+    record = cursor.fetchone()
+    ids['record_id'] = record['record_id'] if record else 0
+    return ids
+
+
+@pytest.mark.parametrize("name", sorted(REGISTERED_QUERIES))
+def test_registered_query_avoids_full_scan(cursor, sample_ids, name):
+    sql, params, scans = REGISTERED_QUERIES[name]
+    cursor.execute("EXPLAIN " + sql, params(sample_ids))
+    plan = cursor.fetchall()
+    full_scans = [
+        row['table'] for row in plan
+        if row['type'] == 'ALL' and row['table'] not in scans and not str(row['table']).startswith('<')
+    ]
+    assert not full_scans, f"{name} scans {full_scans}: {plan}"
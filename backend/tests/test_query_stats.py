@@ -0,0 +1,74 @@
+from flask import jsonify
+
+from app import create_app
+from utils.auth_utils import generate_token
+from utils.db_utils import get_cursor
+from utils.query_stats import QueryRecord, QueryStats, fingerprint, get_query_stats, instrument
+
+
+def test_fingerprint_strips_values():
+    assert fingerprint("SELECT * FROM Account WHERE user_name=%s AND role = 'patient'") == \
+        "SELECT * FROM Account WHERE user_name=? AND role = ?"
+    assert fingerprint("SELECT 1 FROM t WHERE id IN (%s, %s,%s)\n  LIMIT 10") == \
+        "SELECT ? FROM t WHERE id IN (...) LIMIT ?"
+    assert fingerprint("INSERT INTO Medicine (a, b) VALUES (1, 'x'), (2, 'y')") == \
+        "INSERT INTO Medicine (a, b) VALUES (...)"
+
+
+def test_stats_histogram_and_slow_log():
+    stats = QueryStats(slow_ms=50, slow_log_size=2, max_fingerprints=2)
+    for fp, seconds in [("a", 0.001), ("a", 0.2), ("b", 0.06), ("c", 0.003), ("c", 0.004)]:
+        record = QueryRecord(fp)
+        record.exec_time = seconds
+        stats.observe(record, endpoint="x")
+
+    snapshot = stats.snapshot()
+    by_fp = {q["fingerprint"]: q for q in snapshot["queries"]}
+    assert set(by_fp) == {"a", "b", "<other>"}
+    assert by_fp["a"]["count"] == 2
+    assert by_fp["a"]["histogram_ms"]["1"] == 1 and by_fp["a"]["histogram_ms"]["250"] == 1
+    assert by_fp["<other>"]["count"] == 2
+    assert [s["fingerprint"] for s in snapshot["slow_queries"]] == ["b", "a"]
+
+    stats.reset()
+    assert stats.snapshot()["queries"] == []
+
+
+def test_request_records_queries_and_server_timing(fake_db):
+    app = create_app()
+    conn = fake_db(app)
+    app.extensions['db_pool'].cursor_wrapper = instrument
+    conn.results = [[{"n": 1}, {"n": 2}], []]
+
+    @app.route('/_two_queries')
+    def two_queries():
+        cursor = get_cursor()
+        cursor.execute("SELECT n FROM t WHERE id = %s", (5,))
+        rows = cursor.fetchall()
+        cursor.execute("UPDATE t SET n = %s", (1,))
+        return jsonify({"rows": len(rows)})
+
+    response = app.test_client().get('/_two_queries')
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert 'desc="2 queries"' in response.headers["Server-Timing"]
+
+    queries = {q["fingerprint"]: q for q in get_query_stats(app).snapshot()["queries"]}
+    assert queries["SELECT n FROM t WHERE id = ?"]["rows"] == 2
+    assert queries["UPDATE t SET n = ?"]["count"] == 1
+
+
+def test_admin_endpoint_requires_the_admin_token():
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        admin_jwt = generate_token(2, "admin")
+
+    assert client.get('/api/admin/queries').status_code == 403
+    app.config['ADMIN_TOKEN'] = 'ops-secret'
+    assert client.get('/api/admin/queries').status_code == 401
+    assert client.get('/api/admin/queries', headers={"Authorization": f"Bearer {admin_jwt}"}).status_code == 401
+    response = client.get('/api/admin/queries', headers={"Authorization": "Bearer ops-secret"})
+    assert response.status_code == 200
+    assert response.get_json()["success"] is True
+    assert client.delete('/api/admin/queries', headers={"Authorization": "Bearer ops-secret"}).status_code == 200
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from app import create_app
+from utils import reference_cache
+from utils.reference_cache import ReferenceCache, ReferenceDataset
+
+
+def test_cache_hits_until_invalidated():
+    cache = ReferenceCache(default_ttl=60)
+    dataset = ReferenceDataset("things", "SELECT 1")
+    calls = []
+
+    def fetch(sql):
+        calls.append(sql)
+        return [{"id": len(calls)}]
+
+    body, etag = cache.get(dataset, fetch, json.dumps)
+    assert cache.get(dataset, fetch, json.dumps) == (body, etag)
+    assert len(calls) == 1
+
+    cache.invalidate("things")
+    body2, etag2 = cache.get(dataset, fetch, json.dumps)
+    assert len(calls) == 2
+    assert etag2 != etag
+    assert cache.stats()["hits"] == 1
+
+
+def test_expired_and_oversized_entries_reload():
+    cache = ReferenceCache(default_ttl=0)
+    calls = []
+    fetch = lambda sql: calls.append(sql) or []
+    dataset = ReferenceDataset("things", "SELECT 1")
+    cache.get(dataset, fetch, json.dumps)
+    cache.get(dataset, fetch, json.dumps)
+    assert len(calls) == 2
+
+    cache = ReferenceCache(default_ttl=60)
+    big = ReferenceDataset("big", "SELECT 1", max_bytes=4)
+    cache.get(big, lambda sql: calls.append(sql) or [{"id": 1}], json.dumps)
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(reference_cache, "_fetch_rows",
+                        lambda sql: [{"insurance_id": 1, "provider_name": "BlueCross"}])
+    app = create_app()
+    with app.test_client() as client:
+        yield client
+
+
+def test_insurances_support_etag(client):
+    rv = client.get('/api/patient/insurances')
+    assert rv.status_code == 200
+    assert rv.get_json() == [{"insurance_id": 1, "provider_name": "BlueCross"}]
+    etag = rv.headers['ETag']
+
+    rv = client.get('/api/patient/insurances', headers={'If-None-Match': etag})
+    assert rv.status_code == 304
+    assert rv.data == b''
@@ -0,0 +1,26 @@
+import datetime
+from decimal import Decimal
+
+from app import create_app
+from utils.auth_utils import generate_token
+
+
+def test_activity_logs_stream_all_rows(fake_db):
+    app = create_app()
+    app.config['STREAM_BATCH_SIZE'] = 2
+    conn = fake_db(app)
+    conn.results.append([
+        {"log_id": i, "log_date": datetime.date(2024, 1, i), "weight": Decimal("70.5")}
+        for i in (3, 2, 1)
+    ])
+    with app.app_context():
+        token = generate_token(5, "patient")
+
+    client = app.test_client()
+    rv = client.get('/api/patient/activitylogs?stream=1', headers={"Authorization": f"Bearer {token}"})
+    assert rv.status_code == 200
+    body = rv.get_json()
+    assert body["success"] is True
+    assert [log["log_id"] for log in body["logs"]] == [3, 2, 1]
+    assert "LIMIT" not in conn.executed[0][0]
+    assert app.extensions['db_pool'].stats()["in_use"] == 0
@@ -0,0 +1,154 @@
+"""
+Activity log validation and batched inserts, shared by the single-log and bulk endpoints.
+
+validate_log() applies the rules of trg_validate_activity_data (positive
+weight, "systolic/diastolic" blood pressure) plus the column types, so bad
+entries are reported per item instead of aborting a whole batch in MySQL.
+"""
+import datetime
+import json
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app, request
+
+REQUIRED_FIELDS = ('date', 'weight', 'bp_systolic', 'bp_diastolic', 'calories', 'duration')
+MAX_WEIGHT = Decimal("999.99")   # DECIMAL(5,2)
+MAX_BP = 65535                   # SMALLINT UNSIGNED
+
+INSERT_SQL = """
+    INSERT INTO ActivityLog (patient_id, log_date, weight, bp, bp_systolic, bp_diastolic, calories,
+                             duration_of_physical_activity)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# Listing of one patient's logs, newest first (patient and physician views)
+LIST_SQL = """
+    SELECT 
+        log_id,
+        log_date,
+        weight,
+        bp,
+        bp_systolic,
+        bp_diastolic,
+        calories,
+        duration_of_physical_activity
+    FROM ActivityLog
+    WHERE patient_id = %s {filters} {keyset}
+    ORDER BY log_date DESC, log_id DESC
+"""
+
+
+class BulkPayloadError(ValueError):
+    """The bulk request body as a whole cannot be read (answered with a 400)."""
+
+
+def _whole_number(value, name, minimum, maximum=None):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"{name} must be at most {maximum}")
+    return number
+
+
+def validate_bp(systolic, diastolic):
+    """(bp_systolic, bp_diastolic) as positive integers; the legacy bp string is f"{systolic}/{diastolic}"."""
+    return _whole_number(systolic, "bp_systolic", 1, MAX_BP), _whole_number(diastolic, "bp_diastolic", 1, MAX_BP)
+
+
+def validate_log(entry):
+    """
+    Check one log as sent by the API.
+
+    Returns the (log_date, weight, bp, bp_systolic, bp_diastolic, calories,
+    duration) values to insert; raises ValueError with a client-facing message.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError("Each log must be a JSON object")
+    missing = [f for f in REQUIRED_FIELDS if f not in entry]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+    try:
+        log_date = datetime.date.fromisoformat(str(entry['date'])[:10])
+    except ValueError:
+        raise ValueError("date must be YYYY-MM-DD")
+
+    if isinstance(entry['weight'], bool):
+        raise ValueError("weight must be a number")
+    try:
+        weight = Decimal(str(entry['weight']))
+    except InvalidOperation:
+        raise ValueError("weight must be a number")
+    if not weight.is_finite() or weight <= 0:
+        raise ValueError("Weight must be positive.")
+    if weight > MAX_WEIGHT:
+        raise ValueError(f"weight must be at most {MAX_WEIGHT}")
+
+    systolic, diastolic = validate_bp(entry['bp_systolic'], entry['bp_diastolic'])
+    calories = _whole_number(entry['calories'], "calories", 0)
+    duration = _whole_number(entry['duration'], "duration", 0)
+    return log_date, weight, f"{systolic}/{diastolic}", systolic, diastolic, calories, duration
+
+
+def iter_bulk_entries():
+    """
+    The entries of a bulk upload: a JSON array body, or one JSON object per line
+    when the Content-Type is application/x-ndjson. NDJSON is read line by line
+    from the request stream; a line that is not JSON yields a ValueError in its
+    place so it is reported like any other invalid item.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        def lines():
+            for raw in request.stream:
+                raw = raw.strip()
+                if not raw:
+                    continue
+                try:
+                    yield json.loads(raw)
+                except ValueError:
+                    yield ValueError("Invalid JSON line")
+        return lines()
+
+    entries = request.get_json(silent=True)
+    if not isinstance(entries, list):
+        raise BulkPayloadError("Body must be a JSON array of activity logs or application/x-ndjson")
+    return iter(entries)
+
+
+def insert_logs(cursor, patient_id, entries, max_items=None, batch_size=None):
+    """
+    Validate and insert many logs for one patient with multi-row INSERTs.
+
+    Valid entries are written in executemany() batches of batch_size rows (all
+    in the caller's transaction); invalid ones are skipped. Returns one
+    {"index", "status": "created"|"invalid"[, "error"]} result per entry; a
+    payload without any entry raises BulkPayloadError.
+    """
+    max_items = max_items or current_app.config.get('ACTIVITY_BULK_MAX_ITEMS', 5000)
+    batch_size = batch_size or current_app.config.get('ACTIVITY_BULK_BATCH_SIZE', 500)
+    results = []
+    batch = []
+    for index, entry in enumerate(entries):
+        if index >= max_items:
+            raise BulkPayloadError(f"At most {max_items} activity logs per request")
+        try:
+            if isinstance(entry, ValueError):
+                raise entry
+            batch.append((patient_id, *validate_log(entry)))
+            results.append({"index": index, "status": "created"})
+        except ValueError as e:
+            results.append({"index": index, "status": "invalid", "error": str(e)})
+        if len(batch) >= batch_size:
+            cursor.executemany(INSERT_SQL, batch)
+            batch = []
+    if not results:
+        raise BulkPayloadError("No activity logs in the request body")
+    if batch:
+        cursor.executemany(INSERT_SQL, batch)
+    return results
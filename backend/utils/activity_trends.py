@@ -0,0 +1,104 @@
+"""
+Activity log trends read from the ActivityLogDaily rollups (migration v004).
+
+A chart of N buckets reads at most one rollup row per day in range, never the
+raw logs; week and month buckets are summed from the daily rows in MySQL.
+"""
+import datetime
+
+from flask import request
+
+from utils.pagination import QueryParamError
+
+# Bucket start for each granularity (weeks start on Monday).
+GRANULARITIES = {
+    "day": "d.log_date",
+    "week": "DATE_SUB(d.log_date, INTERVAL WEEKDAY(d.log_date) DAY)",
+    "month": "DATE_SUB(d.log_date, INTERVAL DAYOFMONTH(d.log_date) - 1 DAY)",
+}
+METRICS = {
+    "weight": "weight",
+    "calories": "calories",
+    "duration": "duration",
+    "bp_systolic": "systolic",
+    "bp_diastolic": "diastolic",
+}
+DEFAULT_RANGE_DAYS = 90
+MAX_RANGE_DAYS = 3660
+
+_METRIC_COLUMNS = ",\n".join(
+    f"""
+        SUM(d.{column}_count) AS {column}_count,
+        SUM(d.{column}_sum) AS {column}_sum,
+        MIN(d.{column}_min) AS {column}_min,
+        MAX(d.{column}_max) AS {column}_max"""
+    for column in METRICS.values()
+)
+
+_TRENDS_SQL = """
+    SELECT {bucket} AS bucket, SUM(d.log_count) AS log_count,{metrics}
+    FROM ActivityLogDaily d
+    WHERE d.patient_id = %s AND d.log_date BETWEEN %s AND %s
+    GROUP BY bucket
+    ORDER BY bucket
+"""
+
+
+def _date_arg(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise QueryParamError(f"{name} must be YYYY-MM-DD")
+
+
+def trend_params():
+    """`granularity` (day|week|month, default day), `from` and `to` (inclusive, default the last 90 days)."""
+    granularity = request.args.get('granularity', 'day').lower()
+    if granularity not in GRANULARITIES:
+        raise QueryParamError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    end = _date_arg('to', datetime.date.today())
+    start = _date_arg('from', end - datetime.timedelta(days=DEFAULT_RANGE_DAYS - 1))
+    if start > end:
+        raise QueryParamError("from must not be after to")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise QueryParamError(f"at most {MAX_RANGE_DAYS} days per request")
+    return granularity, start, end
+
+
+def _stats(row, column):
+    count = int(row[f"{column}_count"] or 0)
+    if not count:
+        return {"count": 0, "min": None, "max": None, "mean": None}
+    return {
+        "count": count,
+        "min": float(row[f"{column}_min"]),
+        "max": float(row[f"{column}_max"]),
+        "mean": round(float(row[f"{column}_sum"]) / count, 2),
+    }
+
+
+def _bucket_start(value):
+    # DATE_SUB() on a DATE column may come back as a string depending on the server.
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+def fetch_trends(cursor, patient_id, granularity, start, end):
+    """Buckets with logs in [start, end], oldest first; empty buckets are omitted."""
+    cursor.execute(
+        _TRENDS_SQL.format(bucket=GRANULARITIES[granularity], metrics=_METRIC_COLUMNS),
+        (patient_id, start, end),
+    )
+    return [
+        {
+            "start": _bucket_start(row["bucket"]),
+            "logs": int(row["log_count"]),
+            **{name: _stats(row, column) for name, column in METRICS.items()},
+        }
+        for row in cursor.fetchall()
+    ]
+
@@ -1,13 +1,40 @@
 import hashlib
+import threading
+import time
 import jwt
 import datetime
+from collections import OrderedDict
 from functools import wraps
 from flask import current_app, request, jsonify, g
+from utils import diagnostics, metrics
+from utils.db_utils import get_db_pool
 
+# Password hashing (scrypt / PBKDF2 with legacy SHA-256 upgrade) lives in utils/passwords.py
+from utils.passwords import hash_password, verify_password, dummy_verify  # noqa: F401
 
-# Hash password (SHA256)
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+LOGIN_SQL = "SELECT * FROM Account WHERE user_name=%s AND role=%s"
+# Signup: id of the account just inserted (user_name is unique)
+ACCOUNT_ID_SQL = "SELECT account_id FROM Account WHERE user_name=%s"
+
+
+# Look up an account by username + role and verify the password in constant time.
+# Legacy or outdated hashes are re-hashed with the current settings on success;
+# the UPDATE rides on the caller's transaction.
+def authenticate(cursor, user_name, password, role):
+    cursor.execute(LOGIN_SQL, (user_name, role))
+    accounts = cursor.fetchall()
+    if not accounts:
+        dummy_verify(password)
+        return None
+
+    for account in accounts:
+        matches, needs_rehash = verify_password(password, account['password'])
+        if matches:
+            if needs_rehash:
+                cursor.execute("UPDATE Account SET password=%s WHERE account_id=%s",
+                               (hash_password(password), account['account_id']))
+            return account
+    return None
 
 
 # Generate JWT token using Flask SECRET_KEY
@@ -21,18 +48,226 @@ def generate_token(account_id, role):
     return jwt.encode(payload, secret, algorithm="HS256")
 
 
-# Verify JWT token
-def verify_token(token):
+class TokenCache:
+    """
+    Bounded LRU cache of verified JWT payloads, keyed by a SHA-256 digest of the raw token.
+
+    - entries expire at the token's own `exp` claim
+    - hits / misses / expired counters are exposed through stats()
+
+    The cache is per worker process and only remembers what the signature
+    check already proved, so it never accepts a token HS256 would reject.
+    Revocations are checked before it, on hits and misses alike (RevocationList).
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, digest, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, exp = entry
+            if exp is not None and now >= exp:
+                del self._entries[digest]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return payload
+
+    def put(self, digest, payload):
+        if self.max_size <= 0:
+            return
+        exp = payload.get("exp")
+        with self._lock:
+            self._entries[digest] = (payload, exp)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+            }
+
+
+_REVOKE_SQL = """
+    INSERT INTO RevokedToken (digest, account_id, expires_at) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE digest = digest
+"""
+# Revocations of tokens that have expired since can no longer matter.
+_PRUNE_REVOKED_SQL = "DELETE FROM RevokedToken WHERE expires_at < UNIX_TIMESTAMP()"
+_REVOKED_SINCE_SQL = """
+    SELECT revocation_id, digest, expires_at FROM RevokedToken
+    WHERE revocation_id > %s
+    ORDER BY revocation_id
+"""
+
+
+class RevocationList:
+    """
+    This worker's copy of the RevokedToken table (migration v007).
+
+    Every worker reads the rows added since its last refresh (by revocation_id)
+    at most once per `ttl` seconds, so a token revoked through any worker is
+    rejected everywhere within `ttl`, and in the revoking worker at once. Only
+    one thread refreshes at a time; the others keep using the current copy. A
+    failed refresh keeps the copy and is retried after `ttl`.
+    """
+
+    def __init__(self, load, ttl=5.0):
+        self.load = load
+        self.ttl = ttl
+        self._revoked = {}
+        self._last_id = 0
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.rejected = 0
+
+    def _stale(self):
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.ttl
+
+    def refresh(self, force=False):
+        if not (force or self._stale()) or not self._lock.acquire(blocking=False):
+            return
+        try:
+            if not (force or self._stale()):
+                return
+            self._refreshed_at = time.monotonic()
+            try:
+                rows = self.load(self._last_id)
+            except Exception as e:
+                self.refresh_errors += 1
+                diagnostics.warning("token_revocations.refresh_failed", error=str(e))
+                return
+            self.refreshes += 1
+            now = time.time()
+            revoked = {d: exp for d, exp in self._revoked.items() if exp is None or exp > now}
+            for row in rows:
+                revoked[bytes(row["digest"])] = row["expires_at"]
+                self._last_id = max(self._last_id, row["revocation_id"])
+            self._revoked = revoked
+        finally:
+            self._lock.release()
+
+    def add(self, digest, exp=None):
+        """Reject `digest` in this worker right away (the row itself is written by revoke_token)."""
+        with self._lock:
+            self._revoked = {**self._revoked, digest: exp}
+
+    def is_revoked(self, digest):
+        self.refresh()
+        if digest in self._revoked:
+            self.rejected += 1
+            return True
+        return False
+
+    def stats(self):
+        return {
+            "size": len(self._revoked),
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "rejected": self.rejected,
+        }
+
+
+def _load_revocations(app):
+    def load(after_id):
+        with get_db_pool(app).acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_REVOKED_SINCE_SQL, (after_id,))
+            return cursor.fetchall()
+    return load
+
+
+def get_revocation_list(app=None):
+    app = app or current_app
+    revocations = app.extensions.get("token_revocations")
+    if revocations is None:
+        revocations = app.extensions.setdefault(
+            "token_revocations",
+            RevocationList(_load_revocations(app), app.config.get("TOKEN_REVOCATION_TTL", 5.0)),
+        )
+    return revocations
+
+
+def get_token_cache(app=None):
+    app = app or current_app
+    cache = app.extensions.get("token_cache")
+    if cache is None:
+        cache = app.extensions.setdefault(
+            "token_cache", TokenCache(app.config.get("TOKEN_CACHE_SIZE", 10000))
+        )
+    return cache
+
+
+def _decode_token(token):
     secret = current_app.config["SECRET_KEY"]
     try:
-        payload = jwt.decode(token, secret, algorithms=["HS256"])
-        return payload
+        return jwt.decode(token, secret, algorithms=["HS256"])
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
 
+# Verify JWT token (signature checked once per token, then served from the cache)
+def verify_token(token):
+    cache = get_token_cache()
+    digest = TokenCache.digest(token)
+    if get_revocation_list().is_revoked(digest):
+        metrics.record_jwt_verification("revoked")
+        return None
+    payload = cache.get(digest)
+    if payload is None:
+        payload = _decode_token(token)
+        if payload is None:
+            metrics.record_jwt_verification("invalid")
+            return None
+        cache.put(digest, payload)
+        metrics.record_jwt_verification("verified")
+    else:
+        metrics.record_jwt_verification("cached")
+    return dict(payload)
+
+
+# Revoke a verified token for every worker; the row commits with the caller's transaction
+def revoke_token(cursor, token, payload):
+    digest = TokenCache.digest(token)
+    cursor.execute(_REVOKE_SQL, (digest, payload.get("account_id"), payload.get("exp")))
+    cursor.execute(_PRUNE_REVOKED_SQL)
+    return digest
+
+
+def bearer_token():
+    """The token of an "Authorization: Bearer <token>" header, or None."""
+    parts = request.headers.get("Authorization", "").split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return None
+    return parts[1]
+
+
 def login_required(role=None):
     """
     Decorator to enforce that a valid JWT is present in the Authorization header.
@@ -45,15 +280,13 @@ def login_required(role=None):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            auth_header = request.headers.get("Authorization", "")
-            parts = auth_header.split()
-            if len(parts) != 2 or parts[0].lower() != "bearer":
+            token = bearer_token()
+            if token is None:
                 return (
                     jsonify({"success": False, "message": "Authorization header missing or invalid"}),
                     401,
                 )
 
-            token = parts[1]
             payload = verify_token(token)
             if not payload:
                 return jsonify({"success": False, "message": "Invalid or expired token"}), 401
@@ -0,0 +1,201 @@
+"""
+Physician availability from an in-memory index of booked slots.
+
+Each physician's agenda is a sorted list of the slot numbers held by active
+appointments (Appointment.active_slot, migration v006) over a window of days,
+loaded with one range read of uq_appointment_physician_active_slot. Free
+slots are then the working-hours slots of the requested days that are not in
+the list, found by bisection: no query per candidate slot, and no query at
+all while the window is cached. Bookings, cancellations, status changes and
+follow-ups in this worker drop the physician's agenda once they commit
+(db_utils.after_commit, so a concurrent read cannot cache the old agenda
+again before the write is visible); writes through other workers show up
+after AVAILABILITY_TTL, and a booking made from a stale view is still
+refused by the unique index (with fresh suggestions).
+"""
+import bisect
+import datetime
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+
+from utils import booking
+from utils.pagination import QueryParamError
+
+# The Physician row is read with the slots so unknown physicians need no extra query.
+_AGENDA_SQL = """
+    SELECT p.account_id, a.active_slot
+    FROM Physician p
+    LEFT JOIN Appointment a
+        ON a.physician_id = p.account_id AND a.active_slot >= %s AND a.active_slot < %s
+    WHERE p.account_id = %s
+    ORDER BY a.active_slot
+"""
+
+
+class UnknownPhysicianError(LookupError):
+    """The physician id does not reference a Physician (answered with a 404)."""
+
+
+class Agenda:
+    """Booked slot numbers of one physician within [first_slot, end_slot)."""
+
+    __slots__ = ("first_slot", "end_slot", "slots")
+
+    def __init__(self, first_slot, end_slot, slots):
+        self.first_slot = first_slot
+        self.end_slot = end_slot
+        self.slots = slots
+
+    def covers(self, first_slot, end_slot):
+        return self.first_slot <= first_slot and end_slot <= self.end_slot
+
+    def __contains__(self, slot):
+        i = bisect.bisect_left(self.slots, slot)
+        return i < len(self.slots) and self.slots[i] == slot
+
+    def __len__(self):
+        return len(self.slots)
+
+
+class AvailabilityIndex:
+    """
+    Per-process LRU cache of physician agendas.
+
+    An agenda is loaded for at least `window_days` from the first day asked
+    for, so browsing the next weeks is served from memory; a request outside
+    the cached window reloads it. Entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, ttl=30.0, max_size=5000, window_days=42):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.window_days = window_days
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, physician_id, first_slot, end_slot):
+        with self._lock:
+            entry = self._entries.get(physician_id)
+            if entry is None:
+                return None
+            agenda, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[physician_id]
+                return None
+            if not agenda.covers(first_slot, end_slot):
+                return None
+            self._entries.move_to_end(physician_id)
+            return agenda
+
+    def _load(self, cursor, physician_id, first_slot, end_slot):
+        cursor.execute(_AGENDA_SQL, (first_slot, end_slot, physician_id))
+        rows = cursor.fetchall()
+        if not rows:
+            raise UnknownPhysicianError(f"Physician {physician_id} not found")
+        agenda = Agenda(first_slot, end_slot, [r["active_slot"] for r in rows if r["active_slot"] is not None])
+        if self.max_size > 0:
+            with self._lock:
+                self._entries[physician_id] = (agenda, time.monotonic() + self.ttl)
+                self._entries.move_to_end(physician_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return agenda
+
+    def agenda(self, cursor, physician_id, start, end, minutes):
+        """The physician's agenda covering [start, end); at most one query."""
+        first_slot = booking.slot_of(start, minutes)
+        end_slot = -(-int((end - booking.SLOT_EPOCH).total_seconds() // 60) // minutes)
+        agenda = self._cached(physician_id, first_slot, end_slot)
+        if agenda is not None:
+            self.hits += 1
+            return agenda
+        self.misses += 1
+        window_end = booking.slot_of(start + datetime.timedelta(days=self.window_days), minutes)
+        return self._load(cursor, physician_id, first_slot, max(end_slot, window_end))
+
+    def invalidate(self, *physician_ids):
+        """Drop the given physicians' agendas (every agenda when called without ids)."""
+        with self._lock:
+            if not physician_ids:
+                self._entries.clear()
+            for physician_id in physician_ids:
+                self._entries.pop(physician_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def get_availability_index(app=None):
+    app = app or current_app
+    index = app.extensions.get('availability_index')
+    if index is None:
+        index = app.extensions.setdefault('availability_index', AvailabilityIndex(
+            ttl=app.config.get('AVAILABILITY_TTL', 30.0),
+            max_size=app.config.get('AVAILABILITY_CACHE_SIZE', 5000),
+            window_days=app.config.get('AVAILABILITY_WINDOW_DAYS', 42),
+        ))
+    return index
+
+
+def free_slots(cursor, physician_id, start, end, limit=None, app=None):
+    """Start times of the physician's free slots in [start, end), at most `limit` of them."""
+    app = app or current_app
+    if start >= end:
+        return []
+    minutes = booking.SLOT_MINUTES
+    agenda = get_availability_index(app).agenda(cursor, int(physician_id), start, end, minutes)
+    found = []
+    for begins in booking.free_slots(agenda, start, end, minutes, booking.working_hours(app)):
+        found.append(begins)
+        if len(found) == limit:
+            break
+    return found
+
+
+def next_free_slots(cursor, physician_id, after, count=3, horizon_days=14, app=None):
+    """Up to `count` free slots after `after`, e.g. to suggest when a booking hits a taken slot."""
+    return free_slots(cursor, physician_id, after, after + datetime.timedelta(days=horizon_days), count, app)
+
+
+def invalidate_availability(*physician_ids, app=None):
+    """Invalidation hook for writes that book, free or move a slot; register it with after_commit()."""
+    get_availability_index(app).invalidate(*(int(p) for p in physician_ids))
+
+
+def _date_arg(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise QueryParamError(f"{name} must be YYYY-MM-DD")
+
+
+def availability_params(now=None):
+    """
+    `from` and `to` (inclusive days, default today and the following 6 days) as
+    a [start, end) datetime range; slots that have already begun are excluded.
+    """
+    now = now or datetime.datetime.now()
+    first = _date_arg('from', now.date())
+    last = _date_arg('to', first + datetime.timedelta(days=6))
+    if first > last:
+        raise QueryParamError("from must not be after to")
+    max_days = current_app.config.get('AVAILABILITY_MAX_DAYS', 31)
+    if (last - first).days >= max_days:
+        raise QueryParamError(f"at most {max_days} days per request")
+    start = max(datetime.datetime.combine(first, datetime.time()), now.replace(microsecond=0))
+    end = datetime.datetime.combine(last + datetime.timedelta(days=1), datetime.time())
+    return first, last, start, end
@@ -0,0 +1,133 @@
+"""
+Slot-based appointment booking.
+
+Appointments occupy fixed slots of SLOT_MINUTES. Migration v006
+derives Appointment.active_slot (the slot number, NULL once cancelled) and a
+UNIQUE (physician_id, active_slot) index, so a booking is one INSERT: MySQL
+itself refuses the second active appointment in a slot, however many requests
+race for it, and the loser gets a SlotUnavailableError (the free slots to
+offer instead come from utils/availability.py).
+"""
+import datetime
+
+import pymysql
+from flask import current_app
+from pymysql.constants import ER
+
+# Slot numbers count SLOT_MINUTES steps from this instant, like
+# TIMESTAMPDIFF(MINUTE, '2000-01-01 00:00:00', date) DIV 30 in v006. The slot
+# length is part of the stored generated column, so it is not configurable:
+# changing it takes a migration that redefines active_slot.
+SLOT_EPOCH = datetime.datetime(2000, 1, 1)
+SLOT_MINUTES = 30
+
+INSERT_SQL = """
+    INSERT INTO Appointment (patient_id, physician_id, date, status, reason, notes)
+    VALUES (%s, %s, %s, 'Pending', %s, %s)
+"""
+
+
+class SlotUnavailableError(Exception):
+    """The physician already has an active appointment in the requested slot."""
+
+    def __init__(self, physician_id, slot):
+        super().__init__("This physician already has an appointment at this time. Please choose a different time.")
+        self.physician_id = physician_id
+        self.slot = slot
+
+
+class UnknownPhysicianError(ValueError):
+    """physician_id does not reference a Physician."""
+
+
+def is_slot_conflict(error):
+    """Whether a write on Appointment failed on uq_appointment_physician_active_slot."""
+    return isinstance(error, pymysql.err.IntegrityError) and bool(error.args) and error.args[0] == ER.DUP_ENTRY
+
+
+def slot_of(when, minutes=SLOT_MINUTES):
+    return int((when - SLOT_EPOCH).total_seconds() // 60) // minutes
+
+
+def slot_start(slot, minutes=SLOT_MINUTES):
+    return SLOT_EPOCH + datetime.timedelta(minutes=slot * minutes)
+
+
+def parse_time(value):
+    """
+    Appointment start from "YYYY-MM-DD HH:MM[:SS]" (or ISO 8601 with a T).
+
+    Raises ValueError unless the time is the start of a slot: a 10:20 visit
+    would run into the 10:30 slot, which is still offered as free.
+    """
+    if not isinstance(value, str):
+        raise ValueError("date must be a string like 2025-01-31 14:30:00")
+    try:
+        when = datetime.datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError("date must be a string like 2025-01-31 14:30:00")
+    # DATETIME has no zone: keep the wall-clock time the client sent.
+    when = when.replace(tzinfo=None)
+    check_slot_start(when)
+    return when
+
+
+def check_slot_start(when):
+    if when != slot_start(slot_of(when)):
+        raise ValueError(f"date must be the start of a {SLOT_MINUTES}-minute slot (e.g. 14:00:00 or 14:30:00)")
+
+
+def _clock(value):
+    hours, minutes = value.split(":")
+    return datetime.time(int(hours), int(minutes))
+
+
+def working_hours(app=None):
+    """(first slot start, end of day) from APPOINTMENT_DAY_START / APPOINTMENT_DAY_END ("HH:MM")."""
+    config = (app or current_app).config
+    return _clock(config.get('APPOINTMENT_DAY_START', '09:00')), _clock(config.get('APPOINTMENT_DAY_END', '17:00'))
+
+
+def free_slots(taken, start, end, minutes, hours):
+    """
+    Yield the start times of free slots within working hours, from the first
+    slot beginning at or after `start` up to `end` (exclusive). `taken` is a
+    container of occupied slot numbers.
+    """
+    day_start, day_end = hours
+    day = start.date()
+    while True:
+        opens = max(datetime.datetime.combine(day, day_start), start)
+        closes = min(datetime.datetime.combine(day, day_end), end)
+        if datetime.datetime.combine(day, day_start) >= end:
+            return
+        slot = -(-int((opens - SLOT_EPOCH).total_seconds() // 60) // minutes)   # first slot starting >= opens
+        while True:
+            begins = slot_start(slot, minutes)
+            if begins + datetime.timedelta(minutes=minutes) > closes:
+                break
+            if slot not in taken:
+                yield begins
+            slot += 1
+        day += datetime.timedelta(days=1)
+
+
+def book(cursor, patient_id, physician_id, when, reason, notes=""):
+    """
+    Reserve the slot starting at `when` with a single INSERT.
+
+    Returns the new appointment_id. Raises SlotUnavailableError when the slot
+    is taken (the failed INSERT leaves the transaction usable),
+    UnknownPhysicianError when physician_id is not a physician and ValueError
+    when `when` is not the start of a slot.
+    """
+    check_slot_start(when)
+    try:
+        cursor.execute(INSERT_SQL, (patient_id, physician_id, when, reason, notes))
+    except pymysql.err.IntegrityError as e:
+        if is_slot_conflict(e):
+            raise SlotUnavailableError(physician_id, slot_of(when))
+        if e.args and e.args[0] == ER.NO_REFERENCED_ROW_2:
+            raise UnknownPhysicianError("Unknown physician_id")
+        raise
+    return cursor.lastrowid
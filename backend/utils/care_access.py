@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+_PANEL_SQL = "SELECT patient_id FROM PhysicianPatient WHERE physician_id = %s"
+
+
+class CareAccessCache:
+    """
+    Per-process LRU cache of each physician's patient panel (frozenset of patient ids).
+
+    A physician may see a patient once they share an appointment, which is
+    exactly a PhysicianPatient row. Grants are served from the cache for `ttl`
+    seconds; a patient missing from a cached panel triggers one reload before
+    access is denied, so appointments booked through another worker are never
+    refused. Bookings and cancellations in this worker call invalidate().
+    """
+
+    def __init__(self, ttl=60.0, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _cached(self, physician_id):
+        with self._lock:
+            entry = self._entries.get(physician_id)
+            if entry is None:
+                return None
+            panel, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[physician_id]
+                return None
+            self._entries.move_to_end(physician_id)
+            return panel
+
+    def _load(self, cursor, physician_id):
+        cursor.execute(_PANEL_SQL, (physician_id,))
+        panel = frozenset(row["patient_id"] for row in cursor.fetchall())
+        if self.max_size > 0:
+            with self._lock:
+                self._entries[physician_id] = (panel, time.monotonic() + self.ttl)
+                self._entries.move_to_end(physician_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return panel
+
+    def allowed(self, cursor, physician_id, patient_ids):
+        """The subset of patient_ids the physician may see; at most one query."""
+        wanted = set(patient_ids)
+        panel = self._cached(physician_id)
+        if panel is not None and wanted <= panel:
+            self.hits += 1
+            return wanted
+        if panel is None:
+            self.misses += 1
+        else:
+            self.reloads += 1
+        return wanted & self._load(cursor, physician_id)
+
+    def invalidate(self, *physician_ids):
+        """Drop the given physicians' panels (every panel when called without ids)."""
+        with self._lock:
+            if not physician_ids:
+                self._entries.clear()
+            for physician_id in physician_ids:
+                self._entries.pop(physician_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+            }
+
+
+def get_care_access_cache(app=None):
+    app = app or current_app
+    cache = app.extensions.get('care_access_cache')
+    if cache is None:
+        cache = app.extensions.setdefault('care_access_cache', CareAccessCache(
+            ttl=app.config.get('CARE_ACCESS_TTL', 60.0),
+            max_size=app.config.get('CARE_ACCESS_CACHE_SIZE', 10000),
+        ))
+    return cache
+
+
+def can_access(cursor, physician_id, patient_id):
+    """Whether the physician shares at least one appointment with the patient."""
+    return bool(get_care_access_cache().allowed(cursor, int(physician_id), [int(patient_id)]))
+
+
+def accessible_patients(cursor, physician_id, patient_ids):
+    """Bulk form of can_access(): the subset of patient_ids the physician may see."""
+    return get_care_access_cache().allowed(cursor, int(physician_id), [int(p) for p in patient_ids])
+
+
+def invalidate_access(*physician_ids, app=None):
+    """Invalidation hook for booking or cancelling an appointment; register it with after_commit()."""
+    get_care_access_cache(app).invalidate(*(int(p) for p in physician_ids))
@@ -0,0 +1,302 @@
+import os
+import threading
+import time
+from collections import deque
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no connection could be checked out before the pool timeout."""
+
+
+class _PoolEntry:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    Thin proxy around a raw PyMySQL connection checked out from a ConnectionPool.
+
+    Behaves like the underlying connection (cursor(), commit(), rollback(), ...)
+    except that close() hands the connection back to the pool instead of
+    tearing down the socket.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    @property
+    def raw(self):
+        if self._entry is None:
+            raise pymysql.err.InterfaceError("connection already returned to the pool")
+        return self._entry.conn
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self.raw.cursor(*args, **kwargs)
+        wrapper = self._pool.cursor_wrapper
+        return cursor if wrapper is None else wrapper(cursor)
+
+    def close(self):
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+
+    def invalidate(self):
+        """Drop the underlying connection instead of returning it to the pool."""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry, discard=True)
+
+    @property
+    def closed(self):
+        return self._entry is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Never leak a pool slot because a handler forgot to close().
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of PyMySQL connections.
+
+    - min_size connections are kept around even when idle
+    - at most max_size connections exist at once; further checkouts wait up to
+      `timeout` seconds and then raise PoolExhaustedError
+    - connections older than max_lifetime or idle longer than idle_timeout are closed
+    - connections idle longer than ping_interval are pinged before being handed out
+    - on return, any open transaction is rolled back and autocommit is restored
+    - cursor_wrapper, when set, wraps every cursor handed out (query instrumentation)
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=5.0,
+                 max_lifetime=1800.0, idle_timeout=300.0, ping_interval=30.0,
+                 autocommit=False, cursor_wrapper=None):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.autocommit = autocommit
+        self.cursor_wrapper = cursor_wrapper
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+
+        # counters
+        self._checkouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._exhausted = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    # -------------------
+    # Checkout / return
+    # -------------------
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+
+        while True:
+            to_close = []
+            entry = None
+            create = False
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    to_close.extend(self._evict_idle_locked(now))
+                    while self._idle:
+                        candidate = self._idle.pop()
+                        if self._expired(candidate, now):
+                            to_close.append(self._forget_locked(candidate))
+                            continue
+                        entry = candidate
+                        break
+                    if entry is not None:
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+
+                    if not waited:
+                        waited = True
+                        self._exhausted += 1
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        self._record_wait(now - start)
+                        self._close_all(to_close)
+                        raise PoolExhaustedError(
+                            f"no database connection available after {timeout:.2f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+            self._close_all(to_close)
+
+            if create:
+                try:
+                    entry = _PoolEntry(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created += 1
+            elif not self._is_alive(entry):
+                with self._cond:
+                    dead = self._forget_locked(entry)
+                    self._cond.notify()
+                self._close_all([dead])
+                continue
+
+            with self._cond:
+                self._checkouts += 1
+                self._record_wait(time.monotonic() - start)
+            entry.last_used = time.monotonic()
+            return PooledConnection(self, entry)
+
+    def release(self, entry, discard=False):
+        conn = entry.conn
+        if not discard:
+            discard = not self._reset(conn)
+        now = time.monotonic()
+        if not discard and self._expired(entry, now):
+            discard = True
+
+        with self._cond:
+            if discard:
+                self._forget_locked(entry)
+            else:
+                entry.last_used = now
+                self._idle.append(entry)
+            self._cond.notify()
+        if discard:
+            self._close_all([conn])
+
+    # -------------------
+    # Maintenance
+    # -------------------
+    def close(self):
+        """Close all idle connections; checked-out connections are closed on return."""
+        with self._cond:
+            idle = [self._forget_locked(e) for e in list(self._idle)]
+            self._idle.clear()
+            self._closed = True
+        self._close_all(idle)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": self._checkouts,
+                "created": self._created,
+                "discarded": self._discarded,
+                "exhausted": self._exhausted,
+                "timeouts": self._timeouts,
+                "wait_time_total": round(self._wait_time_total, 6),
+                "wait_time_max": round(self._wait_time_max, 6),
+            }
+
+    # -------------------
+    # Internals
+    # -------------------
+    def _record_wait(self, waited):
+        self._wait_time_total += waited
+        if waited > self._wait_time_max:
+            self._wait_time_max = waited
+
+    def _expired(self, entry, now):
+        if self._closed:
+            return True
+        return bool(self.max_lifetime) and now - entry.created_at >= self.max_lifetime
+
+    def _evict_idle_locked(self, now):
+        evicted = []
+        if not self.idle_timeout:
+            return evicted
+        # Oldest idle entries sit at the left end of the deque.
+        while self._idle and self._size > self.min_size:
+            oldest = self._idle[0]
+            if now - oldest.last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            evicted.append(self._forget_locked(oldest))
+        return evicted
+
+    def _forget_locked(self, entry):
+        self._size -= 1
+        self._discarded += 1
+        return entry.conn
+
+    def _is_alive(self, entry):
+        if time.monotonic() - entry.last_used < self.ping_interval:
+            return True
+        try:
+            entry.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, conn):
+        """Return the connection to a clean session state; False if it is unusable."""
+        try:
+            if not conn.open:
+                return False
+            result = getattr(conn, "_result", None)
+            if result is not None and getattr(result, "unbuffered_active", False):
+                # An unread server-side result would poison the next checkout.
+                return False
+            if conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                conn.rollback()
+            if conn.get_autocommit() != self.autocommit:
+                conn.autocommit(self.autocommit)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_all(conns):
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
@@ -1,12 +1,16 @@
+import os
+import threading
+
 import pymysql
-from flask import current_app
+from flask import current_app, g, jsonify
 
-def get_db_connection():
-    """
-    Opens a raw PyMySQL DB connection using DB_PARAMS configured in create_app()
-    """
-    db_params = current_app.config['DB_PARAMS']
+from utils import diagnostics, query_stats
+from utils.db_pool import ConnectionPool, PoolExhaustedError
 
+_pool_lock = threading.Lock()
+
+
+def _connect(db_params, connect_timeout=None, read_timeout=None, write_timeout=None):
     return pymysql.connect(
         host=db_params['host'],
         port=db_params['port'],
@@ -14,5 +18,206 @@ def get_db_connection():
         password=db_params['password'],
         database=db_params['database'],
         charset=db_params['charset'],
+        connect_timeout=connect_timeout or db_params.get('connect_timeout', 10),
+        read_timeout=read_timeout,
+        write_timeout=write_timeout,
         cursorclass=pymysql.cursors.DictCursor
     )
+
+
+def get_db_pool(app=None):
+    """
+    Returns the connection pool for this worker process, creating it on first use.
+
+    The pool lives in app.extensions and is rebuilt if the process was forked
+    (e.g. gunicorn with --preload), so workers never share sockets. With
+    QUERY_STATS_ENABLED every cursor it hands out is instrumented (utils/query_stats.py).
+    """
+    app = app or current_app
+    pool = app.extensions.get('db_pool')
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+
+    with _pool_lock:
+        pool = app.extensions.get('db_pool')
+        if pool is None or pool.pid != os.getpid():
+            db_params = app.config['DB_PARAMS']
+            cursor_wrapper = query_stats.instrument if app.config.get('QUERY_STATS_ENABLED', True) else None
+            pool = ConnectionPool(lambda: _connect(db_params), cursor_wrapper=cursor_wrapper,
+                                  **app.config.get('DB_POOL', {}))
+            app.extensions['db_pool'] = pool
+    return pool
+
+
+def open_probe_connection(app, timeout):
+    """
+    Opens an unpooled connection for health probes. Connecting, and every
+    socket read and write on it, is bounded by `timeout` seconds, so a slow
+    or hung server fails the probe instead of blocking the worker.
+    """
+    return _connect(app.config['DB_PARAMS'], connect_timeout=timeout,
+                    read_timeout=timeout, write_timeout=timeout)
+
+
+def get_db_connection():
+    """
+    Checks out a PyMySQL DB connection from the per-process pool configured in create_app().
+
+    The returned object behaves like a pymysql connection; close() returns it to the pool.
+    """
+    return get_db_pool().acquire()
+
+
+# -------------------
+# Request-scoped DB session
+# -------------------
+class DBSession:
+    """
+    One pooled connection shared by every query of a unit of work.
+
+    The connection is checked out lazily on the first cursor() call. finish()
+    commits or rolls back and returns the connection to the pool; cursors handed
+    out by the session are closed at that point, and callbacks registered with
+    after_commit() run once the commit has succeeded (they are dropped on a
+    rollback). Usable as a context manager outside of requests (scripts, CLI
+    commands).
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = None
+        self._cursors = []
+        self._after_commit = []
+
+    @property
+    def connection(self):
+        if self._conn is None:
+            self._conn = self._pool.acquire()
+        return self._conn
+
+    @property
+    def active(self):
+        return self._conn is not None
+
+    def cursor(self, cursorclass=pymysql.cursors.DictCursor):
+        cursor = self.connection.cursor(cursorclass)
+        self._cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        if self._conn is not None:
+            self._conn.commit()
+
+    def rollback(self):
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def after_commit(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) after the session's transaction commits, e.g. to drop cached reads."""
+        self._after_commit.append((fn, args, kwargs))
+
+    def _run_after_commit(self, callbacks):
+        for fn, args, kwargs in callbacks:
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                # The write is committed; a failed hook must not turn the response into an error.
+                diagnostics.error("db_session.after_commit_failed", callback=getattr(fn, "__name__", repr(fn)),
+                                  error=str(e))
+
+    def detach(self):
+        """
+        Hand the session's connection over to the caller (checking one out if needed).
+
+        The request hooks will no longer touch it; the caller must close() it.
+        Used by streaming responses that keep reading after the view returns.
+        """
+        conn = self.connection
+        self._conn = None
+        for cursor in self._cursors:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        self._cursors = []
+        return conn
+
+    def finish(self, commit=True):
+        conn, self._conn = self._conn, None
+        cursors, self._cursors = self._cursors, []
+        callbacks, self._after_commit = self._after_commit, []
+        if conn is None:
+            if commit:
+                self._run_after_commit(callbacks)
+            return
+        try:
+            for cursor in cursors:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            if commit:
+                conn.commit()
+            else:
+                conn.rollback()
+        except Exception:
+            conn.invalidate()
+            raise
+        else:
+            conn.close()
+        if commit:
+            self._run_after_commit(callbacks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(commit=exc_type is None)
+
+
+def get_db_session():
+    """Returns the DBSession bound to the current request (created on first use)."""
+    if 'db_session' not in g:
+        g.db_session = DBSession(get_db_pool())
+    return g.db_session
+
+
+def get_cursor(cursorclass=pymysql.cursors.DictCursor):
+    """Returns a cursor on the request's shared connection (DictCursor by default)."""
+    return get_db_session().cursor(cursorclass)
+
+
+def after_commit(fn, *args, **kwargs):
+    """Defer fn(*args, **kwargs) until the request's transaction has committed (never runs on a rollback)."""
+    get_db_session().after_commit(fn, *args, **kwargs)
+
+
+def init_app(app):
+    """
+    Registers the request hooks for the request-scoped DB session.
+
+    - responses with a status < 400 commit, everything else rolls back
+    - on unhandled exceptions the teardown hook rolls back
+    - the connection always goes back to the pool at teardown
+    """
+
+    @app.after_request
+    def _finish_db_session(response):
+        session = g.pop('db_session', None)
+        if session is not None:
+            session.finish(commit=response.status_code < 400)
+        return response
+
+    @app.teardown_request
+    def _release_db_session(exc):
+        session = g.pop('db_session', None)
+        if session is not None:
+            try:
+                session.finish(commit=False)
+            except Exception:
+                # finish() already discarded the broken connection
+                pass
+
+    @app.errorhandler(PoolExhaustedError)
+    def _pool_exhausted(e):
+        return jsonify({"success": False, "message": "Database is busy, please retry"}), 503
@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import random
+
+from flask import current_app, g, has_app_context, has_request_context, request
+
+logger = logging.getLogger("mediflow.diagnostics")
+
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+DIAGNOSTICS_HEADER = "X-Diagnostics"
+
+
+def init_app(app):
+    """
+    Reads the diagnostics settings into app.config and wires the log handler.
+
+    - DIAGNOSTICS_LEVEL: baseline level for every request, and the level outside
+      requests (CLI commands, startup) (default "warning")
+    - DIAGNOSTICS_SAMPLE_RATE: fraction of requests traced at debug level (default 0)
+    - DIAGNOSTICS_ROUTES: comma separated endpoints always traced at debug level,
+      e.g. "patient_bp.dashboard,physician_bp.healthRecord"
+    - DIAGNOSTICS_ALLOW_HEADER: when true, a request can opt in with
+      "X-Diagnostics: debug" (or any other level name)
+    """
+    app.config.setdefault('DIAGNOSTICS_LEVEL', os.getenv('DIAGNOSTICS_LEVEL', 'warning').lower())
+    app.config.setdefault('DIAGNOSTICS_SAMPLE_RATE', float(os.getenv('DIAGNOSTICS_SAMPLE_RATE', '0')))
+    app.config.setdefault('DIAGNOSTICS_ROUTES', frozenset(
+        r.strip() for r in os.getenv('DIAGNOSTICS_ROUTES', '').split(',') if r.strip()
+    ))
+    app.config.setdefault('DIAGNOSTICS_ALLOW_HEADER',
+                          os.getenv('DIAGNOSTICS_ALLOW_HEADER', '').lower() in ('1', 'true', 'yes'))
+
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+    logger.propagate = False
+
+
+def _request_level():
+    """Effective level for the current request, decided once and cached on flask.g."""
+    level = g.get('_diagnostics_level')
+    if level is not None:
+        return level
+
+    config = current_app.config
+    level = LEVELS.get(config.get('DIAGNOSTICS_LEVEL', 'warning'), logging.WARNING)
+    if request.endpoint in config.get('DIAGNOSTICS_ROUTES', ()):
+        level = logging.DEBUG
+    elif config.get('DIAGNOSTICS_ALLOW_HEADER') and DIAGNOSTICS_HEADER in request.headers:
+        level = min(level, LEVELS.get(request.headers[DIAGNOSTICS_HEADER].lower(), logging.DEBUG))
+    else:
+        rate = config.get('DIAGNOSTICS_SAMPLE_RATE', 0)
+        if rate and random.random() < rate:
+            level = logging.DEBUG
+
+    g._diagnostics_level = level
+    return level
+
+
+def _ambient_level():
+    """Level outside a request: the app's DIAGNOSTICS_LEVEL, or None (off) without an app or a known level."""
+    if not has_app_context():
+        return None
+    return LEVELS.get(current_app.config.get('DIAGNOSTICS_LEVEL'))
+
+
+def enabled(level="debug"):
+    """True when an event at `level` would be emitted for the current request (or app context)."""
+    current = _request_level() if has_request_context() else _ambient_level()
+    return current is not None and LEVELS[level] >= current
+
+
+def emit(level, event, **fields):
+    """Emit one structured (JSON) diagnostics event if the request's level allows it."""
+    if not enabled(level):
+        return
+    record = {"event": event}
+    if has_request_context():
+        record["endpoint"] = request.endpoint
+        record["method"] = request.method
+        user = g.get('current_user')
+        if user:
+            record["account_id"] = user.get("account_id")
+    record.update(fields)
+    # enabled() already applied the request's level, so skip the logger's own threshold.
+    logger.handle(logger.makeRecord(logger.name, LEVELS[level], __file__, 0,
+                                    json.dumps(record, default=str), None, None))
+
+
+def debug(event, **fields):
+    emit("debug", event, **fields)
+
+
+def info(event, **fields):
+    emit("info", event, **fields)
+
+
+def warning(event, **fields):
+    emit("warning", event, **fields)
+
+
+def error(event, **fields):
+    emit("error", event, **fields)
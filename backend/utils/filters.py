@@ -0,0 +1,130 @@
+"""
+Whitelisted query-string filters for the listing endpoints.
+
+Each endpoint declares the filters it accepts; every one maps to a fixed,
+parameterized predicate on an indexed column (or a residual predicate inside
+that index range). Only declared filters are read: a bad value or a repeated
+filter is a 400, while other query parameters (cache busters, tracing
+parameters) are ignored and reported as a diagnostics event.
+"""
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import request
+
+from utils import diagnostics
+from utils.pagination import QueryParamError
+
+# Parameters owned by pagination / streaming / formats, accepted everywhere.
+COMMON_PARAMS = ("limit", "cursor", "stream")
+APPOINTMENT_STATUSES = ("Pending", "Completed", "Cancelled")
+
+
+def _date(name, value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise QueryParamError(f"{name} must be YYYY-MM-DD")
+
+
+def _day_after(name, value):
+    return _date(name, value) + datetime.timedelta(days=1)
+
+
+def _number(name, value):
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise QueryParamError(f"{name} must be a number")
+    if not number.is_finite():
+        raise QueryParamError(f"{name} must be a number")
+    return number
+
+
+def _id(name, value):
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryParamError(f"{name} must be an integer")
+
+
+def _statuses(name, value):
+    statuses = [s.strip().capitalize() for s in value.split(",") if s.strip()]
+    unknown = [s for s in statuses if s not in APPOINTMENT_STATUSES]
+    if not statuses or unknown:
+        raise QueryParamError(f"{name} must be one or more of: {', '.join(APPOINTMENT_STATUSES)}")
+    return tuple(dict.fromkeys(statuses))
+
+
+class Filter:
+    """`?param=value` -> `sql` with the converted value(s) bound to its placeholder."""
+
+    def __init__(self, param, sql, convert):
+        self.param = param
+        self.sql = sql
+        self.convert = convert
+
+    def clause(self, raw):
+        value = self.convert(self.param, raw)
+        if isinstance(value, tuple):
+            return self.sql.format(placeholders=", ".join(["%s"] * len(value))), value
+        return self.sql, (value,)
+
+
+def parse_filters(filters):
+    """
+    Read the whitelisted filters from the query string.
+
+    Returns (sql, params) where sql is "" or a string of "AND ..." predicates to
+    append to the endpoint's WHERE clause. Invalid or repeated filter values
+    raise QueryParamError; parameters that are not filters are left alone.
+    """
+    by_param = {f.param: f for f in filters}
+    ignored = sorted(set(request.args) - set(by_param) - set(COMMON_PARAMS))
+    if ignored:
+        diagnostics.debug("filters.ignored_params", params=ignored)
+
+    clauses = []
+    params = []
+    for param, f in by_param.items():
+        values = request.args.getlist(param)
+        if not values:
+            continue
+        if len(values) > 1:
+            raise QueryParamError(f"{param} may only be given once")
+        sql, bound = f.clause(values[0])
+        clauses.append(sql)
+        params.extend(bound)
+    return "".join(f" AND {c}" for c in clauses), tuple(params)
+
+
+def activity_log_filters(alias=""):
+    """Filters of the activity log listings; date bounds are a range on idx_activitylog_patient_date_bp."""
+    col = f"{alias}." if alias else ""
+    return [
+        Filter("from", f"{col}log_date >= %s", _date),
+        Filter("to", f"{col}log_date <= %s", _date),
+        Filter("min_weight", f"{col}weight >= %s", _number),
+        Filter("max_weight", f"{col}weight <= %s", _number),
+        Filter("min_calories", f"{col}calories >= %s", _number),
+        Filter("max_calories", f"{col}calories <= %s", _number),
+        Filter("min_systolic", f"{col}bp_systolic >= %s", _number),
+        Filter("max_systolic", f"{col}bp_systolic <= %s", _number),
+        Filter("min_diastolic", f"{col}bp_diastolic >= %s", _number),
+        Filter("max_diastolic", f"{col}bp_diastolic <= %s", _number),
+    ]
+
+
+def appointment_filters(counterpart):
+    """
+    Filters of the appointment listings (alias `a`). `counterpart` is the other
+    party of the caller: "physician" for patients, "patient" for physicians;
+    filtering by it turns the scan into one range of
+    idx_appointment_physician_patient_date.
+    """
+    return [
+        Filter("from", "a.date >= %s", _date),
+        Filter("to", "a.date < %s", _day_after),
+        Filter("status", "a.status IN ({placeholders})", _statuses),
+        Filter(counterpart, f"a.{counterpart}_id = %s", _id),
+    ]
@@ -0,0 +1,94 @@
+import contextlib
+import datetime
+import os
+import threading
+import time
+
+from flask import current_app
+
+from utils.db_utils import get_db_pool, open_probe_connection
+
+_check_lock = threading.Lock()
+
+
+def _pool_report(pool):
+    stats = pool.stats()
+    return {
+        "size": stats["size"],
+        "in_use": stats["in_use"],
+        "idle": stats["idle"],
+        "max_size": stats["max_size"],
+        "saturation": round(stats["in_use"] / stats["max_size"], 3),
+        "exhausted": stats["exhausted"],
+        "timeouts": stats["timeouts"],
+    }
+
+
+def check_database(pool, connect):
+    """
+    One readiness probe: fail fast if every pooled connection is checked out,
+    then time a SELECT 1 round trip on a dedicated connection from `connect`,
+    which must bound connecting and every socket read and write by the probe
+    timeout (see db_utils.open_probe_connection). The probe never takes a connection
+    from the pool, so it cannot starve requests or open one with the pool's
+    own connect timeout.
+
+    Returns (ready, report).
+    """
+    report = {"checked_at": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z"}
+    report["pool"] = _pool_report(pool)
+    if report["pool"]["in_use"] >= report["pool"]["max_size"]:
+        report["db"] = {"ok": False, "error": "pool exhausted"}
+        return False, report
+
+    started = time.perf_counter()
+    conn = None
+    try:
+        conn = connect()
+        connected = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+    except Exception as e:
+        report["db"] = {"ok": False, "error": str(e),
+                        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+        return False, report
+    finally:
+        if conn is not None:
+            with contextlib.suppress(Exception):
+                conn.close()
+    done = time.perf_counter()
+
+    report["db"] = {
+        "ok": True,
+        "connect_ms": round((connected - started) * 1000, 3),
+        "latency_ms": round((done - connected) * 1000, 3),
+    }
+    return True, report
+
+
+def readiness(app=None):
+    """
+    Cached readiness result for this worker: (ready, report).
+
+    Probes within HEALTH_READY_CACHE_TTL seconds of the last check reuse its
+    result, and concurrent probes wait for the one check in flight, so
+    orchestrator polling costs MySQL at most one short-lived connection and
+    SELECT 1 per window per worker.
+    """
+    app = app or current_app
+    ttl = app.config.get('HEALTH_READY_CACHE_TTL', 2.0)
+    cached = app.extensions.get('readiness')
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1], dict(cached[2], cached=True)
+
+    with _check_lock:
+        cached = app.extensions.get('readiness')
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1], dict(cached[2], cached=True)
+        timeout = app.config.get('HEALTH_READY_TIMEOUT', 1.0)
+        ready, report = check_database(get_db_pool(app), lambda: open_probe_connection(app, timeout))
+        report["pid"] = os.getpid()
+        app.extensions['readiness'] = (time.monotonic() + ttl, ready, report)
+    return ready, dict(report, cached=False)
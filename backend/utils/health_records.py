@@ -0,0 +1,179 @@
+from flask import request
+
+from utils.pagination import QueryParamError
+
+RECORD_FORMATS = ("flat", "nested")
+
+# Only these columns may scope a record lookup to its owner.
+_OWNER_COLUMNS = ("patient_id", "physician_id")
+
+_HEADER_SQL = """
+    SELECT h.record_id, h.patient_id, h.physician_id, h.visit_date, h.diagnosis, h.symptoms,
+           h.lab_results, h.follow_up_required,
+           CONCAT(a.first_name,' ', a.last_name) AS physician_name
+    FROM HealthRecord h
+    INNER JOIN Account a ON a.account_id = h.physician_id
+    WHERE h.{owner} = %s AND h.record_id = %s
+"""
+
+# ?format=flat: one row per medicine, the record columns repeated on each
+FLAT_RECORD_SQL = """
+    SELECT h.record_id, h.patient_id, h.visit_date, h.diagnosis, h.symptoms,
+           h.lab_results, h.follow_up_required,
+           CONCAT(a.first_name,' ', a.last_name) AS physician_name,
+           p.prescription_id, m.medication_id, m.dosage, m.frequency,
+           m.duration, m.instructions,
+           med.medication_name, med.dosage_form, med.storage_instructions,
+           med.common_side_effects, med.description
+    FROM HealthRecord h
+    INNER JOIN Account a ON a.account_id = h.physician_id
+    LEFT JOIN Prescription p ON p.record_id = h.record_id
+    LEFT JOIN Medicine m ON m.prescription_id = p.prescription_id
+    LEFT JOIN Medications med ON med.medication_id = m.medication_id
+    WHERE h.{owner} = %s AND h.record_id = %s
+"""
+
+_MEDICINES_SQL = """
+    SELECT p.record_id, p.prescription_id, m.medication_id, m.dosage, m.frequency,
+           m.duration, m.instructions,
+           med.medication_name, med.dosage_form, med.storage_instructions,
+           med.common_side_effects, med.description
+    FROM Prescription p
+    LEFT JOIN Medicine m ON m.prescription_id = p.prescription_id
+    LEFT JOIN Medications med ON med.medication_id = m.medication_id
+    WHERE p.record_id IN ({placeholders})
+    ORDER BY p.record_id, p.prescription_id, m.medication_id
+"""
+
+
+PRESCRIPTION_FIELDS = ("medication_id", "dosage", "frequency", "duration", "instructions")
+# Medicine column widths
+_MAX_LENGTHS = {"dosage": 50, "frequency": 50, "duration": 50, "instructions": 255}
+
+_KNOWN_MEDICATIONS_SQL = "SELECT medication_id FROM Medications WHERE medication_id IN ({placeholders})"
+
+MEDICINE_INSERT_SQL = """
+    INSERT INTO Medicine
+    (prescription_id, medication_id, dosage, frequency, duration, instructions)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def record_format():
+    """`?format=flat` (default, one row per medicine) or `?format=nested`."""
+    fmt = request.args.get('format', 'flat').lower()
+    if fmt not in RECORD_FORMATS:
+        raise QueryParamError(f"format must be one of: {', '.join(RECORD_FORMATS)}")
+    return fmt
+
+
+def fetch_prescriptions(cursor, record_ids):
+    """
+    Prescriptions with their medicines for many records in one query.
+
+    Returns {record_id: [{"prescription_id": ..., "medicines": [...]}, ...]};
+    records without prescriptions are absent.
+    """
+    record_ids = list(dict.fromkeys(record_ids))
+    if not record_ids:
+        return {}
+    cursor.execute(
+        _MEDICINES_SQL.format(placeholders=", ".join(["%s"] * len(record_ids))),
+        record_ids,
+    )
+    by_record = {}
+    current = {}
+    for row in cursor.fetchall():
+        record_id = row.pop("record_id")
+        prescription_id = row.pop("prescription_id")
+        prescription = current.get(prescription_id)
+        if prescription is None:
+            prescription = current[prescription_id] = {"prescription_id": prescription_id, "medicines": []}
+            by_record.setdefault(record_id, []).append(prescription)
+        if row["medication_id"] is not None:
+            prescription["medicines"].append(row)
+    return by_record
+
+
+def get_nested_record(cursor, record_id, owner, owner_id):
+    """
+    A health record as {"record": {...}, "prescriptions": [{"prescription_id", "medicines": [...]}]}.
+
+    The record header (with its TEXT columns) is read once and the medicines in
+    one batched query, instead of repeating the header on every medicine row.
+    Returns None when the record does not exist or does not belong to owner_id.
+    """
+    if owner not in _OWNER_COLUMNS:
+        raise ValueError(f"cannot scope health records by {owner!r}")
+    cursor.execute(_HEADER_SQL.format(owner=owner), (owner_id, record_id))
+    record = cursor.fetchone()
+    if record is None:
+        return None
+    prescriptions = fetch_prescriptions(cursor, [record["record_id"]])
+    return {"record": record, "prescriptions": prescriptions.get(record["record_id"], [])}
+
+
+def _check_prescription(item):
+    if not isinstance(item, dict):
+        raise ValueError("Each prescription must be a JSON object")
+    if not all(item.get(f) for f in PRESCRIPTION_FIELDS):
+        raise ValueError("All prescription fields are required")
+    medication_id = item["medication_id"]
+    if isinstance(medication_id, bool) or not isinstance(medication_id, (int, str)):
+        raise ValueError("medication_id must be an integer")
+    try:
+        medication_id = int(medication_id)
+    except ValueError:
+        raise ValueError("medication_id must be an integer")
+    values = []
+    for field, max_length in _MAX_LENGTHS.items():
+        value = str(item[field])
+        if len(value) > max_length:
+            raise ValueError(f"{field} must be at most {max_length} characters")
+        values.append(value)
+    return (medication_id, *values)
+
+
+def validate_prescriptions(cursor, prescriptions):
+    """
+    Check every prescription item of a new health record before anything is written.
+
+    Medication ids are looked up in one IN (...) query. Returns (rows, errors):
+    rows are the (medication_id, dosage, frequency, duration, instructions)
+    values to insert, errors one {"index", "medication_id", "error"} per bad
+    item; rows are only meaningful when errors is empty.
+    """
+    if not isinstance(prescriptions, list):
+        raise ValueError("prescriptions must be a list")
+    rows = []
+    errors = []
+    seen = {}
+    for index, item in enumerate(prescriptions):
+        try:
+            row = _check_prescription(item)
+        except ValueError as e:
+            medication_id = item.get("medication_id") if isinstance(item, dict) else None
+            errors.append({"index": index, "medication_id": medication_id, "error": str(e)})
+            continue
+        if row[0] in seen:
+            # Medicine is keyed by (medication_id, prescription_id)
+            errors.append({"index": index, "medication_id": row[0],
+                           "error": f"Duplicate of prescription {seen[row[0]]}"})
+            continue
+        seen[row[0]] = index
+        rows.append((index, row))
+
+    if seen:
+        cursor.execute(_KNOWN_MEDICATIONS_SQL.format(placeholders=", ".join(["%s"] * len(seen))), list(seen))
+        known = {r["medication_id"] for r in cursor.fetchall()}
+        for index, row in rows:
+            if row[0] not in known:
+                errors.append({"index": index, "medication_id": row[0], "error": "Invalid medication_id"})
+    errors.sort(key=lambda e: e["index"])
+    return [row for _, row in rows], errors
+
+
+def insert_medicines(cursor, prescription_id, rows):
+    """All Medicine rows of a prescription in one multi-row INSERT."""
+    if rows:
+        cursor.executemany(MEDICINE_INSERT_SQL, [(prescription_id, *row) for row in rows])
@@ -0,0 +1,181 @@
+"""
+Prometheus metrics for the API.
+
+Request metrics are recorded by the hooks registered in init_app(); pool and
+cache figures are copied from their stats() counters at most once per
+METRICS_SYNC_INTERVAL seconds per worker (and on every scrape).
+
+With gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory
+before the workers start: every worker then writes its samples to mmap'ed
+files there and /api/metrics aggregates all of them, whichever worker serves
+the scrape. gunicorn.conf.py sets it (default /tmp/mediflow-metrics), wipes
+the directory on start and marks dead workers. Cache hit ratios are computed in PromQL, e.g.
+
+    sum(rate(mediflow_cache_requests_total{result="hit"}[5m])) by (cache)
+      / sum(rate(mediflow_cache_requests_total[5m])) by (cache)
+"""
+import os
+import threading
+import time
+
+from flask import Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    "mediflow_http_requests_total", "HTTP requests by route and status", ["method", "endpoint", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "mediflow_http_request_duration_seconds", "Time from request start to the last byte of the response",
+    ["method", "endpoint"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "mediflow_http_requests_in_flight", "Requests currently being served", ["method", "endpoint"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "mediflow_db_pool_connections", "Pooled MySQL connections by state", ["state"], multiprocess_mode="livesum",
+)
+DB_POOL_MAX = Gauge(
+    "mediflow_db_pool_max_connections", "Upper bound of the pool across live workers", multiprocess_mode="livesum",
+)
+DB_POOL_EVENTS = Counter(
+    "mediflow_db_pool_events_total", "Pool checkouts, connects, discards, exhaustion and timeouts", ["event"],
+)
+DB_POOL_WAIT = Counter(
+    "mediflow_db_pool_wait_seconds_total", "Time spent waiting for a pooled connection",
+)
+CACHE_REQUESTS = Counter(
+    "mediflow_cache_requests_total", "In-process cache lookups", ["cache", "result"],
+)
+CACHE_ENTRIES = Gauge(
+    "mediflow_cache_entries", "Entries held by in-process caches", ["cache"], multiprocess_mode="livesum",
+)
+JWT_VERIFICATIONS = Counter(
+    "mediflow_jwt_verifications_total",
+    "Bearer token checks: cached (no HS256), verified (signature checked), invalid, revoked", ["result"],
+)
+REVOKED_TOKENS = Gauge(
+    "mediflow_revoked_tokens", "Unexpired revoked tokens known to each worker", multiprocess_mode="liveall",
+)
+REVOCATION_REFRESHES = Counter(
+    "mediflow_token_revocation_refreshes_total", "Reads of the shared revocation list", ["result"],
+)
+
+_sync_lock = threading.Lock()
+_last_sync = 0.0
+_last_values = {}
+_last_pid = None
+
+
+def _inc_from_total(counter, key, total):
+    """Advance `counter` by how much the cumulative `total` grew since the last sync."""
+    previous = _last_values.get(key, 0)
+    delta = total - previous if total >= previous else total   # the source was reset (e.g. pool rebuilt)
+    if delta > 0:
+        counter.inc(delta)
+    _last_values[key] = total
+
+
+def sync_stats(app, force=False):
+    """Copy pool and cache counters of this worker into the Prometheus metrics."""
+    global _last_sync, _last_pid
+    now = time.monotonic()
+    if not force and now - _last_sync < app.config.get('METRICS_SYNC_INTERVAL', 1.0):
+        return
+    with _sync_lock:
+        _last_sync = now
+        if _last_pid != os.getpid():
+            # Forked from a process that already synced: its totals are not ours.
+            _last_values.clear()
+            _last_pid = os.getpid()
+
+        pool = app.extensions.get('db_pool')
+        if pool is not None and pool.pid == os.getpid():
+            stats = pool.stats()
+            DB_POOL_CONNECTIONS.labels("in_use").set(stats["in_use"])
+            DB_POOL_CONNECTIONS.labels("idle").set(stats["idle"])
+            DB_POOL_MAX.set(stats["max_size"])
+            for event in ("checkouts", "created", "discarded", "exhausted", "timeouts"):
+                _inc_from_total(DB_POOL_EVENTS.labels(event), ("pool", event), stats[event])
+            _inc_from_total(DB_POOL_WAIT, ("pool", "wait"), stats["wait_time_total"])
+
+        for cache_name, extension in (("token", "token_cache"), ("reference", "reference_cache"),
+                                      ("care_access", "care_access_cache"), ("availability", "availability_index")):
+            cache = app.extensions.get(extension)
+            if cache is None:
+                continue
+            stats = cache.stats()
+            CACHE_ENTRIES.labels(cache_name).set(stats.get("size", stats.get("entries", 0)))
+            for stat, result in (("hits", "hit"), ("misses", "miss")):
+                _inc_from_total(CACHE_REQUESTS.labels(cache_name, result), (cache_name, stat), stats[stat])
+
+        revocations = app.extensions.get('token_revocations')
+        if revocations is not None:
+            stats = revocations.stats()
+            REVOKED_TOKENS.set(stats["size"])
+            _inc_from_total(REVOCATION_REFRESHES.labels("ok"), ("revocations", "ok"), stats["refreshes"])
+            _inc_from_total(REVOCATION_REFRESHES.labels("error"), ("revocations", "error"), stats["refresh_errors"])
+
+
+def record_jwt_verification(result):
+    JWT_VERIFICATIONS.labels(result).inc()
+
+
+def _registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_response():
+    """Text exposition of every metric (all gunicorn workers in multiprocess mode)."""
+    sync_stats(current_app, force=True)
+    return Response(generate_latest(_registry()), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+def _labels():
+    return request.method, request.endpoint or "unmatched"
+
+
+def init_app(app):
+    """
+    Registers the per-request metric hooks.
+
+    - METRICS_ENABLED: record request metrics (default true)
+    - METRICS_SYNC_INTERVAL: seconds between pool/cache syncs per worker (default 1)
+    - METRICS_TOKEN: when set, /api/metrics requires "Authorization: Bearer <token>"
+    """
+    app.config.setdefault('METRICS_ENABLED', os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes'))
+    app.config.setdefault('METRICS_SYNC_INTERVAL', float(os.getenv('METRICS_SYNC_INTERVAL', '1')))
+    app.config.setdefault('METRICS_TOKEN', os.getenv('METRICS_TOKEN') or None)
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    @app.before_request
+    def _start_request_metrics():
+        g._metrics_start = time.perf_counter()
+        HTTP_IN_FLIGHT.labels(*_labels()).inc()
+
+    @app.after_request
+    def _response_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        # Teardown runs after a streamed body is complete, so the latency covers the whole response.
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        method, endpoint = _labels()
+        status = g.pop('_metrics_status', 500)
+        HTTP_IN_FLIGHT.labels(method, endpoint).dec()
+        HTTP_LATENCY.labels(method, endpoint).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(method, endpoint, str(status)).inc()
+        sync_stats(app)
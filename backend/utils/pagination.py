@@ -0,0 +1,98 @@
+import base64
+import json
+
+from flask import current_app, jsonify, request, url_for
+
+
+class QueryParamError(ValueError):
+    """Invalid query string parameter (answered with a 400)."""
+
+
+class PaginationError(QueryParamError):
+    """Invalid `limit` or `cursor` query parameter."""
+
+
+def encode_cursor(key, row_id):
+    """Opaque continuation token for the (key, id) of the last row on a page."""
+    raw = json.dumps([None if key is None else str(key), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        key, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if key is not None and not isinstance(key, str):
+            raise ValueError
+        return key, int(row_id)
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+
+class Page:
+    """
+    Keyset (seek) pagination over rows ordered by (key DESC, id DESC).
+
+    Handlers add keyset() to their WHERE clause, LIMIT the query to fetch_size and
+    hand the rows to finish(), which trims the look-ahead row and builds the
+    `next_cursor` / `next` fields of the response.
+    """
+
+    def __init__(self, limit, after=None):
+        self.limit = limit
+        self.after = after
+
+    @property
+    def fetch_size(self):
+        # One extra row tells us whether there is a next page.
+        return self.limit + 1
+
+    def keyset(self, key_col, id_col):
+        """Returns (sql, params) continuing after the cursor; ("", ()) on the first page."""
+        if self.after is None:
+            return "", ()
+        key, row_id = self.after
+        return (
+            f"AND ({key_col} < %s OR ({key_col} = %s AND {id_col} < %s))",
+            (key, key, row_id),
+        )
+
+    def finish(self, rows, key_field, id_field):
+        rows = list(rows)
+        next_cursor = None
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last[key_field], last[id_field])
+        return rows, {"next_cursor": next_cursor, "next": next_link(next_cursor, self.limit)}
+
+
+def next_link(next_cursor, limit):
+    if next_cursor is None:
+        return None
+    args = request.args.to_dict()
+    args.update(request.view_args or {})
+    args.update(cursor=next_cursor, limit=limit)
+    return url_for(request.endpoint, **args)
+
+
+def get_page():
+    """Parse `limit` and `cursor` from the query string, bounded by PAGE_SIZE_MAX."""
+    default = current_app.config.get('PAGE_SIZE_DEFAULT', 100)
+    maximum = current_app.config.get('PAGE_SIZE_MAX', 500)
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    limit = min(limit, maximum)
+
+    token = request.args.get('cursor')
+    return Page(limit, decode_cursor(token) if token else None)
+
+
+def init_app(app):
+    @app.errorhandler(QueryParamError)
+    def _bad_query_param(e):
+        return jsonify({"success": False, "message": str(e)}), 400
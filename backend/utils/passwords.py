@@ -0,0 +1,117 @@
+"""
+Password hashing with a tunable key-derivation function.
+
+Stored formats (all fit Account.password VARCHAR(100)):
+
+    scrypt$<log2 N>$<r>$<p>$<salt>$<hash>       (default)
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+    <64 hex chars>                               legacy unsalted SHA-256
+
+Salt and hash are unpadded urlsafe base64. The scheme and cost come from
+PASSWORD_HASH_SCHEME / PASSWORD_HASH_COST; cost is log2(N) for scrypt and
+the iteration count for PBKDF2. verify_password() reports whether a stored
+hash should be upgraded to the current settings.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import re
+
+from flask import current_app, has_app_context
+
+DEFAULT_SCHEME = "scrypt"
+DEFAULT_COSTS = {
+    "scrypt": 14,             # N = 16384, r = 8 -> 16 MiB per hash
+    "pbkdf2_sha256": 600000,  # OWASP 2023 recommendation for PBKDF2-HMAC-SHA256
+}
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+_LEGACY_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _settings(scheme=None, cost=None):
+    if scheme is None and has_app_context():
+        scheme = current_app.config.get("PASSWORD_HASH_SCHEME")
+        if cost is None:
+            cost = current_app.config.get("PASSWORD_HASH_COST")
+    scheme = scheme or DEFAULT_SCHEME
+    if scheme not in DEFAULT_COSTS:
+        raise ValueError(f"Unknown password hash scheme: {scheme}")
+    return scheme, int(cost or DEFAULT_COSTS[scheme])
+
+
+def _scrypt(password, salt, log_n, r, p):
+    n = 1 << log_n
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=2 * 128 * r * n, dklen=32)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations, dklen=32)
+
+
+def hash_password(password, scheme=None, cost=None):
+    scheme, cost = _settings(scheme, cost)
+    salt = os.urandom(SALT_BYTES)
+    if scheme == "scrypt":
+        digest = _scrypt(password, salt, cost, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${cost}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+    digest = _pbkdf2(password, salt, cost)
+    return f"pbkdf2_sha256${cost}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password, stored, scheme=None, cost=None):
+    """
+    Constant-time check of `password` against a stored hash.
+
+    Returns (matches, needs_rehash). needs_rehash is True for legacy SHA-256
+    hashes and for hashes made with another scheme or cost than the current one.
+    """
+    if not stored:
+        return False, False
+    scheme, cost = _settings(scheme, cost)
+
+    if _LEGACY_SHA256.match(stored):
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(candidate, stored), True
+
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            log_n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            expected = _unb64(parts[5])
+            candidate = _scrypt(password, _unb64(parts[4]), log_n, r, p)
+            current = scheme == "scrypt" and log_n == cost and r == SCRYPT_R and p == SCRYPT_P
+        elif parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            iterations = int(parts[1])
+            expected = _unb64(parts[3])
+            candidate = _pbkdf2(password, _unb64(parts[2]), iterations)
+            current = scheme == "pbkdf2_sha256" and iterations == cost
+        else:
+            return False, False
+    except (ValueError, TypeError):
+        return False, False
+
+    matches = hmac.compare_digest(candidate, expected)
+    return matches, matches and not current
+
+
+def dummy_verify(password):
+    """Burn the same CPU as a real verification so unknown usernames are not detectable by timing."""
+    scheme, cost = _settings()
+    salt = b"\0" * SALT_BYTES
+    if scheme == "scrypt":
+        _scrypt(password, salt, cost, SCRYPT_R, SCRYPT_P)
+    else:
+        _pbkdf2(password, salt, cost)
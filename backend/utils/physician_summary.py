@@ -0,0 +1,224 @@
+"""
+Per-physician dashboard projection (PhysicianDashboardSummary, migration v002).
+
+get_summary() is a primary-key read. A missing row is built from the base
+tables on first read; a stored next appointment that has slipped into the past
+is recomputed lazily. Write handlers call the on_* hooks with the request's
+cursor, so every patch commits or rolls back together with the write itself.
+"""
+import json
+
+from flask import current_app
+
+SECTIONS = ("activity_log", "prescriptions", "next_appointment")
+
+_ACTIVITY_COLUMNS = """
+    a.log_id, a.patient_id, a.log_date, a.weight, a.bp, a.bp_systolic, a.bp_diastolic, a.calories,
+    a.duration_of_physical_activity
+"""
+
+_LATEST_ACTIVITY_LOG_SQL = f"""
+    SELECT {_ACTIVITY_COLUMNS}
+    FROM ActivityLog a
+    WHERE a.patient_id IN (SELECT pp.patient_id FROM PhysicianPatient pp WHERE pp.physician_id = %s)
+    ORDER BY a.log_date DESC, a.log_id DESC
+    LIMIT 1
+"""
+
+_PRESCRIPTIONS_SQL = """
+    SELECT m.dosage, m.frequency, med.medication_name
+    FROM Medicine m
+    INNER JOIN Prescription p ON m.Prescription_id = p.prescription_id
+    INNER JOIN HealthRecord h ON p.record_id = h.record_id
+    INNER JOIN Medications med ON m.Medication_id = med.medication_id
+    WHERE h.physician_id = %s
+    ORDER BY h.visit_date DESC, h.record_id DESC
+    LIMIT %s
+"""
+
+_APPOINTMENT_COLUMNS = """
+    a.appointment_id, a.patient_id, a.date, a.status, a.reason, a.notes,
+    CONCAT(pf.first_name, ' ', pf.last_name) AS patient_name
+"""
+
+_NEXT_APPOINTMENT_SQL = f"""
+    SELECT {_APPOINTMENT_COLUMNS}
+    FROM Appointment a
+    LEFT JOIN Account pf ON a.patient_id = pf.account_id
+    WHERE a.physician_id = %s
+      AND a.status = 'Pending'
+      AND a.date >= NOW()
+    ORDER BY a.date ASC, a.appointment_id ASC
+    LIMIT 1
+"""
+
+# Offer a candidate row to stored summaries; it only wins when it sorts after (or before) the current one.
+_OFFER_ACTIVITY_LOG_SQL = """
+    UPDATE PhysicianDashboardSummary s
+    SET s.activity_log = %s, s.activity_log_date = %s, s.activity_log_id = %s
+    WHERE s.physician_id IN ({physicians})
+      AND (s.activity_log_date IS NULL OR s.activity_log_date < %s
+           OR (s.activity_log_date = %s AND s.activity_log_id < %s))
+"""
+
+_OFFER_NEXT_APPOINTMENT_SQL = """
+    UPDATE PhysicianDashboardSummary
+    SET next_appointment = %s, next_appointment_at = %s, next_appointment_id = %s
+    WHERE physician_id = %s
+      AND %s >= NOW()
+      AND (next_appointment_at IS NULL OR next_appointment_at > %s
+           OR (next_appointment_at = %s AND next_appointment_id > %s))
+"""
+
+_PATIENT_PHYSICIANS_SQL = "SELECT physician_id FROM PhysicianPatient WHERE patient_id = %s"
+
+_SUMMARY_SQL = """
+    SELECT activity_log, prescriptions, next_appointment, next_appointment_at < NOW() AS next_is_stale
+    FROM PhysicianDashboardSummary
+    WHERE physician_id = %s
+"""
+
+
+def _dumps(value):
+    # Same encoding as jsonify(), so cached and freshly computed responses look identical.
+    return None if value is None else current_app.json.dumps(value)
+
+
+def _loads(text):
+    return None if text is None else json.loads(text)
+
+
+def _compute(cursor, physician_id, section):
+    """Column values of one section, straight from the base tables."""
+    if section == "activity_log":
+        cursor.execute(_LATEST_ACTIVITY_LOG_SQL, (physician_id,))
+        log = cursor.fetchone()
+        return {
+            "activity_log": _dumps(log),
+            "activity_log_date": log["log_date"] if log else None,
+            "activity_log_id": log["log_id"] if log else None,
+        }
+    if section == "prescriptions":
+        cursor.execute(_PRESCRIPTIONS_SQL, (physician_id, current_app.config['DASHBOARD_PRESCRIPTIONS']))
+        return {"prescriptions": _dumps(cursor.fetchall())}
+    if section == "next_appointment":
+        cursor.execute(_NEXT_APPOINTMENT_SQL, (physician_id,))
+        appointment = cursor.fetchone()
+        return {
+            "next_appointment": _dumps(appointment),
+            "next_appointment_at": appointment["date"] if appointment else None,
+            "next_appointment_id": appointment["appointment_id"] if appointment else None,
+        }
+    raise ValueError(f"unknown dashboard section {section!r}")
+
+
+def refresh(cursor, physician_id, *sections):
+    """
+    Recompute sections (all by default) of a physician's summary.
+
+    A full refresh upserts the row; a partial one only touches an existing row,
+    since a missing row is rebuilt in full on the next read anyway.
+    """
+    sections = sections or SECTIONS
+    values = {}
+    for section in sections:
+        values.update(_compute(cursor, physician_id, section))
+    columns = list(values)
+    if set(sections) == set(SECTIONS):
+        cursor.execute(
+            f"""
+            INSERT INTO PhysicianDashboardSummary (physician_id, {', '.join(columns)})
+            VALUES (%s, {', '.join(['%s'] * len(columns))})
+            ON DUPLICATE KEY UPDATE {', '.join(f'{c} = VALUES({c})' for c in columns)}
+            """,
+            (physician_id, *values.values()),
+        )
+    else:
+        cursor.execute(
+            f"UPDATE PhysicianDashboardSummary SET {', '.join(f'{c} = %s' for c in columns)} WHERE physician_id = %s",
+            (*values.values(), physician_id),
+        )
+    return values
+
+
+def get_summary(cursor, physician_id):
+    """The dashboard payload: {"activity_log", "prescriptions", "next_appointment"}."""
+    cursor.execute(_SUMMARY_SQL, (physician_id,))
+    row = cursor.fetchone()
+    if row is None:
+        row = refresh(cursor, physician_id)
+    elif row["next_is_stale"]:
+        row.update(refresh(cursor, physician_id, "next_appointment"))
+    return {section: _loads(row[section]) for section in SECTIONS}
+
+
+def _offer_activity_log(cursor, log, physicians_sql, physicians_params):
+    cursor.execute(
+        _OFFER_ACTIVITY_LOG_SQL.format(physicians=physicians_sql),
+        (_dumps(log), log["log_date"], log["log_id"], *physicians_params,
+         log["log_date"], log["log_date"], log["log_id"]),
+    )
+
+
+def on_activity_log_created(cursor, log_id):
+    """A new log may become the latest one for every physician treating its patient."""
+    cursor.execute(f"SELECT {_ACTIVITY_COLUMNS} FROM ActivityLog a WHERE a.log_id = %s", (log_id,))
+    log = cursor.fetchone()
+    if log is not None:
+        _offer_activity_log(cursor, log, _PATIENT_PHYSICIANS_SQL, (log["patient_id"],))
+
+
+def on_activity_log_changed(cursor, patient_id):
+    """An edited or deleted log: recompute the activity section of the patient's physicians."""
+    cursor.execute(_PATIENT_PHYSICIANS_SQL, (patient_id,))
+    for row in cursor.fetchall():
+        refresh(cursor, row["physician_id"], "activity_log")
+
+
+def on_health_record_created(cursor, physician_id, follow_up_required=False):
+    sections = ["prescriptions"]
+    if follow_up_required:
+        # auto_followup_appointment booked a visit 30 days out.
+        sections.append("next_appointment")
+    refresh(cursor, physician_id, *sections)
+
+
+def on_appointment_booked(cursor, appointment_id):
+    """The new appointment may be the next one, and its patient's logs now count for the physician."""
+    cursor.execute(
+        f"""
+        SELECT a.physician_id, {_APPOINTMENT_COLUMNS}
+        FROM Appointment a
+        LEFT JOIN Account pf ON a.patient_id = pf.account_id
+        WHERE a.appointment_id = %s
+        """,
+        (appointment_id,),
+    )
+    appointment = cursor.fetchone()
+    if appointment is None:
+        return
+    physician_id = appointment.pop("physician_id")
+    if appointment["status"] == "Pending":
+        cursor.execute(
+            _OFFER_NEXT_APPOINTMENT_SQL,
+            (_dumps(appointment), appointment["date"], appointment_id, physician_id,
+             appointment["date"], appointment["date"], appointment["date"], appointment_id),
+        )
+
+    cursor.execute(
+        f"""
+        SELECT {_ACTIVITY_COLUMNS} FROM ActivityLog a
+        WHERE a.patient_id = %s
+        ORDER BY a.log_date DESC, a.log_id DESC
+        LIMIT 1
+        """,
+        (appointment["patient_id"],),
+    )
+    log = cursor.fetchone()
+    if log is not None:
+        _offer_activity_log(cursor, log, "%s", (physician_id,))
+
+
+def on_appointment_status_changed(cursor, physician_id):
+    """Completing, cancelling or re-opening an appointment can change the physician's next one."""
+    refresh(cursor, physician_id, "next_appointment")
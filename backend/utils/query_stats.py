@@ -0,0 +1,328 @@
+import datetime
+import functools
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, has_app_context, has_request_context, request
+
+from utils import diagnostics
+
+# Upper bounds (ms) of the per-fingerprint latency histogram buckets; the last bucket is +Inf.
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+OTHER_FINGERPRINT = "<other>"
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES = re.compile(r"\bVALUES\s*\([^()]*\)(?:\s*,\s*\([^()]*\))*", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Normalized statement text: literals and placeholders become ?, IN lists and
+    multi-row VALUES collapse, whitespace is squeezed. Never contains parameter
+    values, so it is safe to log next to patient data queries.
+    """
+    text = _STRING.sub("?", sql)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _SPACE.sub(" ", text).strip()
+    text = _IN_LIST.sub("IN (...)", text)
+    return _VALUES.sub("VALUES (...)", text)
+
+
+class QueryRecord:
+    __slots__ = ("fingerprint", "rows", "exec_time", "fetch_time", "fetched")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.rows = 0
+        self.exec_time = 0.0
+        self.fetch_time = 0.0
+        self.fetched = 0
+
+    @property
+    def duration(self):
+        return self.exec_time + self.fetch_time
+
+
+class InstrumentedCursor:
+    """
+    Cursor proxy that times execute*() and fetch*() calls.
+
+    Each statement becomes a QueryRecord on the current request (flask.g);
+    statements run outside a request are reported to QueryStats directly.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._record = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _start(self, sql):
+        self._finish()
+        self._record = QueryRecord(fingerprint(sql if isinstance(sql, str) else sql.decode()))
+
+    def _finish(self):
+        record, self._record = self._record, None
+        if record is not None and not has_request_context() and has_app_context():
+            get_query_stats().observe(record)
+
+    def _executed(self, started):
+        record = self._record
+        record.exec_time += time.perf_counter() - started
+        rowcount = self._cursor.rowcount
+        # Unbuffered cursors report -1 / 2**64-1 until the result is read; count fetched rows instead.
+        record.rows = rowcount if 0 <= rowcount < 2 ** 63 else 0
+        if has_request_context():
+            g.setdefault('_query_records', []).append(record)
+
+    def execute(self, query, args=None):
+        self._start(query)
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            self._executed(started)
+
+    def executemany(self, query, args):
+        self._start(query)
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            self._executed(started)
+
+    def _fetched(self, started, count):
+        record = self._record
+        if record is not None:
+            record.fetch_time += time.perf_counter() - started
+            record.fetched += count
+            record.rows = max(record.rows, record.fetched)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany() if size is None else self._cursor.fetchmany(size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def instrument(cursor):
+    """cursor_wrapper for ConnectionPool: every pooled cursor reports to query stats."""
+    return InstrumentedCursor(cursor)
+
+
+class _FingerprintStats:
+    __slots__ = ("count", "total", "max", "fetch", "rows", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.fetch = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, record):
+        duration_ms = record.duration * 1000
+        self.count += 1
+        self.total += duration_ms
+        self.fetch += record.fetch_time * 1000
+        self.rows += record.rows
+        self.max = max(self.max, duration_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if duration_ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls."""
+        wanted = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= wanted:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else round(self.max, 3)
+        return None
+
+    def as_dict(self, fingerprint):
+        labels = [str(b) for b in BUCKETS_MS] + ["+Inf"]
+        return {
+            "fingerprint": fingerprint,
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "fetch_ms": round(self.fetch, 3),
+            "rows": self.rows,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "histogram_ms": dict(zip(labels, self.buckets)),
+        }
+
+
+class QueryStats:
+    """
+    Per-process aggregate of executed statements.
+
+    Keeps a latency histogram per fingerprint (at most max_fingerprints, the
+    rest are folded into "<other>") and a rolling log of the latest statements
+    slower than slow_ms. Only fingerprints are stored, never parameters.
+    """
+
+    def __init__(self, slow_ms=200.0, slow_log_size=100, max_fingerprints=500):
+        self.slow_ms = slow_ms
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._by_fingerprint = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self.started_at = time.time()
+
+    def observe(self, record, endpoint=None):
+        slow = record.duration * 1000 >= self.slow_ms
+        with self._lock:
+            key = record.fingerprint
+            if key not in self._by_fingerprint and len(self._by_fingerprint) >= self.max_fingerprints:
+                key = OTHER_FINGERPRINT
+            stats = self._by_fingerprint.get(key)
+            if stats is None:
+                stats = self._by_fingerprint[key] = _FingerprintStats()
+            stats.add(record)
+            if slow:
+                self._slow.append({
+                    "at": datetime.datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+                    "endpoint": endpoint,
+                    "fingerprint": record.fingerprint,
+                    "duration_ms": round(record.duration * 1000, 3),
+                    "exec_ms": round(record.exec_time * 1000, 3),
+                    "fetch_ms": round(record.fetch_time * 1000, 3),
+                    "rows": record.rows,
+                })
+        return slow
+
+    def snapshot(self, sort="total_ms", limit=50):
+        with self._lock:
+            queries = [stats.as_dict(fp) for fp, stats in self._by_fingerprint.items()]
+            slow = list(self._slow)
+        queries.sort(key=lambda q: q.get(sort) or 0, reverse=True)
+        return {
+            "pid": os.getpid(),
+            "since": datetime.datetime.utcfromtimestamp(self.started_at).isoformat() + "Z",
+            "slow_ms": self.slow_ms,
+            "fingerprints": len(queries),
+            "queries": queries[:limit],
+            "slow_queries": slow[::-1],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._by_fingerprint.clear()
+            self._slow.clear()
+            self.started_at = time.time()
+
+
+def get_query_stats(app=None):
+    app = app or current_app
+    stats = app.extensions.get('query_stats')
+    if stats is None:
+        stats = app.extensions.setdefault('query_stats', QueryStats(
+            slow_ms=app.config.get('QUERY_SLOW_MS', 200.0),
+            slow_log_size=app.config.get('QUERY_SLOW_LOG_SIZE', 100),
+            max_fingerprints=app.config.get('QUERY_STATS_MAX_FINGERPRINTS', 500),
+        ))
+    return stats
+
+
+def request_summary():
+    """(count, exec seconds, fetch seconds) of the statements run so far in this request."""
+    records = g.get('_query_records', ())
+    return (len(records), sum(r.exec_time for r in records), sum(r.fetch_time for r in records))
+
+
+def init_app(app):
+    """
+    Reads the query instrumentation settings and registers the request hooks.
+
+    - QUERY_STATS_ENABLED: wrap pooled cursors (default true; read when the pool is built)
+    - QUERY_SLOW_MS: statements at or above this duration go to the slow-query log (200)
+    - QUERY_SLOW_LOG_SIZE: entries kept in the rolling slow-query log (100)
+    - QUERY_STATS_MAX_FINGERPRINTS: distinct fingerprints tracked per worker (500)
+    - QUERY_SERVER_TIMING: add a Server-Timing header with the request's DB time (true)
+    - ADMIN_TOKEN: bearer token of the /api/admin/queries report (unset: the report is disabled)
+    """
+    app.config.setdefault('QUERY_STATS_ENABLED',
+                          os.getenv('QUERY_STATS_ENABLED', 'true').lower() in ('1', 'true', 'yes'))
+    app.config.setdefault('QUERY_SLOW_MS', float(os.getenv('QUERY_SLOW_MS', '200')))
+    app.config.setdefault('QUERY_SLOW_LOG_SIZE', int(os.getenv('QUERY_SLOW_LOG_SIZE', '100')))
+    app.config.setdefault('QUERY_STATS_MAX_FINGERPRINTS', int(os.getenv('QUERY_STATS_MAX_FINGERPRINTS', '500')))
+    app.config.setdefault('QUERY_SERVER_TIMING',
+                          os.getenv('QUERY_SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes'))
+    app.config.setdefault('ADMIN_TOKEN', os.getenv('ADMIN_TOKEN') or None)
+
+    @app.after_request
+    def _server_timing(response):
+        count, exec_time, fetch_time = request_summary()
+        if count and app.config['QUERY_SERVER_TIMING']:
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={exec_time * 1000:.2f};desc="{count} queries", db-fetch;dur={fetch_time * 1000:.2f}',
+            )
+        return response
+
+    @app.teardown_request
+    def _record_queries(exc):
+        # Runs after streamed bodies are fully sent, so their fetch time is included.
+        records = g.pop('_query_records', None)
+        if not records:
+            return
+        stats = get_query_stats(app)
+        endpoint = request.endpoint
+        for record in records:
+            if stats.observe(record, endpoint):
+                diagnostics.warning("query.slow", fingerprint=record.fingerprint,
+                                    duration_ms=round(record.duration * 1000, 3), rows=record.rows)
+        slowest = max(records, key=lambda r: r.duration)
+        diagnostics.info(
+            "request.queries",
+            count=len(records),
+            exec_ms=round(sum(r.exec_time for r in records) * 1000, 3),
+            fetch_ms=round(sum(r.fetch_time for r in records) * 1000, 3),
+            rows=sum(r.rows for r in records),
+            slowest=slowest.fingerprint,
+            slowest_ms=round(slowest.duration * 1000, 3),
+        )
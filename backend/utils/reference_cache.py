@@ -0,0 +1,132 @@
+import hashlib
+import threading
+import time
+
+from flask import current_app, request
+
+from utils.db_utils import get_cursor
+
+# name -> ReferenceDataset, filled by the blueprints at import time
+DATASETS = {}
+
+
+class ReferenceDataset:
+    """A rarely-changing lookup table served straight from the cache."""
+
+    def __init__(self, name, sql, envelope=None, ttl=None, max_bytes=1024 * 1024):
+        self.name = name
+        self.sql = sql
+        self.envelope = envelope   # wrap rows as {"success": True, envelope: rows} when set
+        self.ttl = ttl             # None -> app.config['REFERENCE_CACHE_TTL']
+        self.max_bytes = max_bytes
+
+    def payload(self, rows):
+        if self.envelope:
+            return {"success": True, self.envelope: rows}
+        return rows
+
+
+class _Entry:
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body, etag, expires_at):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+def register_dataset(name, sql, envelope=None, ttl=None, max_bytes=1024 * 1024):
+    DATASETS[name] = ReferenceDataset(name, sql, envelope=envelope, ttl=ttl, max_bytes=max_bytes)
+    return DATASETS[name]
+
+
+class ReferenceCache:
+    """
+    Per-process cache of serialized reference datasets.
+
+    Each entry holds the exact JSON response body and its ETag, so a hit is a
+    dict lookup. Bodies larger than the dataset's max_bytes are never cached.
+    """
+
+    def __init__(self, default_ttl=300.0):
+        self.default_ttl = default_ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, dataset, fetch, dumps):
+        """Return (body, etag) for the dataset, loading it via fetch(sql) when missing or stale."""
+        entry = self._entries.get(dataset.name)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self.hits += 1
+            return entry.body, entry.etag
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(dataset.name, threading.Lock())
+        with load_lock:
+            # Another thread may have refreshed it while we waited.
+            entry = self._entries.get(dataset.name)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry.body, entry.etag
+
+            self.misses += 1
+            body = (dumps(dataset.payload(fetch(dataset.sql))) + "\n").encode("utf-8")
+            etag = hashlib.sha1(body).hexdigest()
+            if len(body) <= dataset.max_bytes:
+                ttl = self.default_ttl if dataset.ttl is None else dataset.ttl
+                self._entries[dataset.name] = _Entry(body, etag, time.monotonic() + ttl)
+            return body, etag
+
+    def invalidate(self, *names):
+        """Drop the given datasets (all of them when called without names)."""
+        with self._lock:
+            if not names:
+                self._entries.clear()
+            for name in names:
+                self._entries.pop(name, None)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": sum(len(e.body) for e in list(self._entries.values())),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def get_reference_cache(app=None):
+    app = app or current_app
+    cache = app.extensions.get('reference_cache')
+    if cache is None:
+        cache = app.extensions.setdefault(
+            'reference_cache', ReferenceCache(app.config.get('REFERENCE_CACHE_TTL', 300.0))
+        )
+    return cache
+
+
+def invalidate_reference_data(*names, app=None):
+    """Invalidation hook: call after writing to Insurance, Pharmacy, Specialization or Medications."""
+    get_reference_cache(app).invalidate(*names)
+
+
+def _fetch_rows(sql):
+    cursor = get_cursor()
+    cursor.execute(sql)
+    return cursor.fetchall()
+
+
+def reference_response(name):
+    """
+    Build the response for a registered dataset.
+
+    Sends the cached body with an ETag; a matching If-None-Match gets a bodyless 304.
+    """
+    dataset = DATASETS[name]
+    body, etag = get_reference_cache().get(dataset, _fetch_rows, current_app.json.dumps)
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
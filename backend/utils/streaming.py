@@ -0,0 +1,70 @@
+import pymysql
+from flask import Response, current_app, request, stream_with_context
+
+from utils import diagnostics
+from utils.db_utils import get_db_session
+
+
+def wants_stream():
+    """
+    True when the current request should get a streamed response.
+
+    `?stream=1` / `?stream=0` decide per request; otherwise endpoints listed in
+    STREAMING_ENDPOINTS (e.g. "patient_bp.get_activity_logs") stream by default.
+    """
+    flag = request.args.get('stream')
+    if flag is not None:
+        return flag.lower() in ('1', 'true', 'yes')
+    return request.endpoint in current_app.config.get('STREAMING_ENDPOINTS', ())
+
+
+def stream_query(sql, params, key):
+    """
+    Run `sql` on an unbuffered server-side cursor and stream the rows as
+    {"success": true, "<key>": [...]} in chunks.
+
+    Rows are pulled STREAM_BATCH_SIZE at a time and encoded as they arrive, so
+    worker memory does not depend on the size of the result. The query runs
+    before the response starts, so SQL errors still surface as a normal 500;
+    errors half way through can only truncate the body.
+    """
+    app = current_app._get_current_object()
+    batch_size = app.config.get('STREAM_BATCH_SIZE', 500)
+    dumps = app.json.dumps
+
+    conn = get_db_session().detach()
+    try:
+        cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+        cursor.execute(sql, params)
+    except Exception:
+        conn.invalidate()
+        raise
+
+    def generate():
+        done = False
+        try:
+            yield '{"success": true, %s: [' % dumps(key)
+            separator = ""
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield separator + ",".join(dumps(row) for row in rows)
+                separator = ","
+            yield "]}\n"
+            done = True
+        except Exception as e:
+            diagnostics.error("stream_query.failed", key=key, error=str(e))
+            raise
+        finally:
+            if done:
+                cursor.close()
+                conn.close()
+            else:
+                # Client went away or the read failed: don't drain the rest of
+                # the result set, just drop the connection.
+                conn.invalidate()
+
+    response = Response(stream_with_context(generate()), mimetype="application/json")
+    response.headers["X-Accel-Buffering"] = "no"
+    return response